@@ -5,6 +5,7 @@ import cohere
 from huggingface_hub import InferenceClient
 import requests
 import json
+from ..retry import retry, API_RETRY
 
 class AIProvider(ABC):
     @abstractmethod
@@ -25,25 +26,22 @@ class OpenAIProvider(AIProvider):
         self.model = config.get('ai_services', {}).get('openai', {}).get('model', 'gpt-3.5-turbo')
         openai.api_key = self.api_key
 
-    def generate_query(self, prompt: str) -> str:
+    @retry(strategy=API_RETRY, circuit_name='openai')
+    def _complete(self, system: str, content: str) -> str:
         response = openai.ChatCompletion.create(
             model=self.model,
             messages=[
-                {"role": "system", "content": "You are a music recommendation expert."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": system},
+                {"role": "user", "content": content}
             ]
         )
         return response.choices[0].message.content
 
+    def generate_query(self, prompt: str) -> str:
+        return self._complete("You are a music recommendation expert.", prompt)
+
     def analyze_mood(self, text: str) -> List[str]:
-        response = openai.ChatCompletion.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "Analyze the mood and genre of this music description."},
-                {"role": "user", "content": text}
-            ]
-        )
-        return response.choices[0].message.content.split(',')
+        return self._complete("Analyze the mood and genre of this music description.", text).split(',')
 
     def get_status(self) -> bool:
         return bool(self.api_key)
@@ -75,6 +73,7 @@ class OllamaProvider(AIProvider):
         self.host = config.get('ai_services', {}).get('ollama', {}).get('host', 'http://localhost:11434')
         self.model = config.get('ai_services', {}).get('ollama', {}).get('model', 'llama2')
 
+    @retry(strategy=API_RETRY, circuit_name='ollama')
     def _query_ollama(self, prompt: str) -> str:
         response = requests.post(
             f"{self.host}/api/generate",
@@ -83,6 +82,7 @@ class OllamaProvider(AIProvider):
                 "prompt": prompt
             }
         )
+        response.raise_for_status()
         return response.json()['response']
 
     def generate_query(self, prompt: str) -> str:
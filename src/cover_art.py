@@ -0,0 +1,290 @@
+from typing import List, Dict, Optional, Any, Iterable, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+from io import BytesIO
+import threading
+import hashlib
+import logging
+import time
+import os
+import re
+from .singleflight import SingleFlight
+from .scheduler import BandwidthScheduler
+
+# Přípony originálů podle Content-Type
+IMAGE_EXTS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp'
+}
+
+Size = Tuple[int, int]
+
+def parse_size(value: Union[str, int, Iterable[int], None], default: Size = (300, 300)) -> Size:
+    """Velikost obalu z konfigurace ('300x300', 500 nebo [300, 300])"""
+    if not value:
+        return default
+    if isinstance(value, int):
+        return value, value
+    if isinstance(value, str):
+        numbers = [int(n) for n in re.findall(r'\d+', value)]
+        if not numbers:
+            return default
+        return (numbers[0], numbers[1] if len(numbers) > 1 else numbers[0])
+    width, height = value
+    return int(width), int(height)
+
+def thumbnail_url(info: Dict[str, Any]) -> Optional[str]:
+    """URL největšího náhledu z informací yt-dlp"""
+    if info.get('thumbnail'):
+        return info['thumbnail']
+    thumbnails = info.get('thumbnails') or []
+    return thumbnails[-1].get('url') if thumbnails else None
+
+class CoverArtCache:
+    """Sdílená cache obalů alb a náhledů
+
+    Originál se stahuje jen jednou (klíčem je video_id, bez něj hash
+    URL) do `originals/`, každá velikost a kvalita se z něj odvodí jen
+    jednou do vlastní složky (`300x300_q90/`). Souběžné požadavky na
+    stejný obal se sloučí. Stejné soubory používá náhled ve vyhledávání,
+    zápis metadat i export do telefonu. Použití se zaznamená do času
+    přístupu souboru, prune() maže nejdéle nepoužité soubory nad limit
+    velikosti a stáří.
+    """
+    _instances: Dict[Path, 'CoverArtCache'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Union[str, Path], size: Size = (300, 300),
+                 quality: int = 90, workers: int = 4,
+                 max_bytes: int = 200 * 1024 * 1024, max_age: float = 90 * 86400):
+        self.root = Path(cache_dir).expanduser()
+        self.originals = self.root / 'originals'
+        self.size = parse_size(size)
+        self.quality = quality
+        self.workers = max(1, workers)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._flights = SingleFlight()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, cache_dir: Union[str, Path]) -> 'CoverArtCache':
+        """Instance sdílená v procesu pro danou složku"""
+        path = Path(cache_dir).expanduser()
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path)
+            return cls._instances[path]
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'CoverArtCache':
+        """Sdílená cache ve složce paths.cache_dir
+
+        Velikost a kvalita ze sekce metadata, limity cache
+        (covers_max_mb, covers_max_age_days) ze sekce cache.
+        """
+        cache_dir = config.get('paths', {}).get('cache_dir') or Path.home() / '.ytbai' / 'cache'
+        covers = cls.shared(Path(cache_dir) / 'covers')
+        metadata = config.get('metadata', {})
+        covers.size = parse_size(metadata.get('cover_size'))
+        covers.quality = int(metadata.get('jpeg_quality') or 90)
+        cache = config.get('cache', {})
+        covers.max_bytes = int(cache.get('covers_max_mb', 200)) * 1024 * 1024
+        covers.max_age = float(cache.get('covers_max_age_days', 90)) * 86400
+        return covers
+
+    @staticmethod
+    def key_for(url: Optional[str] = None, video_id: Optional[str] = None) -> str:
+        if video_id:
+            return re.sub(r'[^\w-]', '_', video_id)
+        return hashlib.sha1((url or '').encode()).hexdigest()[:20]
+
+    def original_path(self, key: str) -> Optional[Path]:
+        """Uložený originál (s příponou podle formátu), nebo None"""
+        for ext in IMAGE_EXTS.values():
+            path = self.originals / f"{key}{ext}"
+            if path.exists():
+                return path
+        return None
+
+    def original(self, url: Optional[str] = None, video_id: Optional[str] = None,
+                 priority: str = 'prefetch') -> Optional[Path]:
+        """Originál obalu - z cache, jinak se stáhne (bez URL jen z cache)"""
+        key = self.key_for(url, video_id)
+        path = self.original_path(key)
+        if path or not url:
+            return self._touch(path)
+        return self._flights.do(('original', key), lambda: self._download(url, key, priority))
+
+    def _download(self, url: str, key: str, priority: str) -> Optional[Path]:
+        # Mezitím ho mohlo stáhnout jiné vlákno
+        path = self.original_path(key)
+        if path:
+            return path
+        try:
+            import requests
+
+            with BandwidthScheduler.shared().slot(url, priority) as transfer:
+                response = requests.get(url, timeout=15)
+                response.raise_for_status()
+                transfer.consume(len(response.content))
+
+            content_type = response.headers.get('content-type', '').split(';')[0].strip()
+            ext = IMAGE_EXTS.get(content_type) or next(
+                (e for e in IMAGE_EXTS.values() if url.lower().split('?')[0].endswith(e)), '.jpg'
+            )
+            return self._write(self.originals / f"{key}{ext}", response.content)
+        except Exception as e:
+            logging.error(f"Chyba při stahování obalu {url}: {e}")
+            return None
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> Path:
+        """Atomický zápis - souběžný čtenář nikdy neuvidí poloviční soubor"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        temp_path.write_bytes(data)
+        temp_path.replace(path)
+        return path
+
+    @staticmethod
+    def _touch(path: Optional[Path]) -> Optional[Path]:
+        """Zaznamená použití do času přístupu (řídí pořadí mazání v prune)
+
+        Čas úpravy zůstává - soubor se při použití z cache nemění.
+        """
+        if path:
+            try:
+                os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+            except OSError:
+                pass
+        return path
+
+    def prune(self) -> int:
+        """Smaže soubory nepoužité déle než max_age, pak nejstarší nad max_bytes
+
+        Returns:
+            Počet smazaných souborů
+        """
+        files = []
+        for path in self.root.glob('*/*'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file() and not path.name.startswith('.'):
+                # Poslední použití - novější z času přístupu a vytvoření
+                files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+        files.sort()
+
+        now = time.time()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for used, size, path in files:
+            if now - used <= self.max_age and total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                removed += 1
+            except OSError as e:
+                logging.error(f"Chyba při mazání obalu {path.name}: {e}")
+        if removed:
+            logging.info(f"Z cache obalů smazáno {removed} souborů")
+        return removed
+
+    def variant_dir(self, size: Size, quality: int, pad: bool = False) -> Path:
+        return self.root / f"{size[0]}x{size[1]}_q{quality}{'_pad' if pad else ''}"
+
+    def cover(self, url: Optional[str] = None, video_id: Optional[str] = None,
+              size: Optional[Union[str, Size]] = None, quality: Optional[int] = None,
+              pad: bool = False, priority: str = 'batch') -> Optional[Path]:
+        """JPEG obalu v požadované velikosti (výchozí z konfigurace)
+
+        Args:
+            url: URL originálu (stačí, pokud originál ještě není v cache)
+            video_id: Klíč v cache
+            size: Velikost, obrázek se do ní vejde se zachováním poměru stran
+            quality: Kvalita JPEG
+            pad: Doplnit bílým okrajem na přesnou velikost (náhledy v terminálu)
+        """
+        size = parse_size(size, self.size)
+        quality = quality or self.quality
+        key = self.key_for(url, video_id)
+        target = self.variant_dir(size, quality, pad) / f"{key}.jpg"
+        if target.exists():
+            return self._touch(target)
+
+        original = self.original(url, video_id, priority)
+        if not original:
+            return None
+        return self._flights.do(
+            ('cover', key, size, quality, pad),
+            lambda: target if target.exists() else self._derive(original, target, size, quality, pad)
+        )
+
+    def cover_bytes(self, url: Optional[str] = None, video_id: Optional[str] = None,
+                    **kwargs) -> Optional[bytes]:
+        """Obsah obalu pro vložení do tagů"""
+        path = self.cover(url, video_id, **kwargs)
+        return path.read_bytes() if path else None
+
+    def _derive(self, original: Path, target: Path, size: Size, quality: int, pad: bool) -> Optional[Path]:
+        try:
+            from PIL import Image
+
+            img = Image.open(original).convert('RGB')
+            img.thumbnail(size)  # Zachová poměr stran
+            if pad:
+                # Vycentrování na bílém pozadí přesné velikosti
+                canvas = Image.new('RGB', size, 'white')
+                canvas.paste(img, ((size[0] - img.width) // 2, (size[1] - img.height) // 2))
+                img = canvas
+
+            output = BytesIO()
+            img.save(output, format='JPEG', quality=quality)
+            return self._write(target, output.getvalue())
+        except Exception as e:
+            logging.error(f"Chyba při zpracování obalu {original.name}: {e}")
+            return None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cover")
+            return self._executor
+
+    def prefetch(self, items: Iterable[Tuple[Optional[str], Optional[str]]],
+                 priority: str = 'prefetch') -> List[Future]:
+        """Stáhne originály na pozadí (dvojice URL, video_id), nečeká na výsledek"""
+        seen = set()
+        futures = []
+        for url, video_id in items:
+            key = self.key_for(url, video_id)
+            if not url or key in seen or self.original_path(key):
+                continue
+            seen.add(key)
+            futures.append(self._pool().submit(self.original, url, video_id, priority))
+        return futures
+
+    def covers(self, items: Iterable[Tuple[Optional[str], Optional[str]]],
+               **kwargs) -> Dict[str, Optional[Path]]:
+        """Obaly pro více skladeb najednou (stahují se souběžně)
+
+        Returns:
+            Klíč v cache -> cesta k obalu (None, pokud ho nelze získat)
+        """
+        items = list(items)
+        futures = {
+            self.key_for(url, video_id): self._pool().submit(self.cover, url, video_id, **kwargs)
+            for url, video_id in items
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+    def close(self) -> None:
+        with self._executor_lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
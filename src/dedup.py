@@ -0,0 +1,142 @@
+from typing import List, Dict, Optional, Any, Tuple
+from dataclasses import dataclass, field
+import re
+from .search_cache import canonical_query
+
+# Slova, která odlišují jen nahrání (video, kvalitu), ne skladbu
+NOISE_WORDS = {
+    'official', 'oficialni', 'video', 'audio', 'lyric', 'lyrics', 'text', 'visualizer',
+    'hq', 'hd', '4k', '1080p', '720p', 'mv', 'videoclip', 'remastered', 'remaster'
+}
+
+# Slova, která znamenají jinou nahrávku - v závorkách je zachováme
+DISTINCT_WORDS = {'live', 'remix', 'cover', 'acoustic', 'karaoke', 'instrumental', 'edit', 'mix'}
+
+# Přípony kanálů, které nejsou součástí jména interpreta
+CHANNEL_SUFFIX = re.compile(r'\s*(- topic|vevo|official|oficialni)$')
+BRACKETS = re.compile(r'[\(\[\{]([^\)\]\}]*)[\)\]\}]')
+FEATURING = re.compile(r'\b(ft|feat|featuring)\b[^-]*')
+TOKEN = re.compile(r'\w+')
+
+# Šířka koše délky v sekundách a tolerance rozdílu délek
+DURATION_BUCKET = 10
+DURATION_TOLERANCE = 10
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """Otisk skladby - normalizovaná slova interpreta a názvu a délka"""
+    tokens: str
+    duration: int = 0
+
+    @property
+    def bucket(self) -> int:
+        return self.duration // DURATION_BUCKET
+
+    def matches(self, other: 'Fingerprint') -> bool:
+        """Stejná slova a podobná délka (neznámá délka odpovídá jakékoli)"""
+        if self.tokens != other.tokens:
+            return False
+        if not self.duration or not other.duration:
+            return True
+        return abs(self.duration - other.duration) <= DURATION_TOLERANCE
+
+    def same_length(self, other: 'Fingerprint') -> bool:
+        """Obě délky jsou známé a liší se nejvýš o toleranci (jistá shoda)"""
+        return bool(self.duration and other.duration) and \
+            abs(self.duration - other.duration) <= DURATION_TOLERANCE
+
+@dataclass
+class DuplicateGroup:
+    """Skupina nahrávek téže skladby, první je hlavní"""
+    primary: Any
+    duplicates: List[Any] = field(default_factory=list)
+
+    @property
+    def items(self) -> List[Any]:
+        return [self.primary, *self.duplicates]
+
+def _field(item: Any, name: str, default: Any = None) -> Any:
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+def _duration_seconds(value: Any) -> int:
+    """Délka v sekundách z čísla nebo textu "m:ss" / "h:mm:ss" """
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str) and value:
+        try:
+            seconds = 0
+            for part in value.split(':'):
+                seconds = seconds * 60 + int(part)
+            return seconds
+        except ValueError:
+            return 0
+    return 0
+
+def _strip_brackets(text: str) -> str:
+    """Odstraní závorky s poznámkami o videu, poznámky o jiné nahrávce ponechá"""
+    def replace(match: re.Match) -> str:
+        inner = set(TOKEN.findall(match.group(1)))
+        return f" {match.group(1)} " if inner & DISTINCT_WORDS else ' '
+    return BRACKETS.sub(replace, text)
+
+def fingerprint(item: Any) -> Fingerprint:
+    """Vypočítá otisk výsledku (SearchResult, záznam yt-dlp nebo řádek knihovny)
+
+    Pokud název obsahuje "Interpret - Název", použije se jen název,
+    jinak se k němu přidá interpret (kanál bez "- Topic", "VEVO" apod.).
+    """
+    title = canonical_query(_field(item, 'title') or '')
+    title = _strip_brackets(title)
+
+    if ' - ' in title:
+        text = title
+    else:
+        artist = canonical_query(_field(item, 'artist') or _field(item, 'channel') or '')
+        text = f"{CHANNEL_SUFFIX.sub('', artist)} {title}"
+
+    text = FEATURING.sub('', text)
+    tokens = sorted({t for t in TOKEN.findall(text) if t not in NOISE_WORDS})
+    duration = _duration_seconds(_field(item, 'duration'))
+    return Fingerprint(' '.join(tokens), duration)
+
+def group_duplicates(items: List[Any]) -> List[DuplicateGroup]:
+    """Seskupí duplicity v lineárním čase
+
+    Kandidáti se hledají jen mezi skupinami se stejnými slovy
+    v sousedních koších délky. Pořadí skupin i hlavních položek
+    odpovídá prvnímu výskytu (tj. původnímu řazení).
+    """
+    groups: List[DuplicateGroup] = []
+    # slova -> koš délky (None = neznámá délka) -> [(otisk, index skupiny)]
+    buckets: Dict[str, Dict[Optional[int], List[Tuple[Fingerprint, int]]]] = {}
+
+    for item in items:
+        fp = fingerprint(item)
+        by_bucket = buckets.setdefault(fp.tokens, {})
+        bucket = fp.bucket if fp.duration else None
+
+        found = None
+        if not fp.tokens:
+            pass  # Bez slov nelze porovnávat
+        elif bucket is None:
+            # Neznámá délka - stačí jakákoli skupina se stejnými slovy
+            found = next((idx for entries in by_bucket.values() for _, idx in entries), None)
+        else:
+            for key in (bucket - 1, bucket, bucket + 1, None):
+                found = next((idx for other, idx in by_bucket.get(key, []) if fp.matches(other)), None)
+                if found is not None:
+                    break
+
+        if found is None:
+            groups.append(DuplicateGroup(primary=item))
+            by_bucket.setdefault(bucket, []).append((fp, len(groups) - 1))
+        else:
+            groups[found].duplicates.append(item)
+
+    return groups
+
+def collapse(items: List[Any]) -> List[Any]:
+    """Vrátí jen hlavní položky skupin duplicit"""
+    return [group.primary for group in group_duplicates(items)]
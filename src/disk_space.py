@@ -0,0 +1,195 @@
+from typing import Dict, Optional, Any, Union
+from dataclasses import dataclass
+from pathlib import Path
+import threading
+import logging
+import shutil
+import os
+from .exceptions import DiskSpaceError
+from .formats import best_audio_format, negotiate
+
+# Odhad, když o zdroji nevíme vůbec nic (přibližně 10 minut v 192 kb/s)
+FALLBACK_BYTES = 16 * 1024 * 1024
+
+# Tagy, obal alba a náhled stažený yt-dlp
+TAG_OVERHEAD = 512 * 1024
+
+def parse_bitrate(bitrate: Union[str, int, float, None]) -> int:
+    """Datový tok v bitech za sekundu ('192k' -> 192000, 320 -> 320000)"""
+    if not bitrate:
+        return 0
+    if isinstance(bitrate, str):
+        value = bitrate.strip().lower()
+        if value.endswith('k'):
+            return int(float(value[:-1]) * 1000)
+        return int(float(value))
+    # Čísla z yt-dlp (abr, tbr) jsou v kb/s
+    return int(bitrate * 1000)
+
+@dataclass
+class SizeEstimate:
+    """Odhad místa, které stažení skladby zabere
+
+    download - stažený zdroj, output - výsledný soubor. Během převodu
+    existují oba soubory současně, proto se rezervuje `peak`.
+    """
+    download: int
+    output: int
+    both_on_disk: bool = False
+    exact: bool = False  # velikost zdroje hlásí YouTube (filesize), ne odhad
+
+    @property
+    def peak(self) -> int:
+        return (self.download + self.output if self.both_on_disk else max(self.download, self.output)) + TAG_OVERHEAD
+
+def estimate_size(info: Dict[str, Any], target: str = 'mp3', bitrate: str = '192k') -> SizeEstimate:
+    """Odhadne velikost stažení z informací yt-dlp
+
+    Velikost zdroje bere z `filesize`/`filesize_approx` zvoleného formátu,
+    jinak z datového toku a délky. Výsledek převodu je cílový datový tok
+    krát délka, při kopírování nebo přebalení velikost zdroje.
+    """
+    selected = info if (info.get('filesize') or info.get('filesize_approx') or info.get('acodec')) \
+        else best_audio_format(info.get('formats', [])) or {}
+    duration = info.get('duration') or selected.get('duration') or 0
+
+    download = selected.get('filesize') or 0
+    exact = bool(download)
+    if not download:
+        download = selected.get('filesize_approx') or 0
+    if not download and duration:
+        download = parse_bitrate(selected.get('abr') or selected.get('tbr')) * duration // 8
+
+    plan = negotiate(info, target)
+    if plan.needs_encode and duration:
+        output = parse_bitrate(bitrate) * duration // 8
+    else:
+        output = download
+
+    if not download and not output:
+        return SizeEstimate(FALLBACK_BYTES, FALLBACK_BYTES)
+    download = download or output
+    return SizeEstimate(int(download), int(output or download), both_on_disk=plan.action != 'copy', exact=exact)
+
+class Reservation:
+    """Rezervované místo jednoho stažení, uvolní se přes release() nebo blok with"""
+    def __init__(self, manager: 'DiskSpaceManager', device: int, size: int, label: str):
+        self.manager = manager
+        self.device = device
+        self.size = size
+        self.label = label
+        self.written = 0
+        self.released = False
+
+    def account(self, written: int) -> None:
+        """Zapsaná data se už projevila ve volném místě - rezervace se o ně zmenší"""
+        self.manager._account(self, written)
+
+    def release(self) -> None:
+        self.manager._release(self)
+
+    @property
+    def outstanding(self) -> int:
+        """Část rezervace, která ještě není zapsaná na disku"""
+        return max(0, self.size - self.written)
+
+    def __enter__(self) -> 'Reservation':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+class DiskSpaceManager:
+    """Rezervace místa na disku pro souběžná stahování
+
+    Každé stažení si před začátkem rezervuje odhadnutou velikost.
+    Rezervace se porovná s volným místem zmenšeným o ještě nezapsané
+    rezervace ostatních úloh na stejném disku a o `margin`. Kontrola
+    i zápis rezervace proběhnou pod jedním zámkem, takže souběžné úlohy
+    disk společně nepřeplní.
+    """
+    _shared: Optional['DiskSpaceManager'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, margin: int = 64 * 1024 * 1024, target: str = 'mp3', bitrate: str = '192k'):
+        self.margin = margin
+        self.target = target
+        self.bitrate = bitrate
+        self._lock = threading.Lock()
+        self._reservations: Dict[int, Dict[int, Reservation]] = {}
+
+    @classmethod
+    def shared(cls) -> 'DiskSpaceManager':
+        """Správce sdílený v procesu (rezervace musí vidět všechna stahování)"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def configure_from(self, config: Dict[str, Any]) -> None:
+        """Cílový formát a datový tok pro odhady (conversion.output_format, audio.quality)"""
+        self.target = config.get('conversion', {}).get('output_format', self.target)
+        self.bitrate = config.get('audio', {}).get('quality', self.bitrate)
+        margin = config.get('download', {}).get('disk_margin_mb')
+        if margin is not None:
+            self.margin = int(margin) * 1024 * 1024
+
+    def estimate(self, info: Dict[str, Any]) -> SizeEstimate:
+        return estimate_size(info, self.target, self.bitrate)
+
+    @staticmethod
+    def _existing(path: Path) -> Path:
+        """Nejbližší existující nadřazená složka (cílová ještě nemusí existovat)"""
+        path = Path(path).expanduser()
+        while not path.exists() and path.parent != path:
+            path = path.parent
+        return path
+
+    def reserved(self, path: Union[str, Path]) -> int:
+        """Nezapsané rezervace na disku, na kterém leží `path`"""
+        device = os.stat(self._existing(path)).st_dev
+        with self._lock:
+            return sum(r.outstanding for r in self._reservations.get(device, {}).values())
+
+    def available(self, path: Union[str, Path]) -> int:
+        """Volné místo po odečtení rezervací a rezervy"""
+        path = self._existing(path)
+        return shutil.disk_usage(path).free - self.reserved(path) - self.margin
+
+    def reserve(self, size: int, path: Union[str, Path], label: str = '') -> Reservation:
+        """Atomicky rezervuje místo
+
+        Raises:
+            DiskSpaceError: Pokud se rezervace na disk nevejde
+        """
+        path = self._existing(path)
+        device = os.stat(path).st_dev
+        with self._lock:
+            reservations = self._reservations.setdefault(device, {})
+            outstanding = sum(r.outstanding for r in reservations.values())
+            free = shutil.disk_usage(path).free - outstanding - self.margin
+            if size > free:
+                raise DiskSpaceError(
+                    f"Nedostatek místa na disku pro {label or path}: potřeba "
+                    f"{size / 1024 / 1024:.1f} MB, volno {max(free, 0) / 1024 / 1024:.1f} MB"
+                )
+            reservation = Reservation(self, device, size, label)
+            reservations[id(reservation)] = reservation
+        return reservation
+
+    def reserve_for(self, info: Dict[str, Any], path: Union[str, Path], label: str = '') -> Reservation:
+        """Rezervace podle odhadu velikosti z informací yt-dlp"""
+        estimate = self.estimate(info)
+        logging.debug(f"Odhad místa pro {label}: {estimate.peak} B (přesný zdroj: {estimate.exact})")
+        return self.reserve(estimate.peak, path, label)
+
+    def _account(self, reservation: Reservation, written: int) -> None:
+        with self._lock:
+            reservation.written = max(reservation.written, written)
+
+    def _release(self, reservation: Reservation) -> None:
+        with self._lock:
+            if reservation.released:
+                return
+            reservation.released = True
+            self._reservations.get(reservation.device, {}).pop(id(reservation), None)
@@ -0,0 +1,176 @@
+from typing import List, Dict, Optional, Union
+from dataclasses import dataclass
+from pathlib import Path
+import threading
+import sqlite3
+import time
+
+# Stavy úlohy v pořadí, jak jimi prochází
+JOB_STATES = ('queued', 'fetching', 'transcoding', 'tagging', 'done', 'failed')
+FINISHED_STATES = ('done', 'failed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    artist TEXT NOT NULL DEFAULT '',
+    duration TEXT,
+    output_dir TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    path TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state);
+CREATE INDEX IF NOT EXISTS jobs_video_id ON jobs(video_id);
+"""
+
+@dataclass
+class DownloadJob:
+    """Úloha ve frontě stahování"""
+    id: int
+    video_id: str
+    title: str
+    artist: str
+    duration: Optional[str]
+    output_dir: str
+    state: str
+    attempts: int
+    error: Optional[str]
+    path: Optional[str]
+    created_at: float
+    updated_at: float
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+class DownloadQueue:
+    """Trvalá fronta stahování se žurnálem v SQLite
+
+    Každá změna stavu úlohy se hned zapíše na disk, takže po pádu
+    nebo ukončení aplikace lze nedokončené úlohy obnovit. Rozpracované
+    soubory (.part) navazují díky volbě `continuedl` v yt-dlp, pokud
+    se úloha spustí znovu se stejnou výstupní šablonou.
+    """
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> DownloadJob:
+        return DownloadJob(**dict(row))
+
+    def enqueue(self, video_id: str, title: str, output_dir: Union[str, Path],
+                artist: str = '', duration: Optional[str] = None) -> DownloadJob:
+        """Přidá úlohu do fronty
+
+        Pokud pro video už existuje nedokončená úloha, vrátí se ta.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"""
+                SELECT * FROM jobs
+                WHERE video_id = ? AND state NOT IN ({','.join('?' * len(FINISHED_STATES))})
+                """,
+                (video_id, *FINISHED_STATES)
+            ).fetchone()
+            if row:
+                return self._to_job(row)
+
+            cursor = self._conn.execute(
+                """
+                INSERT INTO jobs (video_id, title, artist, duration, output_dir, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (video_id, title or '', artist or '', duration, str(output_dir), now, now)
+            )
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        return self._to_job(row)
+
+    def set_state(self, job_id: int, state: str, error: Optional[str] = None,
+                  path: Optional[Union[str, Path]] = None) -> None:
+        """Zapíše nový stav úlohy"""
+        if state not in JOB_STATES:
+            raise ValueError(f"Neznámý stav úlohy: {state}")
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                UPDATE jobs SET
+                    state = ?,
+                    error = ?,
+                    path = COALESCE(?, path),
+                    attempts = attempts + (CASE WHEN ? = 'fetching' AND state != 'fetching' THEN 1 ELSE 0 END),
+                    updated_at = ?
+                WHERE id = ?
+                """,
+                (state, error, str(path) if path else None, state, time.time(), job_id)
+            )
+
+    def get(self, job_id: int) -> Optional[DownloadJob]:
+        """Vrátí úlohu podle ID"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def unfinished(self) -> List[DownloadJob]:
+        """Úlohy, které nejsou hotové ani neúspěšné (v pořadí přidání)"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT * FROM jobs
+                WHERE state NOT IN ({','.join('?' * len(FINISHED_STATES))})
+                ORDER BY id
+                """,
+                FINISHED_STATES
+            ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def failed(self) -> List[DownloadJob]:
+        """Neúspěšné úlohy"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs WHERE state = 'failed' ORDER BY id").fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def retry_failed(self) -> int:
+        """Vrátí neúspěšné úlohy zpět do fronty"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = 'queued', error = NULL, updated_at = ? WHERE state = 'failed'",
+                (time.time(),)
+            )
+        return cursor.rowcount
+
+    def clear_finished(self, older_than: float = 0) -> int:
+        """Smaže hotové úlohy starší než `older_than` sekund"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE state = 'done' AND updated_at <= ?",
+                (time.time() - older_than,)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Počet úloh v jednotlivých stavech"""
+        counts = {state: 0 for state in JOB_STATES}
+        with self._lock:
+            for row in self._conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state"):
+                counts[row['state']] = row['n']
+        return counts
+
+    def close(self) -> None:
+        """Uzavře spojení s databází"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,112 @@
+from typing import Iterable, Set, Union
+from pathlib import Path
+import threading
+import logging
+import json
+import os
+
+class DownloadedIndex:
+    """Seznam stažených videí s dotazem v konstantním čase
+
+    ID drží množina v paměti. Na disku je snímek `.downloaded.json`
+    (seznam ID, stejný formát jako dřív) a k němu žurnál
+    `.downloaded.log`, do kterého se nová ID jen připisují po řádcích.
+    Po `compact_after` zápisech a při každém načtení se žurnál sloučí
+    do snímku, takže z minulých sezení nezůstává.
+    """
+    SNAPSHOT_NAME = '.downloaded.json'
+    LOG_NAME = '.downloaded.log'
+
+    def __init__(self, directory: Union[str, Path], compact_after: int = 1000):
+        self.directory = Path(directory).expanduser()
+        self.snapshot_path = self.directory / self.SNAPSHOT_NAME
+        self.log_path = self.directory / self.LOG_NAME
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        self._ids: Set[str] = set()
+        self._log_entries = 0
+        self._load()
+
+    def _load(self) -> None:
+        if self.snapshot_path.exists():
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    self._ids.update(json.load(f))
+            except Exception as e:
+                logging.error(f"Chyba při načítání seznamu stažených: {e}")
+
+        if self.log_path.exists():
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    video_id = line.strip()
+                    if video_id:
+                        self._ids.add(video_id)
+                        self._log_entries += 1
+
+        # Žurnál z minulého sezení (close() se nemusel zavolat) patří do snímku
+        if self._log_entries:
+            self.compact()
+
+    def __contains__(self, video_id: str) -> bool:
+        return video_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def contains(self, video_id: str) -> bool:
+        """Zjistí, zda je video stažené"""
+        return video_id in self._ids
+
+    def contains_many(self, video_ids: Iterable[str]) -> Set[str]:
+        """Vrátí ta z daných ID, která jsou stažená (jeden dotaz pro celou stránku výsledků)"""
+        return self._ids.intersection(video_ids)
+
+    def add(self, video_id: str) -> bool:
+        """Označí video jako stažené, vrací False, pokud už bylo"""
+        return self.add_many([video_id]) == 1
+
+    def add_many(self, video_ids: Iterable[str]) -> int:
+        """Označí videa jako stažená jedním zápisem do žurnálu
+
+        Returns:
+            Počet nově přidaných ID
+        """
+        with self._lock:
+            new = [video_id for video_id in dict.fromkeys(video_ids) if video_id and video_id not in self._ids]
+            if not new:
+                return 0
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{video_id}\n" for video_id in new))
+            self._ids.update(new)
+            self._log_entries += len(new)
+
+            if self._log_entries >= self.compact_after:
+                self._compact()
+        return len(new)
+
+    def compact(self) -> None:
+        """Sloučí žurnál do snímku"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp_path = self.snapshot_path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(sorted(self._ids), f)
+                f.flush()
+                os.fsync(f.fileno())
+            # Snímek se nahradí atomicky, až pak se smaže žurnál
+            temp_path.replace(self.snapshot_path)
+            self.log_path.unlink(missing_ok=True)
+            self._log_entries = 0
+        except Exception as e:
+            logging.error(f"Chyba při ukládání seznamu stažených: {e}")
+
+    def close(self) -> None:
+        """Při ukončení sloučí nevyřízený žurnál"""
+        if self._log_entries:
+            self.compact()
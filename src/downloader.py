@@ -1,11 +1,15 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Callable, Tuple
 from pathlib import Path
 import asyncio
 import logging
 from dataclasses import dataclass
-from .exceptions import DownloadError
-from .retry import retry, DOWNLOAD_RETRY
+from .exceptions import DownloadError, DiskSpaceError, NetworkError
+from .retry import retry, is_transient, DOWNLOAD_RETRY
+from .ydl_pool import YDLPool
+from .download_queue import DownloadQueue
+from .scheduler import BandwidthScheduler, Transfer
+from .disk_space import DiskSpaceManager, Reservation
 import yt_dlp
 from rich.progress import Progress, TaskID
 
@@ -16,70 +20,262 @@ class DownloadTask:
     title: str
     output_path: Path
     options: Dict[str, Any]
-    progress_callback: Optional[callable] = None
+    progress_callback: Optional[Callable[[float], None]] = None
+    job_id: Optional[int] = None
+    priority: str = 'batch'
+    reservation: Optional[Reservation] = None
+
+    @property
+    def url(self) -> str:
+        return f"https://www.youtube.com/watch?v={self.video_id}"
+
+@dataclass
+class DownloadResult:
+    """Výsledek jedné úlohy stahování"""
+    task: DownloadTask
+    path: Optional[Path] = None
+    info: Optional[Dict[str, Any]] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def is_playlist(self) -> bool:
+        """Playlist se nestahuje ve workeru, rozhoduje o něm volající"""
+        return bool(self.info) and self.info.get('_type') == 'playlist'
 
 class ParallelDownloader:
-    """Třída pro paralelní stahování"""
-    def __init__(self, max_workers: int = 3):
-        self.max_workers = max_workers
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+    """Třída pro paralelní stahování
+
+    Blokující volání yt-dlp běží ve vláknech, počet souběžných stahování
+    omezuje `max_workers`. Chyba jedné úlohy neukončí ostatní - vrací se
+    v jejím DownloadResult. Je-li zadána fronta, zapisují se do ní stavy
+    úloh s `job_id` (fetching, transcoding, tagging, done, failed).
+    Se zadaným plánovačem čeká každé stažení na slot podle priority úlohy
+    a přenesená data se započítávají do společného limitu šířky pásma.
+    Se správcem místa si úloha před stažením rezervuje odhadnutou velikost,
+    rezervaci uvolní release_space() po dokončení nebo chybě.
+    """
+    def __init__(self, max_workers: int = 3, pool: Optional[YDLPool] = None,
+                 queue: Optional[DownloadQueue] = None,
+                 scheduler: Optional[BandwidthScheduler] = None,
+                 space: Optional[DiskSpaceManager] = None):
+        self.max_workers = max(1, max_workers)
+        self.pool = pool
+        self.queue = queue
+        self.scheduler = scheduler
+        self.space = space
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="download")
         self.active_downloads: Dict[str, TaskID] = {}
 
-    @retry(strategy=DOWNLOAD_RETRY)
-    async def download_single(self, task: DownloadTask) -> Path:
-        """Stažení jednoho souboru"""
+    @retry(strategy=DOWNLOAD_RETRY, circuit_name='youtube')
+    def download_single(self, task: DownloadTask,
+                        transfer: Optional[Transfer] = None) -> Tuple[Optional[Path], Dict[str, Any]]:
+        """Stažení jednoho souboru (blokující, volá se ve vlákně)
+
+        Returns:
+            Cesta k souboru a informace o videu. U playlistu se nic
+            nestahuje, cesta je None a položky jsou jen vypsané (bez
+            stránek videí) - stahují se jako samostatné úlohy.
+        """
         try:
-            with yt_dlp.YoutubeDL(task.options) as ydl:
-                url = f"https://www.youtube.com/watch?v={task.video_id}"
-                info = ydl.extract_info(url, download=True)
-                
+            with self._session(task, transfer) as ydl:
+                # Stránka videa se stahuje jen jednou - stejné info pak použije i stažení
+                info = ydl.extract_info(task.url, download=False, process=False)
+                if info.get('_type') == 'playlist':
+                    return None, self._flat_playlist(ydl, info)
+
+                # Místo se rezervuje podle skutečných formátů (při opakování už existuje)
+                if self.space and task.reservation is None:
+                    task.reservation = self.space.reserve_for(info, task.output_path, task.title)
+
+                info = ydl.process_ie_result(info, download=True)
+
                 if task.progress_callback:
                     task.progress_callback(100)
-                    
-                return task.output_path / f"{info['title']}.mp3"
+
+                return self._downloaded_path(ydl, info, task), info
+        except DiskSpaceError:
+            raise
         except Exception as e:
-            raise DownloadError(f"Chyba při stahování {task.title}", task.video_id, str(e))
+            # Přetížení nebo výpadek (429, 5xx, spojení) se opakuje, ostatní chyby ne
+            if is_transient(e):
+                raise NetworkError(f"Chyba sítě při stahování {task.title}", task.video_id, str(e)) from e
+            raise DownloadError(f"Chyba při stahování {task.title}", task.video_id, str(e)) from e
+
+    @staticmethod
+    def _flat_playlist(ydl, info: Dict[str, Any]) -> Dict[str, Any]:
+        """Vypíše položky playlistu bez stahování stránky každého videa"""
+        previous = ydl.params.get('extract_flat', False)
+        ydl.params['extract_flat'] = 'in_playlist'
+        try:
+            return ydl.process_ie_result(info, download=False)
+        finally:
+            ydl.params['extract_flat'] = previous
+
+    def _downloaded_path(self, ydl, info: Dict[str, Any], task: DownloadTask) -> Path:
+        """Cesta ke staženému souboru (po postprocesorech)"""
+        for download in info.get('requested_downloads') or []:
+            if download.get('filepath'):
+                return Path(download['filepath'])
+        path = Path(ydl.prepare_filename(info))
+        codec = self._extracted_codec(task.options)
+        return path.with_suffix(f'.{codec}') if codec else path
+
+    @staticmethod
+    def _extracted_codec(options: Dict[str, Any]) -> Optional[str]:
+        """Kodek, na který převádí FFmpegExtractAudio (None = soubor zůstává, jak byl stažen)"""
+        for pp in options.get('postprocessors', []):
+            if pp.get('key') == 'FFmpegExtractAudio':
+                return pp.get('preferredcodec', 'mp3')
+        return None
+
+    def _session(self, task: DownloadTask, transfer: Optional[Transfer] = None):
+        """Instance YoutubeDL pro úlohu - z poolu, pokud je k dispozici"""
+        hooks = [self._progress_hook(task.progress_callback)] if task.progress_callback else []
+        if transfer:
+            hooks.append(self._bandwidth_hook(transfer))
+        if self.space:
+            hooks.append(self._space_hook(task))
+        pp_hooks = [self._postprocessor_hook(task.job_id)] if self.queue and task.job_id else []
+        if self.pool:
+            # Profil drží stálé volby, cílová složka apod. platí jen po dobu zápůjčky
+            overrides, params = self.pool.split_options('download', task.options)
+            return self.pool.session(
+                'download',
+                overrides=overrides,
+                params=params,
+                progress_hooks=hooks,
+                postprocessor_hooks=pp_hooks
+            )
+        return yt_dlp.YoutubeDL({**task.options, 'progress_hooks': hooks, 'postprocessor_hooks': pp_hooks})
+
+    def _postprocessor_hook(self, job_id: int) -> Callable[[Dict[str, Any]], None]:
+        """Zapisuje do fronty fázi zpracování podle běžícího postprocesoru"""
+        def hook(d: Dict[str, Any]) -> None:
+            if d.get('status') != 'started':
+                return
+            name = d.get('postprocessor', '')
+            if 'ExtractAudio' in name or 'Convertor' in name:
+                self.queue.set_state(job_id, 'transcoding')
+            elif 'Metadata' in name or 'EmbedThumbnail' in name:
+                self.queue.set_state(job_id, 'tagging')
+        return hook
 
-    async def download_batch(self, tasks: List[DownloadTask], 
-                           progress: Optional[Progress] = None) -> List[Path]:
-        """Paralelní stahování více souborů"""
+    @staticmethod
+    def _bandwidth_hook(transfer: Transfer) -> Callable[[Dict[str, Any]], None]:
+        """Hook volaný z vlákna stahování - čekáním v něm se stahování přibrzdí"""
+        # Počty bajtů podle souboru (playlist stahuje více souborů jedním přenosem)
+        seen: Dict[str, int] = {}
+        def hook(d: Dict[str, Any]) -> None:
+            if d['status'] == 'downloading':
+                name = d.get('filename', '')
+                downloaded = d.get('downloaded_bytes') or 0
+                transfer.consume(downloaded - seen.get(name, 0))
+                seen[name] = max(downloaded, seen.get(name, 0))
+        return hook
+
+    @staticmethod
+    def _space_hook(task: DownloadTask) -> Callable[[Dict[str, Any]], None]:
+        """Zapsaná data zmenšují rezervaci - už se projevila ve volném místě"""
+        def hook(d: Dict[str, Any]) -> None:
+            if d['status'] == 'downloading' and task.reservation:
+                task.reservation.account(d.get('downloaded_bytes') or 0)
+        return hook
+
+    @staticmethod
+    def _progress_hook(callback: Callable[[float], None]) -> Callable[[Dict[str, Any]], None]:
+        """Převede hook yt-dlp na callback s procenty"""
+        def hook(d: Dict[str, Any]) -> None:
+            if d['status'] == 'downloading':
+                total = d.get('total_bytes') or d.get('total_bytes_estimate')
+                if total:
+                    callback(d.get('downloaded_bytes', 0) / total * 100)
+            elif d['status'] == 'finished':
+                callback(100)
+        return hook
+
+    def set_state(self, task: DownloadTask, state: str, error: Optional[str] = None,
+                  path: Optional[Path] = None) -> None:
+        """Zapíše stav úlohy do fronty (pokud je úloha v žurnálu)"""
+        if self.queue is not None and task.job_id is not None:
+            self.queue.set_state(task.job_id, state, error=error, path=path)
+
+    def release_space(self, task: DownloadTask) -> None:
+        """Uvolní rezervaci místa úlohy"""
+        if task.reservation is not None:
+            task.reservation.release()
+            task.reservation = None
+
+    def fetch(self, task: DownloadTask) -> DownloadResult:
+        """Stáhne úlohu a zachytí její chybu, jako hotovou ji neoznačí"""
+        try:
+            self.set_state(task, 'fetching')
+            if self.scheduler:
+                with self.scheduler.slot(task.url, task.priority) as transfer:
+                    path, info = self.download_single(task, transfer)
+            else:
+                path, info = self.download_single(task)
+            return DownloadResult(task, path=path, info=info)
+        except Exception as e:
+            logging.error(f"Chyba při stahování {task.title}: {e}")
+            self.set_state(task, 'failed', error=str(e))
+            self.release_space(task)
+            return DownloadResult(task, error=e)
+
+    def _run(self, task: DownloadTask) -> DownloadResult:
+        """Provede úlohu a zachytí její chybu"""
+        result = self.fetch(task)
+        # Playlist dokončuje volající
+        if result.ok and not result.is_playlist:
+            self.set_state(task, 'done', path=result.path)
+        self.release_space(task)
+        return result
+
+    async def download_batch(self, tasks: List[DownloadTask],
+                             progress: Optional[Progress] = None) -> List[DownloadResult]:
+        """Paralelní stahování více souborů
+
+        Args:
+            tasks: Úlohy ke stažení
+            progress: Progress, do kterého se přidá řádek pro každou úlohu
+
+        Returns:
+            Výsledky ve stejném pořadí jako úlohy
+        """
         if not tasks:
             return []
 
-        downloaded_files = []
-        task_futures = []
-
-        with Progress() as progress:
-            # Vytvoření progress barů pro každý soubor
+        if progress:
             for task in tasks:
-                task_id = progress.add_task(
-                    f"[cyan]Stahuji {task.title}...", 
-                    total=100
-                )
+                task_id = progress.add_task(f"[cyan]{task.title}", total=100)
                 self.active_downloads[task.video_id] = task_id
-                
-                # Vytvoření callback funkce pro aktualizaci progress baru
-                def make_callback(task_id):
-                    def callback(percent):
-                        progress.update(task_id, completed=percent)
-                    return callback
-                
-                task.progress_callback = make_callback(task_id)
-                
-                # Spuštění stahování v ThreadPoolu
-                future = asyncio.create_task(self.download_single(task))
-                task_futures.append(future)
-
-            # Čekání na dokončení všech stahování
-            try:
-                completed_tasks = await asyncio.gather(*task_futures)
-                downloaded_files.extend(completed_tasks)
-            except Exception as e:
-                logging.error(f"Chyba při paralelním stahování: {e}")
-                raise
-
-        return downloaded_files
+                task.progress_callback = self._progress_updater(progress, task_id, task.progress_callback)
+
+        loop = asyncio.get_running_loop()
+        futures = [loop.run_in_executor(self.executor, self._run, task) for task in tasks]
+        results = await asyncio.gather(*futures)
+
+        for task in tasks:
+            self.active_downloads.pop(task.video_id, None)
+        return list(results)
+
+    @staticmethod
+    def _progress_updater(progress: Progress, task_id: TaskID,
+                          callback: Optional[Callable[[float], None]]) -> Callable[[float], None]:
+        def update(percent: float) -> None:
+            progress.update(task_id, completed=percent)
+            if callback:
+                callback(percent)
+        return update
+
+    def download_all(self, tasks: List[DownloadTask],
+                     progress: Optional[Progress] = None) -> List[DownloadResult]:
+        """Synchronní varianta download_batch pro volání mimo event loop"""
+        return asyncio.run(self.download_batch(tasks, progress))
 
     def cleanup(self):
         """Úklid zdrojů"""
-        self.executor.shutdown(wait=True) 
\ No newline at end of file
+        self.executor.shutdown(wait=True)
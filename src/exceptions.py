@@ -16,10 +16,40 @@ class DownloadError(YTBAIError):
     """Chyba při stahování"""
     pass
 
+class DiskSpaceError(DownloadError):
+    """Stažení se nevejde na disk"""
+    pass
+
+class ConversionError(YTBAIError):
+    """Chyba při převodu nebo úpravě zvukového souboru"""
+    pass
+
 class PlaybackError(YTBAIError):
     """Chyba při přehrávání"""
     pass
 
 class AIError(YTBAIError):
     """Chyba v AI službách"""
-    pass 
\ No newline at end of file
+    pass
+
+class CacheError(YTBAIError):
+    """Chyba při práci s cache"""
+    pass
+
+class NetworkError(YTBAIError):
+    """Chyba síťového spojení"""
+    pass
+
+class RetryError(YTBAIError):
+    """Operace selhala i po opakovaných pokusech"""
+    def __init__(self, message: str, attempts: int = 0, last_exception: Optional[Exception] = None):
+        super().__init__(message)
+        self.attempts = attempts
+        self.last_exception = last_exception
+
+class CircuitOpenError(YTBAIError):
+    """Backend je po opakovaných chybách dočasně vypnutý (jistič je rozpojený)"""
+    def __init__(self, message: str, service: str = '', retry_in: float = 0.0):
+        super().__init__(message)
+        self.service = service
+        self.retry_in = retry_in
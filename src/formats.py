@@ -0,0 +1,71 @@
+from typing import List, Dict, Optional, Any
+from dataclasses import dataclass
+
+# Kodeky (acodec z yt-dlp), které lze bez převodu uložit do výstupního formátu
+CODEC_FAMILIES = {
+    'mp3': ('mp3',),
+    'm4a': ('aac', 'mp4a'),
+    'ogg': ('vorbis',),
+    'opus': ('opus',)
+}
+
+# Výběr formátu pro yt-dlp - přednost má zdroj, který nebude potřeba převádět
+FORMAT_SELECTORS = {
+    'mp3': 'bestaudio/best',
+    'm4a': 'bestaudio[ext=m4a]/bestaudio/best',
+    'ogg': 'bestaudio[acodec=vorbis]/bestaudio/best',
+    'opus': 'bestaudio[acodec=opus]/bestaudio/best'
+}
+
+@dataclass
+class FormatPlan:
+    """Výsledek vyjednání formátu
+
+    action:
+        'copy' - soubor už je v cílovém formátu, nic se nedělá
+        'remux' - kodek odpovídá, mění se jen kontejner (ffmpeg -c:a copy)
+        'transcode' - je nutné překódování
+    """
+    action: str
+    acodec: str = ''
+    ext: str = ''
+    abr: float = 0
+
+    @property
+    def needs_encode(self) -> bool:
+        return self.action == 'transcode'
+
+def format_selector(target: str) -> str:
+    """Výraz pro volbu 'format' v yt-dlp pro daný výstupní formát"""
+    return FORMAT_SELECTORS.get(target, 'bestaudio/best')
+
+def best_audio_format(formats: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Najde audio formát (bez videa) s nejvyšším datovým tokem"""
+    best = None
+    for fmt in formats or []:
+        if fmt.get('acodec') != 'none' and fmt.get('vcodec') == 'none':  # pouze audio
+            if not best or (fmt.get('abr') or 0) > (best.get('abr') or 0):
+                best = fmt
+    return best
+
+def codec_family(acodec: str) -> str:
+    """Základní název kodeku ('mp4a.40.2' -> 'mp4a', 'opus' -> 'opus')"""
+    return (acodec or '').split('.')[0].lower()
+
+def negotiate(info: Dict[str, Any], target: str) -> FormatPlan:
+    """Rozhodne, zda stažený zdroj stačí zkopírovat, přebalit, nebo převést
+
+    Args:
+        info: Informace o videu z yt-dlp (vybraný formát, případně seznam formátů)
+        target: Výstupní formát z conversion.output_format
+    """
+    selected = info if info.get('acodec') else best_audio_format(info.get('formats', [])) or {}
+    acodec = codec_family(selected.get('acodec', ''))
+    ext = selected.get('ext', '')
+    abr = selected.get('abr') or 0
+
+    if acodec not in CODEC_FAMILIES.get(target, ()):
+        return FormatPlan('transcode', acodec, ext, abr)
+    if ext == target:
+        return FormatPlan('copy', acodec, ext, abr)
+    return FormatPlan('remux', acodec, ext, abr)
@@ -0,0 +1,201 @@
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Set, Tuple, Union
+from pathlib import Path
+import threading
+import logging
+import random
+import json
+import os
+import re
+
+Song = Dict[str, Any]
+
+class GenreCatalog:
+    """Katalog stažených skladeb podle žánru
+
+    Pro každý žánr drží seznam skladeb (náhodný výběr v konstantním čase)
+    a množinu ID (kontrola duplicit v konstantním čase). Snímek zůstává
+    v `genre_list.json` ve stejném formátu, nové skladby se připisují do
+    žurnálu `genre_list.log` (JSON na řádek) a po `compact_after`
+    zápisech se sloučí do snímku.
+    """
+    # Sdílené instance v procesu podle cesty
+    _instances: Dict[Path, 'GenreCatalog'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: Union[str, Path], compact_after: int = 200):
+        self.path = Path(path).expanduser()
+        self.log_path = self.path.with_suffix('.log')
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._load()
+
+    @classmethod
+    def shared(cls, path: Union[str, Path]) -> 'GenreCatalog':
+        """Instance sdílená v procesu, znovu načtená, jen když se soubory změnily"""
+        path = Path(path).expanduser()
+        with cls._instances_lock:
+            catalog = cls._instances.get(path)
+            if catalog is None:
+                catalog = cls._instances[path] = cls(path)
+        catalog.refresh()
+        return catalog
+
+    def _file_stamp(self) -> Tuple:
+        stamp = []
+        for file in (self.path, self.log_path):
+            try:
+                stat = file.stat()
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _load(self) -> None:
+        with self._lock:
+            self._songs: Dict[str, List[Song]] = {}
+            self._ids: Dict[str, Set[str]] = {}
+            self._pattern: Optional[re.Pattern] = None
+            self._log_entries = 0
+
+            if self.path.exists():
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        for genre, songs in json.load(f).items():
+                            for song in songs:
+                                self._insert(genre, song)
+                except Exception as e:
+                    logging.error(f"Chyba při načítání seznamu žánrů: {e}")
+
+            if self.log_path.exists():
+                with open(self.log_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # Neúplný poslední řádek po pádu
+                        self._insert(entry['genre'], entry['song'])
+                        self._log_entries += 1
+
+            self._stamp = self._file_stamp()
+
+    def refresh(self) -> bool:
+        """Znovu načte katalog, pokud soubory změnil někdo jiný"""
+        with self._lock:
+            if self._file_stamp() == self._stamp:
+                return False
+            self._load()
+            return True
+
+    def _insert(self, genre: str, song: Song) -> bool:
+        video_id = song.get('video_id')
+        ids = self._ids.setdefault(genre, set())
+        if video_id in ids:
+            return False
+        if genre not in self._songs:
+            self._pattern = None  # Nový žánr - výraz pro hledání v textu se sestaví znovu
+        self._songs.setdefault(genre, []).append(song)
+        if video_id:
+            ids.add(video_id)
+        return True
+
+    def add(self, genre: str, song: Song) -> bool:
+        """Přidá skladbu do žánru, vrací False, pokud tam už je"""
+        return self.add_many([(genre, song)]) == 1
+
+    def add_many(self, items: Iterable[Tuple[str, Song]]) -> int:
+        """Přidá skladby jedním zápisem do žurnálu
+
+        Returns:
+            Počet nově přidaných skladeb
+        """
+        with self._lock:
+            self.refresh()
+            lines = []
+            for genre, song in items:
+                if genre and self._insert(genre, song):
+                    lines.append(json.dumps({'genre': genre, 'song': song}, ensure_ascii=False))
+            if not lines:
+                return 0
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{line}\n" for line in lines))
+            self._log_entries += len(lines)
+
+            if self._log_entries >= self.compact_after:
+                self._compact()
+            self._stamp = self._file_stamp()
+            return len(lines)
+
+    def compact(self) -> None:
+        """Sloučí žurnál do genre_list.json"""
+        with self._lock:
+            self._compact()
+            self._stamp = self._file_stamp()
+
+    def _compact(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._songs, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            temp_path.replace(self.path)
+            self.log_path.unlink(missing_ok=True)
+            self._log_entries = 0
+        except Exception as e:
+            logging.error(f"Chyba při ukládání seznamu žánrů: {e}")
+
+    def genres(self) -> List[str]:
+        """Žánry, které obsahují alespoň jednu skladbu"""
+        return [genre for genre, songs in self._songs.items() if songs]
+
+    def tracks(self, genre: str) -> List[Song]:
+        return list(self._songs.get(genre, []))
+
+    def items(self) -> Iterator[Tuple[str, Song]]:
+        """Všechny dvojice (žánr, skladba)"""
+        for genre, songs in list(self._songs.items()):
+            for song in songs:
+                yield genre, song
+
+    def contains(self, genre: str, video_id: str) -> bool:
+        return video_id in self._ids.get(genre, ())
+
+    def random_track(self, genre: Optional[str] = None) -> Optional[Tuple[str, Song]]:
+        """Náhodná skladba ze žánru (bez žánru z náhodného neprázdného žánru)"""
+        if genre is None:
+            genres = self.genres()
+            if not genres:
+                return None
+            genre = random.choice(genres)
+        songs = self._songs.get(genre)
+        if not songs:
+            return None
+        return genre, random.choice(songs)
+
+    def genres_in_text(self, text: str) -> List[str]:
+        """Žánry zmíněné v textu (bez ohledu na velikost písmen) v pořadí výskytu
+
+        Všechny žánry se hledají jedním regulárním výrazem, delší názvy
+        mají přednost ("hard rock" před "rock").
+        """
+        with self._lock:
+            if self._pattern is None:
+                names = sorted(self.genres(), key=len, reverse=True)
+                self._pattern = re.compile('|'.join(map(re.escape, names)), re.IGNORECASE) if names else None
+            pattern = self._pattern
+        if pattern is None:
+            return []
+
+        lookup = {genre.lower(): genre for genre in self.genres()}
+        found = []
+        for match in pattern.finditer(text):
+            genre = lookup.get(match.group(0).lower())
+            if genre and genre not in found:
+                found.append(genre)
+        return found
+
+    def __len__(self) -> int:
+        return sum(len(songs) for songs in self._songs.values())
@@ -0,0 +1,314 @@
+from typing import List, Dict, Optional, Any, Iterable, Union
+from pathlib import Path
+import threading
+import sqlite3
+import logging
+import time
+import re
+from .dedup import fingerprint
+from .genre_catalog import GenreCatalog
+
+# unicode61 s remove_diacritics 2 porovnává "kabat" i "Kabát" stejně
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    video_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    artist TEXT NOT NULL DEFAULT '',
+    genre TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '',
+    path TEXT,
+    duration TEXT,
+    added_at REAL NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5(
+    title, artist, genre, tags,
+    content='tracks',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS tracks_ai AFTER INSERT ON tracks BEGIN
+    INSERT INTO tracks_fts(rowid, title, artist, genre, tags)
+    VALUES (new.rowid, new.title, new.artist, new.genre, new.tags);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tracks_ad AFTER DELETE ON tracks BEGIN
+    INSERT INTO tracks_fts(tracks_fts, rowid, title, artist, genre, tags)
+    VALUES ('delete', old.rowid, old.title, old.artist, old.genre, old.tags);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tracks_au AFTER UPDATE ON tracks BEGIN
+    INSERT INTO tracks_fts(tracks_fts, rowid, title, artist, genre, tags)
+    VALUES ('delete', old.rowid, old.title, old.artist, old.genre, old.tags);
+    INSERT INTO tracks_fts(rowid, title, artist, genre, tags)
+    VALUES (new.rowid, new.title, new.artist, new.genre, new.tags);
+END;
+"""
+
+class LibraryIndex:
+    """Fulltextový index stažené hudby (SQLite FTS5)
+
+    Indexuje název, interpreta, žánr a tagy. Vyhledávání nerozlišuje
+    velikost písmen ani diakritiku a poslední slovo dotazu se hledá
+    jako prefix, takže funguje i při psaní.
+    """
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+
+    def _migrate(self) -> None:
+        """Doplní sloupce přidané v novějších verzích"""
+        columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(tracks)")}
+        if 'fingerprint' not in columns:
+            self._conn.execute("ALTER TABLE tracks ADD COLUMN fingerprint TEXT")
+            rows = self._conn.execute("SELECT video_id, title, artist, duration FROM tracks").fetchall()
+            self._conn.executemany(
+                "UPDATE tracks SET fingerprint = ? WHERE video_id = ?",
+                [(fingerprint(dict(row)).tokens, row['video_id']) for row in rows]
+            )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tracks_fingerprint ON tracks(fingerprint)")
+
+    def add_track(self, video_id: str, title: str, artist: str = '',
+                  genre: Optional[str] = None, tags: Optional[Iterable[str]] = None,
+                  path: Optional[Union[str, Path]] = None, duration: Optional[str] = None) -> None:
+        """Přidá nebo aktualizuje skladbu v indexu"""
+        if not video_id:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO tracks (video_id, title, artist, genre, tags, path, duration, added_at, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    fingerprint = excluded.fingerprint,
+                    title = excluded.title,
+                    artist = excluded.artist,
+                    genre = CASE WHEN excluded.genre != '' THEN excluded.genre ELSE genre END,
+                    tags = CASE WHEN excluded.tags != '' THEN excluded.tags ELSE tags END,
+                    path = COALESCE(excluded.path, path),
+                    duration = COALESCE(excluded.duration, duration)
+                """,
+                (
+                    video_id,
+                    title or '',
+                    artist or '',
+                    genre or '',
+                    ' '.join(tags or []),
+                    str(path) if path else None,
+                    duration,
+                    time.time(),
+                    fingerprint({'title': title, 'artist': artist, 'duration': duration}).tokens
+                )
+            )
+
+    def add_result(self, result: Any, path: Optional[Union[str, Path]] = None,
+                   genre: Optional[str] = None) -> None:
+        """Přidá výsledek vyhledávání (SearchResult) do indexu"""
+        self.add_track(
+            video_id=result.video_id,
+            title=result.title,
+            artist=result.artist,
+            genre=genre or getattr(result, 'genre', None),
+            tags=getattr(result, 'tags', None),
+            path=path,
+            duration=getattr(result, 'duration', None)
+        )
+
+    def remove(self, video_id: str) -> None:
+        """Odstraní skladbu z indexu"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tracks WHERE video_id = ?", (video_id,))
+
+    def contains(self, video_id: str) -> bool:
+        """Zjistí, zda je skladba v indexu"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM tracks WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return row is not None
+
+    def find_duplicate(self, item: Any) -> Optional[Dict[str, Any]]:
+        """Najde v knihovně jinou nahrávku téže skladby
+
+        Args:
+            item: SearchResult nebo záznam yt-dlp
+
+        Returns:
+            Řádek knihovny, nebo None pokud skladba v knihovně není
+        """
+        fp = fingerprint(item)
+        if not fp.tokens:
+            return None
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT video_id, title, artist, genre, tags, path, duration, added_at
+                FROM tracks WHERE fingerprint = ?
+                """,
+                (fp.tokens,)
+            ).fetchall()
+        for row in rows:
+            track = dict(row)
+            if fingerprint(track).matches(fp):
+                return track
+        return None
+
+    def video_ids_for_paths(self, paths: Iterable[Union[str, Path]]) -> Dict[str, str]:
+        """Video ID skladeb podle cesty k souboru (jeden dotaz pro celý seznam)
+
+        Returns:
+            Cesta -> video_id (jen pro cesty, které jsou v indexu)
+        """
+        paths = [str(path) for path in paths]
+        found: Dict[str, str] = {}
+        with self._lock:
+            # Po dávkách kvůli limitu parametrů SQLite
+            for start in range(0, len(paths), 500):
+                chunk = paths[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT path, video_id FROM tracks WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                found.update((row['path'], row['video_id']) for row in rows)
+        return found
+
+    def count(self) -> int:
+        """Počet skladeb v indexu"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    @staticmethod
+    def _match_expression(query: str) -> Optional[str]:
+        """Převede dotaz uživatele na výraz FTS5
+
+        Každé slovo se uzavře do uvozovek (žádná speciální syntaxe FTS5),
+        poslední slovo se hledá jako prefix.
+        """
+        tokens = re.findall(r'\w+', query or '')
+        if not tokens:
+            return None
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def search(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Vyhledá skladby v knihovně
+
+        Args:
+            query: Dotaz (slova se kombinují jako AND)
+            limit: Maximální počet výsledků
+
+        Returns:
+            Seznam skladeb seřazených podle relevance (bm25)
+        """
+        expression = self._match_expression(query)
+        if not expression:
+            return []
+        try:
+            with self._lock:
+                # Řadí se všechny shody - omezení předem by mohlo vynechat nejlepší
+                rows = self._conn.execute(
+                    """
+                    SELECT t.video_id, t.title, t.artist, t.genre, t.tags,
+                           t.path, t.duration, t.added_at
+                    FROM (
+                        SELECT rowid, bm25(tracks_fts, 10.0, 5.0, 2.0, 1.0) AS score
+                        FROM tracks_fts
+                        WHERE tracks_fts MATCH ?
+                        ORDER BY score
+                        LIMIT ?
+                    ) f
+                    JOIN tracks t ON t.rowid = f.rowid
+                    ORDER BY f.score
+                    """,
+                    (expression, limit)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Chyba při vyhledávání v knihovně: {e}")
+            return []
+        return [dict(row) for row in rows]
+
+    def rebuild_from_library(self, music_dir: Union[str, Path],
+                             genre_catalog: Optional[GenreCatalog] = None) -> int:
+        """Naplní index z existujících souborů
+
+        Prochází MP3 soubory v `music_dir` (ID3 tagy, případně název souboru
+        ve tvaru "Interpret - Název") a žánry z katalogu žánrů.
+        Soubor se přiřadí ke skladbě z katalogu podle interpreta a názvu,
+        ID podle cesty k souboru dostanou jen soubory bez shody v katalogu.
+
+        Returns:
+            Počet zaindexovaných skladeb
+        """
+        music_dir = Path(music_dir).expanduser()
+        tracks: Dict[str, Dict[str, Any]] = {}
+        # Otisk interpreta a názvu -> skladba z katalogu
+        by_fingerprint: Dict[str, Dict[str, Any]] = {}
+
+        # Žánry ze seznamu stažených skladeb
+        if genre_catalog:
+            for genre, song in genre_catalog.items():
+                if song.get('video_id'):
+                    track = tracks[song['video_id']] = {
+                        'video_id': song['video_id'],
+                        'title': song.get('title', ''),
+                        'artist': song.get('artist', ''),
+                        'genre': genre
+                    }
+                    tokens = fingerprint(track).tokens
+                    if tokens:
+                        by_fingerprint.setdefault(tokens, track)
+
+        try:
+            from mutagen.easyid3 import EasyID3
+        except ImportError:
+            EasyID3 = None
+
+        if music_dir.exists():
+            for file in music_dir.rglob('*.mp3'):
+                title, artist, genre = file.stem, '', ''
+                if ' - ' in title:
+                    artist, title = title.split(' - ', 1)
+                if EasyID3:
+                    try:
+                        tags = EasyID3(str(file))
+                        title = tags.get('title', [title])[0]
+                        artist = tags.get('artist', [artist])[0]
+                        genre = tags.get('genre', [''])[0]
+                    except Exception:
+                        pass
+
+                video_id = f"file:{file.relative_to(music_dir).as_posix()}"
+                known = by_fingerprint.get(fingerprint({'title': title, 'artist': artist}).tokens)
+                if known and not known.get('path'):
+                    known['path'] = file
+                    known['genre'] = known['genre'] or genre
+                    # Záznam podle cesty z dřívějšího sestavení už není potřeba
+                    self.remove(video_id)
+                    continue
+
+                tracks[video_id] = {
+                    'video_id': video_id,
+                    'title': title,
+                    'artist': artist,
+                    'genre': genre,
+                    'path': file
+                }
+
+        for track in tracks.values():
+            self.add_track(**track)
+        return len(tracks)
+
+    def close(self) -> None:
+        """Uzavře spojení s databází"""
+        with self._lock:
+            self._conn.close()
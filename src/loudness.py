@@ -0,0 +1,333 @@
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Tuple, Union
+from dataclasses import dataclass
+from pathlib import Path
+import subprocess
+import threading
+import sqlite3
+import logging
+import math
+import time
+import re
+from .exceptions import ConversionError
+
+# Souhrn filtru ebur128 (poslední blok "Summary:" ve výstupu ffmpeg)
+INTEGRATED = re.compile(r'I:\s+(-?[\d.]+|-inf) LUFS')
+LOUDNESS_RANGE = re.compile(r'LRA:\s+(-?[\d.]+) LU\b')
+TRUE_PEAK = re.compile(r'Peak:\s+(-?[\d.]+|-inf) dBFS')
+DURATION = re.compile(r'Duration: (\d+):(\d+):([\d.]+)')
+
+# Referenční úroveň tagů R128_*_GAIN v Opus (RFC 7845) - nezávislá na cílové hlasitosti
+R128_REFERENCE = -23.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS loudness (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    integrated REAL NOT NULL,
+    true_peak REAL NOT NULL,
+    lra REAL NOT NULL DEFAULT 0,
+    duration REAL NOT NULL DEFAULT 0,
+    album TEXT,
+    measured_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS loudness_album ON loudness(album);
+"""
+
+@dataclass
+class LoudnessMeasurement:
+    """Změřená hlasitost skladby podle EBU R128"""
+    integrated: float       # LUFS
+    true_peak: float        # dBTP
+    lra: float = 0.0        # LU
+    duration: float = 0.0   # sekundy
+
+    @property
+    def peak_ratio(self) -> float:
+        """True peak jako lineární amplituda (formát REPLAYGAIN_*_PEAK)"""
+        return 10 ** (self.true_peak / 20)
+
+def _level(value: str) -> float:
+    return -math.inf if value == '-inf' else float(value)
+
+def parse_ebur128(output: str) -> LoudnessMeasurement:
+    """Přečte souhrn filtru ebur128 z výstupu ffmpeg"""
+    summary = output[output.rfind('Summary:'):]
+    integrated = INTEGRATED.search(summary)
+    peak = TRUE_PEAK.search(summary)
+    if 'Summary:' not in output or not integrated or not peak:
+        raise ConversionError("Výstup ffmpeg neobsahuje měření hlasitosti")
+
+    lra = LOUDNESS_RANGE.search(summary)
+    duration = 0.0
+    if match := DURATION.search(output):
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    return LoudnessMeasurement(
+        integrated=_level(integrated.group(1)),
+        true_peak=_level(peak.group(1)),
+        lra=float(lra.group(1)) if lra else 0.0,
+        duration=duration
+    )
+
+def measure(path: Path, ffmpeg: str = 'ffmpeg') -> LoudnessMeasurement:
+    """Změří integrovanou hlasitost a true peak (jeden průchod dekodérem)"""
+    process = subprocess.run(
+        [ffmpeg, '-hide_banner', '-nostats', '-i', str(path),
+         '-filter_complex', 'ebur128=peak=true', '-f', 'null', '-'],
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    if process.returncode != 0:
+        raise ConversionError(f"Měření hlasitosti {path.name} selhalo: {process.stderr[-500:].strip()}")
+    return parse_ebur128(process.stderr)
+
+def album_measurement(measurements: Iterable[LoudnessMeasurement]) -> Optional[LoudnessMeasurement]:
+    """Hlasitost alba - energetický průměr skladeb vážený délkou"""
+    measurements = [m for m in measurements if m.integrated != -math.inf]
+    if not measurements:
+        return None
+
+    weights = [m.duration or 1.0 for m in measurements]
+    energy = sum(w * 10 ** (m.integrated / 10) for w, m in zip(weights, measurements)) / sum(weights)
+    return LoudnessMeasurement(
+        integrated=10 * math.log10(energy),
+        true_peak=max(m.true_peak for m in measurements),
+        lra=max(m.lra for m in measurements),
+        duration=sum(m.duration for m in measurements)
+    )
+
+def gain_for(measurement: LoudnessMeasurement, target: float, peak_limit: float) -> float:
+    """Zisk v dB pro dosažení cílové hlasitosti, omezený tak, aby nedošlo k ořezu"""
+    if measurement.integrated == -math.inf:
+        return 0.0
+    return min(target - measurement.integrated, peak_limit - measurement.true_peak)
+
+def write_gain_tags(path: Path, track_gain: float, track_peak: float,
+                    album_gain: Optional[float] = None, album_peak: Optional[float] = None,
+                    r128_track_gain: Optional[float] = None,
+                    r128_album_gain: Optional[float] = None) -> None:
+    """Zapíše tagy ReplayGain (MP3, M4A, Ogg, FLAC) nebo R128 (Opus)
+
+    Zisky jsou v dB, peaky jako lineární amplituda. Zisky ReplayGain
+    míří na cílovou hlasitost, zisky R128 na R128_REFERENCE (-23 LUFS) -
+    cílovou úroveň u Opus nastavuje předzesilovač přehrávače.
+    """
+    from mutagen import File
+
+    audio = File(str(path))
+    if audio is None:
+        raise ConversionError(f"Nepodporovaný formát pro tagy hlasitosti: {path.name}")
+    if audio.tags is None:
+        audio.add_tags()
+
+    values = {
+        'REPLAYGAIN_TRACK_GAIN': f"{track_gain:.2f} dB",
+        'REPLAYGAIN_TRACK_PEAK': f"{track_peak:.6f}"
+    }
+    if album_gain is not None:
+        values['REPLAYGAIN_ALBUM_GAIN'] = f"{album_gain:.2f} dB"
+        values['REPLAYGAIN_ALBUM_PEAK'] = f"{album_peak or track_peak:.6f}"
+
+    kind = type(audio).__name__
+    if kind == 'OggOpus':
+        # Opus: celé číslo Q7.8 (1/256 dB) vůči -23 LUFS; přehrávač přičte svůj předzesilovač
+        if r128_track_gain is not None:
+            audio['R128_TRACK_GAIN'] = str(round(r128_track_gain * 256))
+        if r128_album_gain is not None:
+            audio['R128_ALBUM_GAIN'] = str(round(r128_album_gain * 256))
+    elif kind in ('MP3', 'EasyMP3') or hasattr(audio.tags, 'getall'):
+        from mutagen.id3 import TXXX
+        for key, value in values.items():
+            audio.tags.add(TXXX(encoding=3, desc=key, text=[value]))
+    elif kind == 'MP4':
+        from mutagen.mp4 import MP4FreeForm
+        for key, value in values.items():
+            audio.tags[f'----:com.apple.iTunes:{key.lower()}'] = [MP4FreeForm(value.encode('utf-8'))]
+    else:
+        # Vorbis comments (Ogg Vorbis, FLAC)
+        for key, value in values.items():
+            audio[key.lower()] = [value]
+    audio.save()
+
+class LoudnessStore:
+    """Změřené hlasitosti skladeb (tabulka v databázi knihovny)
+
+    Záznam platí, dokud se nezmění čas úpravy a velikost souboru.
+    """
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path).expanduser()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    @staticmethod
+    def _stat(path: Path) -> Tuple[float, int]:
+        stat = path.stat()
+        return stat.st_mtime, stat.st_size
+
+    def get(self, path: Path) -> Optional[LoudnessMeasurement]:
+        """Vrátí měření, pokud se soubor od té doby nezměnil"""
+        try:
+            mtime, size = self._stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT integrated, true_peak, lra, duration, mtime, size FROM loudness WHERE path = ?",
+                (str(path),)
+            ).fetchone()
+        if not row or row[4] != mtime or row[5] != size:
+            return None
+        return LoudnessMeasurement(*row[:4])
+
+    def put(self, path: Path, measurement: LoudnessMeasurement, album: Optional[str] = None) -> None:
+        """Uloží měření spolu s aktuálním stavem souboru"""
+        mtime, size = self._stat(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO loudness (path, mtime, size, integrated, true_peak, lra, duration, album, measured_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    mtime = excluded.mtime, size = excluded.size,
+                    integrated = excluded.integrated, true_peak = excluded.true_peak,
+                    lra = excluded.lra, duration = excluded.duration,
+                    album = excluded.album,
+                    measured_at = excluded.measured_at
+                """,
+                (str(path), mtime, size, measurement.integrated, measurement.true_peak,
+                 measurement.lra, measurement.duration, album, time.time())
+            )
+
+    def touch(self, path: Path) -> None:
+        """Po přepsání tagů aktualizuje čas úpravy a velikost (měření zůstává)"""
+        mtime, size = self._stat(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE loudness SET mtime = ?, size = ? WHERE path = ?",
+                (mtime, size, str(path))
+            )
+
+    def items(self) -> Iterator[Tuple[Path, LoudnessMeasurement, Optional[str]]]:
+        """Všechna uložená měření (cesta, měření, album)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, integrated, true_peak, lra, duration, album FROM loudness ORDER BY path"
+            ).fetchall()
+        for row in rows:
+            yield Path(row[0]), LoudnessMeasurement(*row[1:5]), row[5]
+
+    def remove(self, path: Path) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM loudness WHERE path = ?", (str(path),))
+
+    def close(self) -> None:
+        """Uzavře spojení s databází"""
+        with self._lock:
+            self._conn.close()
+
+class LoudnessNormalizer:
+    """Normalizace hlasitosti pouze tagy (bez překódování)
+
+    Hlasitost se změří jednou na skladbu a uloží do LoudnessStore. Zisk
+    pro cílovou úroveň se zapíše do tagů ReplayGain/R128 a aplikuje ho
+    přehrávač. Změna cílové úrovně je tedy jen přepis tagů.
+    """
+    def __init__(self, store: LoudnessStore, ffmpeg: str = 'ffmpeg',
+                 target: float = -16.0, true_peak: float = -1.0):
+        self.store = store
+        self.ffmpeg = ffmpeg
+        self.target = target
+        self.true_peak = true_peak
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], store: Optional[LoudnessStore] = None,
+                    ffmpeg: str = 'ffmpeg') -> 'LoudnessNormalizer':
+        """Vytvoří normalizátor ze sekce audio.normalization konfigurace"""
+        normalization = config.get('audio', {}).get('normalization', {})
+        if store is None:
+            store = LoudnessStore(config.get('paths', {}).get('library_db', Path.home() / ".ytbai" / "library.db"))
+        return cls(
+            store,
+            ffmpeg=ffmpeg,
+            target=normalization.get('target_level', -16.0),
+            true_peak=normalization.get('true_peak', -1.0)
+        )
+
+    def measure(self, path: Path, album: Optional[str] = None) -> LoudnessMeasurement:
+        """Změří skladbu, nebo vrátí uložené měření nezměněného souboru"""
+        cached = self.store.get(path)
+        if cached:
+            return cached
+        measurement = measure(path, self.ffmpeg)
+        self.store.put(path, measurement, album)
+        return measurement
+
+    def apply(self, path: Path, measurement: Optional[LoudnessMeasurement] = None,
+              album: Optional[LoudnessMeasurement] = None) -> float:
+        """Zapíše tagy pro cílovou úroveň a vrátí zisk skladby v dB"""
+        measurement = measurement or self.measure(path)
+        gain = gain_for(measurement, self.target, self.true_peak)
+        write_gain_tags(
+            path,
+            gain,
+            measurement.peak_ratio,
+            album_gain=gain_for(album, self.target, self.true_peak) if album else None,
+            album_peak=album.peak_ratio if album else None,
+            r128_track_gain=gain_for(measurement, R128_REFERENCE, self.true_peak),
+            r128_album_gain=gain_for(album, R128_REFERENCE, self.true_peak) if album else None
+        )
+        self.store.touch(path)
+        return gain
+
+    def normalize(self, path: Path) -> LoudnessMeasurement:
+        """Změří skladbu (pokud je třeba) a zapíše tagy"""
+        measurement = self.measure(path)
+        self.apply(path, measurement)
+        return measurement
+
+    def retag(self) -> int:
+        """Přepíše tagy všech změřených skladeb podle aktuální cílové úrovně
+
+        Nic se nedekóduje - použijí se uložená měření. Skladby, které se
+        od měření změnily nebo zmizely, se přeskočí.
+
+        Returns:
+            Počet přepsaných souborů
+        """
+        tracks: List[Tuple[Path, LoudnessMeasurement, Optional[str]]] = []
+        albums: Dict[str, List[LoudnessMeasurement]] = {}
+        for path, measurement, album in self.store.items():
+            if self.store.get(path) is None:
+                continue
+            tracks.append((path, measurement, album))
+            if album:
+                albums.setdefault(album, []).append(measurement)
+
+        album_levels = {name: album_measurement(items) for name, items in albums.items()}
+        count = 0
+        for path, measurement, album in tracks:
+            try:
+                self.apply(path, measurement, album_levels.get(album) if album else None)
+                count += 1
+            except Exception as e:
+                logging.error(f"Chyba při přepisu tagů hlasitosti {path}: {e}")
+        return count
+
+def ffmpeg_binary(config: Dict[str, Any]) -> str:
+    """Cesta k ffmpeg z paths.ffmpeg_dir, jinak 'ffmpeg' z PATH"""
+    ffmpeg_dir = config.get('paths', {}).get('ffmpeg_dir')
+    if ffmpeg_dir:
+        for name in ('ffmpeg.exe', 'ffmpeg'):
+            candidate = Path(ffmpeg_dir).expanduser() / name
+            if candidate.exists():
+                return str(candidate)
+    return 'ffmpeg'
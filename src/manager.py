@@ -1,16 +1,19 @@
-from dataclasses import dataclass
-from typing import List, Dict, Optional, Any
+from dataclasses import dataclass, asdict, replace
+from typing import List, Dict, Optional, Any, Union, Callable, Iterator, Set, Tuple
 from pathlib import Path
+import sys
+# Moduly balíčku src se načítají jako src.<modul> i při spuštění ze složky src
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 import time
 from rich.console import Console
 import yt_dlp
 from openai import OpenAI
 import os
-from utils import sanitize_filename, cleanup_thumbnail_cache
+from utils import sanitize_filename, cleanup_thumbnail_cache, format_duration
 from rich.status import Status
 from rich.text import Text
 from dotenv import load_dotenv
-from rich.prompt import Prompt
+from rich.prompt import Prompt, Confirm
 import cohere
 import replicate
 import requests
@@ -18,8 +21,29 @@ from utils import TokenCostCalculator
 import json
 from huggingface_hub import HfApi, InferenceClient
 from rich.table import Table
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
 import logging
-from exceptions import ConfigError
+import shutil
+from src.exceptions import ConfigError
+from src.search_cache import SearchCache, canonical_query
+from src.resolver import Suggestion, SuggestionResolver, parse_suggestions
+from src.recommendations import RecommendationEngine
+from src.ydl_pool import YDLPool
+from src.video_metadata import VideoMetadataResolver
+from src.library_index import LibraryIndex
+from src.singleflight import SingleFlight
+from src.dedup import collapse, fingerprint
+from src.downloader import ParallelDownloader, DownloadTask
+from src.download_queue import DownloadQueue
+from src.pipeline import DownloadPipeline, Transcoder, Tagger
+from src.scheduler import BandwidthScheduler
+from src.disk_space import DiskSpaceManager
+from src.cover_art import CoverArtCache
+from src.formats import format_selector
+from src.loudness import LoudnessNormalizer, LoudnessStore
+from src.downloaded_index import DownloadedIndex
+from src.genre_catalog import GenreCatalog
+from src.retry import retry, API_RETRY
 
 @dataclass
 class SearchResult:
@@ -72,6 +96,25 @@ class SearchResult:
             thumbnail_url=item.get('snippet', {}).get('thumbnails', {}).get('default', {}).get('url')
         )
 
+    @classmethod
+    def from_ytdlp_entry(cls, entry: dict) -> 'SearchResult':
+        """Vytvoří instanci ze záznamu vyhledávání yt-dlp"""
+        duration = entry.get('duration_string')
+        if not duration:
+            duration = format_duration(int(entry.get('duration') or 0))
+        
+        thumbnail_url = entry.get('thumbnail')
+        if not thumbnail_url and entry.get('thumbnails'):
+            thumbnail_url = entry['thumbnails'][-1].get('url')
+        
+        return cls(
+            video_id=entry['id'],
+            title=entry.get('title', 'Neznámý název'),
+            artist=entry.get('uploader') or entry.get('channel') or 'Neznámý interpret',
+            duration=str(duration),
+            thumbnail_url=thumbnail_url
+        )
+
 @dataclass
 class DownloadContext:
     """Třída pro uchování kontextu posledního stahování"""
@@ -92,6 +135,7 @@ class PerplexityAPI:
             "Content-Type": "application/json"
         }
 
+    @retry(strategy=API_RETRY, circuit_name='perplexity')
     def generate(self, prompt: str, model: str = "mixtral-8x7b-instruct") -> str:
         """Generování odpovědi pomocí Perplexity API"""
         payload = {
@@ -134,6 +178,7 @@ class HuggingFaceAPI:
         }
         self.api_url = "https://api-inference.huggingface.co/models"
 
+    @retry(strategy=API_RETRY, circuit_name='huggingface')
     def generate(self, prompt: str, model: str = "facebook/opt-350m") -> str:
         """Generování odpovědi pomocí Hugging Face API"""
         payload = {
@@ -204,6 +249,18 @@ class YTBAIManager:
         
         self.current_context: Optional[DownloadContext] = None
         
+        # Detaily videí z YouTube API (trvalá cache napříč dotazy)
+        self.video_metadata = VideoMetadataResolver(
+            self.youtube,
+            Path.home() / ".ytbai" / "cache" / "video_metadata.json"
+        )
+        
+        # Slučování souběžných stejných dotazů (AI chat, doporučení, discovery)
+        self._flights = SingleFlight()
+        
+        # Resolvery AI návrhů (drží cache již nalezených skladeb)
+        self._resolvers: Dict[str, SuggestionResolver] = {}
+        
         # Inicializace cache složky
         self.cache_dir = Path.home() / ".ytbai" / "cache" / "thumbnails"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
@@ -211,6 +268,33 @@ class YTBAIManager:
         # Vyčištění starých náhledů při startu
         cleanup_thumbnail_cache(self.cache_dir)
         
+        # Cache výsledků vyhledávání
+        cache_config = self.config.get('cache', {})
+        self.search_cache = SearchCache(
+            Path.home() / ".ytbai" / "cache" / "search",
+            ttl=cache_config.get('search_ttl'),
+            stale_ttl=cache_config.get('search_stale_ttl', 24 * 3600)
+        )
+        
+        # Katalog skladeb podle žánru (sdílený s UI)
+        self.genre_catalog = GenreCatalog.shared(self.project_root / "data" / "genre_list.json")
+        
+        # Fulltextový index stažené hudby
+        self.library_index = LibraryIndex(
+            self.config.get('paths', {}).get('library_db', Path.home() / ".ytbai" / "library.db")
+        )
+        if self.library_index.count() == 0:
+            # První spuštění - zaindexujeme již staženou hudbu
+            self.rebuild_library_index()
+        
+        # Seznam stažených videí (dotaz v paměti, zápis jen připsáním do žurnálu)
+        self.downloaded = DownloadedIndex(
+            self.config.get('paths', {}).get('music_dir', Path.home() / "Music" / "YouTube")
+        )
+        
+        # Žurnál stahování - umožňuje navázat po pádu nebo restartu
+        self.download_queue = DownloadQueue(Path.home() / ".ytbai" / "downloads.db")
+        
         # Načteme API klíče a zkontrolujeme jejich dostupnost
         self.check_api_keys()
         
@@ -231,20 +315,8 @@ class YTBAIManager:
                     'preferredquality': '192',
                 },
                 {
-                    # Druhý postprocessor - normalizace hlasitosti
+                    # Druhý postprocessor - metadata
                     'key': 'FFmpegMetadata',
-                },
-                {
-                    # Vlastní postprocessor pro normalizaci
-                    'key': 'FFmpegPostProcessor',
-                    'preferedformat': 'mp3',
-                    # Dvouprůchodová normalizace pro lepší výsledek
-                    'args': [
-                        '-af',
-                        'loudnorm=I=-16:TP=-1.5:LRA=11:print_format=json',
-                        '-ar', '44100',  # Vzorkovací frekvence
-                        '-metadata', 'comment=Normalized with FFmpeg loudnorm'
-                    ],
                 }
             ],
             'quiet': True,
@@ -269,6 +341,59 @@ class YTBAIManager:
             'force_generic_extractor': False
         }
 
+        # Pool předehřátých instancí YoutubeDL pro vyhledávání a stahování
+        # (profil 'download' pro pipeline se zaregistruje, až bude cache obalů)
+        max_concurrent = self.config.get('download', {}).get('max_concurrent', 3)
+        self.ydl_pool = YDLPool({
+            'search': self.search_opts,
+            'direct': self.ydl_opts
+        }, max_size=max(4, max_concurrent))
+        
+        # Společný plánovač všech stahování (priority, limit na host a šířku pásma)
+        self.scheduler = BandwidthScheduler.shared()
+        self.scheduler.configure_from(self.config)
+        
+        # Rezervace místa na disku podle skutečné velikosti formátů
+        self.disk_space = DiskSpaceManager.shared()
+        self.disk_space.configure_from(self.config)
+        
+        # Souběžné stahování (počet úloh podle download.max_concurrent)
+        self.downloader = ParallelDownloader(
+            max_workers=max_concurrent,
+            pool=self.ydl_pool,
+            queue=self.download_queue,
+            scheduler=self.scheduler,
+            space=self.disk_space
+        )
+        
+        # Převod a metadata běží v oddělených poolech, aby neblokovaly síť
+        ffmpeg = ffmpeg_location if Path(ffmpeg_location).exists() else 'ffmpeg'
+        
+        # Normalizace hlasitosti jen tagy ReplayGain/R128 - měření se ukládá do databáze knihovny
+        self.loudness = None
+        if self.config.get('audio', {}).get('normalization', {}).get('enabled', True):
+            self.loudness = LoudnessNormalizer.from_config(
+                self.config,
+                LoudnessStore(self.library_index.db_path),
+                ffmpeg=ffmpeg
+            )
+        
+        # Obaly alb - originál se stahuje jednou, velikosti podle metadata.cover_size
+        self.covers = CoverArtCache.from_config(self.config)
+        self.covers.prune()
+        self.ydl_pool.register('download', self._download_options())
+        
+        self.pipeline = DownloadPipeline(
+            self.downloader,
+            Transcoder.from_config(self.config, ffmpeg=ffmpeg),
+            Tagger(
+                ffmpeg=ffmpeg,
+                cover_art=self.config.get('metadata', {}).get('cover_art', True),
+                covers=self.covers
+            ),
+            loudness=self.loudness
+        )
+
         # Inicializace Hugging Face klienta
         if os.getenv('HUGGINGFACE_API_KEY'):
             self.hf_api = HfApi(token=os.getenv('HUGGINGFACE_API_KEY'))
@@ -299,93 +424,177 @@ class YTBAIManager:
             self.openai_model = None
 
     def search_music(self, query: str, max_results: int = 10, use_youtube_ai: bool = False) -> List[SearchResult]:
-        """Vyhledá hudbu na YouTube"""
+        """Vyhledá hudbu na YouTube (s využitím cache výsledků)"""
+        source = 'youtube_api' if self.youtube else 'yt_dlp'
         try:
-            if self.youtube:
-                try:
-                    # Pokus o použití YouTube API
-                    search_query = query
-                    if not use_youtube_ai:
-                        search_query += " music audio"
-
-                    request = self.youtube.search().list(
-                        q=search_query,
-                        part="id,snippet",
-                        maxResults=max_results,
-                        type="video",
-                        videoCategoryId="10"  # Kategorie Hudba
-                    )
-                    search_response = request.execute()
-                    
-                    # Získání ID videí pro další dotaz
-                    video_ids = [item['id']['videoId'] for item in search_response.get('items', [])]
-                    
-                    # Získání detailů videí včetně délky
-                    videos_request = self.youtube.videos().list(
-                        id=','.join(video_ids),
-                        part="contentDetails,snippet"
-                    )
-                    videos_response = videos_request.execute()
-                    
-                    # Vytvoření mapy délky videí
-                    duration_map = {
-                        item['id']: item['contentDetails']['duration']
-                        for item in videos_response.get('items', [])
-                    }
-                    
-                    # Přidání délky do výsledků vyhledávání
-                    for item in search_response.get('items', []):
-                        item['duration'] = duration_map.get(item['id']['videoId'], 'PT0M0S')
-
-                    return [
-                        SearchResult.from_youtube_item(item)
-                        for item in search_response.get('items', [])
-                    ]
-
-                except Exception as e:
-                    logging.warning(f"YouTube API selhalo: {e}, používám fallback na yt-dlp")
-                    self.youtube = None  # Vypneme API pro další požadavky
-            
-            # Fallback na yt-dlp
-            if not self.youtube:
-                ydl_opts = {
-                    'format': 'bestaudio/best',
-                    'quiet': True,
-                    'no_warnings': True,
-                    'extract_flat': True,
-                    'default_search': f'ytsearch{max_results}',
-                    'ignoreerrors': True,
-                    'no_playlist': True
-                }
-                
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    results = ydl.extract_info(f"ytsearch{max_results}:{query}", download=False)
-                    
-                    if results and 'entries' in results:
-                        return [
-                            SearchResult(
-                                video_id=entry['id'],
-                                title=entry.get('title', 'Neznámý název'),
-                                artist=entry.get('uploader', 'Neznámý interpret'),
-                                duration=str(entry.get('duration_string', '0:00')),
-                                thumbnail_url=entry.get('thumbnail')
-                            )
-                            for entry in results['entries']
-                            if entry
-                        ]
-
+            key = ('search', source, canonical_query(query), max_results, use_youtube_ai)
+            results = self._flights.do(key, lambda: self.search_cache.get_or_fetch(
+                query,
+                max_results,
+                source,
+                lambda: [asdict(r) for r in self._search_uncached(query, max_results, use_youtube_ai)]
+            ))
+            # Každý volající dostane vlastní instance výsledků
+            return [SearchResult(**r) for r in results]
+        except Exception as e:
+            logging.error(f"Chyba při vyhledávání: {e}")
             return []
 
+    def iter_search(self, query: str, max_results: int = 10, use_youtube_ai: bool = False) -> Iterator[SearchResult]:
+        """Vyhledá hudbu na YouTube a vrací výsledky průběžně, jak přicházejí"""
+        source = 'youtube_api' if self.youtube else 'yt_dlp'
+        
+        cached = self.search_cache.peek(
+            query,
+            max_results,
+            source,
+            refresh=lambda: [asdict(r) for r in self._search_uncached(query, max_results, use_youtube_ai)]
+        )
+        if cached is not None:
+            for item in cached:
+                yield SearchResult(**item)
+            return
+        
+        results = []
+        try:
+            for result in self._iter_uncached(query, max_results, use_youtube_ai):
+                results.append(result)
+                yield result
+        except Exception as e:
+            logging.error(f"Chyba při vyhledávání: {e}")
+            return
+        
+        if results:
+            self.search_cache.put(query, max_results, source, [asdict(r) for r in results])
+
+    def _search_uncached(self, query: str, max_results: int, use_youtube_ai: bool) -> List[SearchResult]:
+        """Vyhledá hudbu na YouTube bez cache"""
+        try:
+            return list(self._iter_uncached(query, max_results, use_youtube_ai))
         except Exception as e:
             logging.error(f"Chyba při vyhledávání: {e}")
             return []
 
+    def _iter_uncached(self, query: str, max_results: int, use_youtube_ai: bool) -> Iterator[SearchResult]:
+        """Vyhledá hudbu na YouTube bez cache a vrací výsledky průběžně"""
+        if self.youtube:
+            try:
+                # Pokus o použití YouTube API
+                search_query = query
+                if not use_youtube_ai:
+                    search_query += " music audio"
+
+                request = self.youtube.search().list(
+                    q=search_query,
+                    part="id,snippet",
+                    maxResults=max_results,
+                    type="video",
+                    videoCategoryId="10"  # Kategorie Hudba
+                )
+                search_response = request.execute()
+                
+                # Získání ID videí pro další dotaz
+                video_ids = [item['id']['videoId'] for item in search_response.get('items', [])]
+                
+                # Získání detailů videí včetně délky (známá videa z cache, ostatní dávkově)
+                details = self.video_metadata.resolve(video_ids)
+                
+                # Vytvoření mapy délky videí
+                duration_map = {
+                    video_id: meta.duration
+                    for video_id, meta in details.items()
+                }
+                
+                # Přidání délky do výsledků vyhledávání
+                items = search_response.get('items', [])
+                for item in items:
+                    item['duration'] = duration_map.get(item['id']['videoId'], 'PT0M0S')
+
+            except Exception as e:
+                logging.warning(f"YouTube API selhalo: {e}, používám fallback na yt-dlp")
+                self.youtube = None  # Vypneme API pro další požadavky
+            else:
+                for item in items:
+                    yield SearchResult.from_youtube_item(item)
+                return
+        
+        # Fallback na yt-dlp - bez zpracování vrací záznamy postupně ze stránek vyhledávání
+        with self.ydl_pool.session('search') as ydl:
+            results = ydl.extract_info(f"ytsearch{max_results}:{query}", download=False, process=False)
+            
+            if results and 'entries' in results:
+                for entry in results['entries']:
+                    if entry and entry.get('id'):
+                        yield SearchResult.from_ytdlp_entry(entry)
+
     def process_download(self, selections: List[SearchResult]) -> None:
         """Zpracování stahování"""
-        downloaded = []
-        base_dir = Path.home() / "Music" / "YouTube"
+        base_dir = self._music_dir()
+        
+        # Z více nahrávek téže skladby stáhneme jen jednu
+        duplicates_mode = self.config.get('download', {}).get('duplicates', 'skip')
+        if duplicates_mode != 'allow':
+            selections = collapse(selections)
+        
+        # Kontrola, zda skladbu (i v jiné nahrávce) už nemáme
+        pending = []
+        for selection in selections:
+            existing = self._find_library_duplicate(selection) if duplicates_mode != 'allow' else None
+            if existing and (duplicates_mode == 'skip' or existing['video_id'] == selection.video_id):
+                self.console.print(
+                    f"[yellow]Přeskakuji {selection.title} - v knihovně už je: {existing['artist']} - {existing['title']}[/yellow]"
+                )
+                continue
+            # Úlohu zapíšeme do žurnálu ještě před začátkem stahování
+            job = self.download_queue.enqueue(
+                selection.video_id,
+                selection.title,
+                base_dir,
+                artist=selection.artist,
+                duration=selection.duration
+            )
+            pending.append((selection, existing, job.id))
+        
+        self._run_downloads(pending, base_dir)
+
+    def resume_downloads(self) -> int:
+        """Dokončí úlohy, které zůstaly rozpracované po pádu nebo ukončení aplikace
         
-        # Získ��ní nastavení cover art
+        Returns:
+            Počet obnovených úloh
+        """
+        jobs = self.download_queue.unfinished()
+        if not jobs:
+            return 0
+        
+        # Úlohy podle cílové složky (položky playlistů mají vlastní)
+        by_dir: Dict[str, List[tuple]] = {}
+        for job in jobs:
+            by_dir.setdefault(job.output_dir, []).append((
+                SearchResult(
+                    video_id=job.video_id,
+                    title=job.title,
+                    artist=job.artist,
+                    duration=job.duration or "0:00"
+                ),
+                None,
+                job.id
+            ))
+        # Obnovené úlohy nesmí zdržet to, co uživatel právě spustí
+        for output_dir, pending in by_dir.items():
+            self._run_downloads(pending, Path(output_dir), priority='batch')
+        return len(jobs)
+
+    def _music_dir(self) -> Path:
+        return Path.home() / "Music" / "YouTube"
+
+    def _download_options(self, base_dir: Optional[Path] = None) -> Dict[str, Any]:
+        """Volby yt-dlp pro stahování skladeb (převod a metadata dělá pipeline)
+        
+        Args:
+            base_dir: Cílová složka (bez ní jen stálé volby profilu 'download')
+        """
+        # Získání nastavení cover art
         cover_settings = self.config.get('download', {}).get('cover_art', {
             'enabled': True,
             'size': 1000,
@@ -393,102 +602,123 @@ class YTBAIManager:
             'quality': 85
         })
         
+        # Pipeline si vybere zdroj, který nebude potřeba převádět
+        output_format = self.config.get('conversion', {}).get('output_format', 'mp3')
         download_opts = {
             **self.ydl_opts,
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'writethumbnail': cover_settings['enabled'],  # Stáhneme náhled jen pokud je povolený
-            'outtmpl': str(base_dir / '%(title)s.%(ext)s'),
+            'format': format_selector(output_format),
+            'postprocessors': [],
+            # Obal dodá cache obalů, yt-dlp náhled stahuje jen bez ní
+            'writethumbnail': cover_settings['enabled'] and not self.covers,
+            # Obnovená úloha naváže na rozpracovaný .part soubor
+            'continuedl': True,
             'quiet': True,
             'no_warnings': True
         }
+        if base_dir is not None:
+            # Cílová složka se v poolu nastaví jen po dobu zápůjčky
+            download_opts['outtmpl'] = str(base_dir / '%(title)s.%(ext)s')
+        return download_opts
+
+    def _run_downloads(self, pending: List[tuple], base_dir: Path,
+                       priority: str = 'interactive') -> List[SearchResult]:
+        """Stáhne úlohy z žurnálu a zpracuje jejich výsledky
         
-        if cover_settings['enabled']:
-            # Přidáme postprocessor pro úpravu náhledu
-            download_opts['postprocessors'].append({
-                'key': 'EmbedThumbnail',
-                'already_have_thumbnail': False
-            })
+        Args:
+            pending: Trojice (skladba, nahrazovaný záznam knihovny, ID úlohy)
+            base_dir: Cílová složka
+            priority: Třída priority v plánovači stahování
+            
+        Returns:
+            Stažené skladby (včetně položek playlistů)
+        """
+        downloaded = []
+        # Nastavení se mohlo změnit - profil se přestaví jen při skutečné změně
+        profile = self._download_options()
+        if self.ydl_pool.profiles.get('download') != profile:
+            self.ydl_pool.register('download', profile)
+        download_opts = self._download_options(base_dir)
 
-        genre_file = self.project_root / "data" / "genre_list.json"
-        genre_file.parent.mkdir(parents=True, exist_ok=True)
+        # Nové skladby do katalogu žánrů (zapíší se najednou na konci)
+        genre_entries = []
         
-        # Načteme existující žánry
-        genres = {}
-        if genre_file.exists():
-            with open(genre_file, 'r', encoding='utf-8') as f:
-                genres = json.load(f)
+        # Položky playlistů se stáhnou po jednotlivých skladbách
+        playlists = []
         
-        for selection in selections:
+        # Obaly se stahují souběžně už během stahování skladeb
+        self.covers.prefetch((selection.thumbnail_url, selection.video_id) for selection, _, _ in pending)
+        
+        # Souběžné stažení všech skladeb, chyba jedné neukončí ostatní
+        tasks = [
+            DownloadTask(
+                video_id=selection.video_id,
+                title=selection.title,
+                output_path=base_dir,
+                options=download_opts,
+                job_id=job_id,
+                priority=priority
+            )
+            for selection, _, job_id in pending
+        ]
+        results = []
+        if tasks:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+                console=self.console
+            ) as progress:
+                results = self.pipeline.run(tasks, progress)
+        
+        for (selection, existing, job_id), result in zip(pending, results):
             try:
-                url = f"https://www.youtube.com/watch?v={selection.video_id}"
+                if not result.ok:
+                    self.console.print(f"[red]Chyba při stahování {selection.title}: {result.error}[/red]")
+                    continue
                 
-                with yt_dlp.YoutubeDL(download_opts) as ydl:
-                    # Nejdřív zjistíme, jestli je to playlist
-                    info = ydl.extract_info(url, download=False)
-                    
-                    if info.get('_type') == 'playlist':
-                        # Je to playlist - vytvoříme složku
-                        playlist_title = sanitize_filename(info.get('title', 'Unknown Playlist'))
-                        playlist_dir = base_dir / playlist_title
-                        playlist_dir.mkdir(exist_ok=True)
-                        
-                        # Upravíme nastavení pro playlist
-                        playlist_opts = {
-                            **download_opts,
-                            'outtmpl': str(playlist_dir / '%(title)s.%(ext)s')
-                        }
-                        
-                        self.console.print(f"[yellow]Detekován playlist: {info.get('title')}[/yellow]")
-                        self.console.print(f"[yellow]Počet skladeb: {info.get('playlist_count', 'neznámý')}[/yellow]")
-                        
-                        if Prompt.ask("Chcete stáhnout celý playlist? [y/n]", choices=['y', 'n']) == 'y':
-                            with Status("[yellow]Stahuji playlist...[/yellow]", spinner="dots") as status:
-                                with yt_dlp.YoutubeDL(playlist_opts) as playlist_dl:
-                                    playlist_dl.download([url])
-                                    
-                                    # Přidáme všechny skladby do downloaded
-                                    for entry in info.get('entries', []):
-                                        if entry:
-                                            result = SearchResult.from_ytdlp_result(entry)
-                                            downloaded.append(result)
-                                            status.update(f"[green]Staženo:[/green] {result.title}")
-                    else:
-                        # Je to jednotlivá skladba
-                        self.console.print(f"[yellow]Stahuji: {selection.title}[/yellow]")
-                        with yt_dlp.YoutubeDL(download_opts) as video_dl:
-                            video_dl.download([url])
-                        downloaded.append(selection)
-                        self.console.print(f"[green]Úspěšně staženo: {selection.title}[/green]")
+                info = result.info
+                if result.is_playlist:
+                    playlists.append(self._expand_playlist(selection, info, base_dir))
+                    # Úloha playlistu je hotová, jakmile jsou jeho položky v žurnálu
+                    self.download_queue.set_state(job_id, 'done')
+                    continue
+                
+                # Je to jednotlivá skladba
+                downloaded.append(selection)
+                self.downloaded.add(selection.video_id)
+                self.library_index.add_result(
+                    selection,
+                    path=result.path,
+                    genre=info.get('genre')
+                )
+                if existing:
+                    # Nová nahrávka nahrazuje tu původní
+                    self._replace_library_track(existing, selection, info, keep=result.path)
+                self.console.print(f"[green]Úspěšně staženo: {selection.title}[/green]")
                 
                 # Získáme žánr z metadat
                 genre = info.get('genre', 'Unknown')
                 if genre != 'Unknown':
-                    # Přidáme skladbu do seznamu žánrů
-                    if genre not in genres:
-                        genres[genre] = []
-                    
-                    song_info = {
+                    genre_entries.append((genre, {
                         'title': info.get('title', ''),
                         'artist': info.get('artist', ''),
                         'video_id': selection.video_id,
                         'downloaded': True
-                    }
-                    
-                    # Přidáme pouze pokud tam ještě není
-                    if not any(s['video_id'] == song_info['video_id'] for s in genres[genre]):
-                        genres[genre].append(song_info)
+                    }))
             
             except Exception as e:
+                if result.is_playlist:
+                    self.download_queue.set_state(job_id, 'failed', error=str(e))
                 self.console.print(f"[red]Chyba při stahování {selection.title}: {e}[/red]")
         
-        # Uložíme aktualizovaný seznam žánrů
-        with open(genre_file, 'w', encoding='utf-8') as f:
-            json.dump(genres, f, indent=2, ensure_ascii=False)
+        # Katalog sám vyřadí duplicity a jen připíše nové skladby do žurnálu
+        self.genre_catalog.add_many(genre_entries)
+        
+        # Playlisty jako dávka - skladby, které uživatel spustí mezitím, mají přednost
+        for playlist_dir, entries in playlists:
+            if entries:
+                downloaded.extend(self._run_downloads(entries, playlist_dir, priority='batch'))
         
         # Aktualizace kontextu pro doporučení
         if downloaded:
@@ -496,69 +726,157 @@ class YTBAIManager:
                 downloaded_tracks=downloaded,
                 timestamp=time.time()
             )
+        return downloaded
+
+    def _expand_playlist(self, selection: SearchResult, info: Dict[str, Any],
+                         base_dir: Path) -> Tuple[Path, List[tuple]]:
+        """Rozloží playlist na samostatné úlohy v žurnálu (po potvrzení uživatelem)
+        
+        Každá položka je vlastní úloha, takže se playlist stahuje souběžně
+        a po přerušení se obnoví od položek, které ještě nejsou hotové.
+        
+        Returns:
+            Složka playlistu a trojice (skladba, None, ID úlohy) ke stažení
+        """
+        # Je to playlist - vytvoříme složku
+        playlist_title = sanitize_filename(info.get('title', 'Unknown Playlist'))
+        playlist_dir = base_dir / playlist_title
+        
+        entries = [entry for entry in info.get('entries') or [] if entry and entry.get('id')]
+        self.console.print(f"[yellow]Detekován playlist: {info.get('title')}[/yellow]")
+        self.console.print(f"[yellow]Počet skladeb: {len(entries) or info.get('playlist_count', 'neznámý')}[/yellow]")
+        
+        if Prompt.ask("Chcete stáhnout celý playlist? [y/n]", choices=['y', 'n']) != 'y':
+            return playlist_dir, []
+        playlist_dir.mkdir(exist_ok=True)
+        
+        # Položky, které už máme, se vůbec nezařadí
+        present = self.downloaded.contains_many(entry['id'] for entry in entries)
+        if present:
+            self.console.print(f"[yellow]Přeskakuji {len(present)} již stažených skladeb[/yellow]")
+        
+        pending = []
+        for entry in entries:
+            if entry['id'] in present:
+                continue
+            result = SearchResult.from_ytdlp_entry(entry)
+            job = self.download_queue.enqueue(
+                result.video_id,
+                result.title,
+                playlist_dir,
+                artist=result.artist,
+                duration=result.duration
+            )
+            pending.append((result, None, job.id))
+        return playlist_dir, pending
+
+    def _find_library_duplicate(self, selection: SearchResult) -> Optional[Dict[str, Any]]:
+        """Najde skladbu v knihovně, záznamy bez souboru na disku ignoruje"""
+        existing = self.library_index.find_duplicate(selection)
+        if existing and existing['path'] and not Path(existing['path']).exists():
+            self.library_index.remove(existing['video_id'])
+            return None
+        return existing
+
+    def _replace_library_track(self, track: Dict[str, Any], selection: SearchResult,
+                               info: Dict[str, Any], keep: Optional[Path] = None) -> None:
+        """Nahradí v knihovně původní nahrávku novou
+        
+        Původní soubor se smaže jen při jisté shodě (obě délky známé
+        a v toleranci) nebo po potvrzení uživatelem. Jinak se jen
+        odstraní záznam v indexu a soubor zůstane na disku.
+        """
+        new = fingerprint({**asdict(selection), 'duration': info.get('duration') or selection.duration})
+        delete = fingerprint(track).same_length(new) or (
+            track['path'] and Path(track['path']).exists() and Confirm.ask(
+                f"Smazat původní soubor {Path(track['path']).name}? (délku nelze ověřit)",
+                default=False
+            )
+        )
+        self._remove_library_track(track, keep=keep, delete_file=bool(delete))
+
+    def _remove_library_track(self, track: Dict[str, Any], keep: Optional[Path] = None,
+                              delete_file: bool = True) -> None:
+        """Odstraní skladbu z knihovny, případně i z disku (soubor `keep` ponechá)"""
+        try:
+            if delete_file and track['path'] and Path(track['path']) != keep:
+                Path(track['path']).unlink(missing_ok=True)
+            self.library_index.remove(track['video_id'])
+            if delete_file:
+                self.console.print(f"[dim]Nahrazeno: {track['artist']} - {track['title']}[/dim]")
+            else:
+                self.console.print(f"[dim]Původní soubor ponechán: {track['path']}[/dim]")
+        except Exception as e:
+            logging.error(f"Chyba při odstraňování nahrazené skladby: {e}")
+
+    def downloaded_ids(self, results: List[SearchResult]) -> Set[str]:
+        """ID již stažených skladeb z daného seznamu (jedním dotazem)"""
+        return self.downloaded.contains_many(result.video_id for result in results)
+
+    def export_covers(self, copied: List[Tuple[Path, Path]]) -> int:
+        """Uloží obal alba (cover.jpg) do složek zkopírovaných skladeb
+        
+        Přehrávače v telefonu zobrazují obal složky. Obal se bere jen
+        z cache obalů, nic se nestahuje.
+        
+        Args:
+            copied: Dvojice (zdrojový soubor, cílový soubor)
+            
+        Returns:
+            Počet zapsaných obalů
+        """
+        video_ids = self.library_index.video_ids_for_paths(source for source, _ in copied)
+        done = set()
+        for source, dest in copied:
+            folder = dest.parent
+            video_id = video_ids.get(str(source))
+            if not video_id or folder in done or (folder / 'cover.jpg').exists():
+                continue
+            cover = self.covers.cover(video_id=video_id)
+            if cover:
+                try:
+                    shutil.copyfile(cover, folder / 'cover.jpg')
+                    done.add(folder)
+                except OSError as e:
+                    logging.error(f"Chyba při ukládání obalu do {folder}: {e}")
+        return len(done)
+
+    def search_library(self, query: str, limit: int = 50) -> List[SearchResult]:
+        """Vyhledá skladby ve stažené knihovně (bez dotazu na YouTube)"""
+        return [
+            SearchResult(
+                video_id=track['video_id'],
+                title=track['title'],
+                artist=track['artist'],
+                duration=track['duration'] or "0:00"
+            )
+            for track in self.library_index.search(query, limit)
+        ]
+
+    def rebuild_library_index(self) -> int:
+        """Znovu naplní index knihovny ze souborů na disku"""
+        music_dir = self.config.get('paths', {}).get('music_dir', Path.home() / "Music" / "YouTube")
+        return self.library_index.rebuild_from_library(
+            music_dir,
+            genre_catalog=self.genre_catalog
+        )
 
     def get_recommendations(self, similar_to: List[SearchResult]) -> List[SearchResult]:
         """Získání doporučení na základě předchozích stažení"""
-        recommendations = []
-        seen_ids = set()  # Pro sledování již přidaných videí
-        
         try:
-            for track in similar_to[:3]:  # Bereme max 3 skladby jako základ
-                # Různé způsoby hledání podobných skladeb
-                search_queries = [
-                    f"{track.artist} similar songs",  # Podobné skladby od stejného interpreta
-                    f"songs like {track.title}",      # Podobné skladby podle názvu
-                    f"mix {track.artist} {track.title}", # YouTube mix style
-                    f"{track.artist} best songs",     # Nejlepší skladby od interpreta
-                    f"if you like {track.title}"      # Doporučení stylem "pokud se vám líbí..."
-                ]
-                
-                for query in search_queries:
-                    if len(recommendations) >= 10:  # Max 10 doporučení celkem
-                        break
-                        
-                    with yt_dlp.YoutubeDL(self.search_opts) as ydl:
-                        self.console.print(f"[dim]Hledám podobné: {query}[/dim]")
-                        results = ydl.extract_info(f"ytsearch3:{query}", download=False)
-                        
-                        if results and 'entries' in results:
-                            for entry in results['entries']:
-                                if not entry or entry.get('id') in seen_ids:
-                                    continue
-                                    
-                                # Kontrola, zda nejde o původní skladbu
-                                if entry.get('id') == track.video_id:
-                                    continue
-                                    
-                                # Přidáme pouze pokud to je video (ne playlist) a není živé
-                                if (entry.get('_type') == 'url' or entry.get('webpage_url_basename') == 'watch') \
-                                   and not entry.get('is_live', False):
-                                    try:
-                                        video_info = ydl.extract_info(
-                                            entry.get('url') or entry.get('id'),
-                                            download=False
-                                        )
-                                        if video_info:
-                                            result = SearchResult(
-                                                title=video_info.get('title', 'Neznámý název'),
-                                                artist=video_info.get('uploader', 'Neznámý autor'),
-                                                duration=str(video_info.get('duration_string', '0:00')),
-                                                video_id=video_info.get('id', ''),
-                                                thumbnail_url=video_info.get('thumbnail', None)
-                                            )
-                                            recommendations.append(result)
-                                            seen_ids.add(result.video_id)
-                                            
-                                            # Debug info
-                                            self.console.print(
-                                                f"[dim]Nalezeno podobné: {result.title} od {result.artist}[/dim]"
-                                            )
-                                    except Exception as e:
-                                        self.console.print(f"[dim red]Chyba při zpracování doporučení: {e}[/dim red]")
-                                        continue
-                                
-                                if len(recommendations) >= 10:
-                                    break
+            search_config = self.config.get('search', {})
+            engine = RecommendationEngine(
+                self._search_similar,
+                fanout=search_config.get('recommendation_fanout', 4),
+                limit=10  # Max 10 doporučení celkem
+            )
+            
+            # Bereme max 3 skladby jako základ
+            entries = engine.recommend(similar_to[:3])
+            recommendations = [SearchResult.from_ytdlp_entry(entry) for entry in entries]
+            
+            for result in recommendations:
+                self.console.print(f"[dim]Nalezeno podobné: {result.title} od {result.artist}[/dim]")
                 
             if not recommendations:
                 self.console.print("[yellow]Nenalezena žádná podobná hudba[/yellow]")
@@ -569,6 +887,15 @@ class YTBAIManager:
             self.console.print(f"[red]Chyba při získávání doporučení: {e}[/red]")
             return [] 
 
+    def _search_similar(self, query: str) -> List[Dict[str, Any]]:
+        """Vyhledá 3 záznamy pro dotaz doporučení (bez detailní extrakce)"""
+        self.console.print(f"[dim]Hledám podobné: {query}[/dim]")
+        with self.ydl_pool.session('search') as ydl:
+            results = ydl.extract_info(f"ytsearch3:{query}", download=False)
+        if results and 'entries' in results:
+            return [entry for entry in results['entries'] if entry]
+        return []
+
     def get_ai_recommendations(self, mood_query: str = None) -> List[SearchResult]:
         """Získání AI doporučení s fallbackem a informacemi o průběhu"""
         try:
@@ -626,7 +953,7 @@ class YTBAIManager:
             ...
             """
             
-            response = self.openai_client.chat.completions.create(
+            response = self.openai_chat(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Jsi hudební expert se znalostí všech žánrů a období."},
@@ -663,7 +990,7 @@ class YTBAIManager:
             ...
             """
             
-            response = self.openai_client.chat.completions.create(
+            response = self.openai_chat(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Jsi hudební expert, který doporučuje skladby podle nálady a aktivity."},
@@ -703,7 +1030,7 @@ class YTBAIManager:
             ...
             """
             
-            response = self.openai_client.chat.completions.create(
+            response = self.openai_chat(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Jsi hudební historik a expert se znalostí všech žánrů a období."},
@@ -740,73 +1067,106 @@ class YTBAIManager:
             self.console.print(f"[red]Chyba při průzkumu hudby: {e}[/red]")
             return []
 
-    def _process_ai_suggestions(self, suggestions: List[str]) -> List[SearchResult]:
-        """Zpracování návrhů od AI a vyhledání na YouTube"""
-        results = []
-        
-        with Status("[yellow]Vyhledávám doporučené skladby na YouTube...[/yellow]", spinner="dots") as status:
-            for suggestion in suggestions:
-                if not suggestion.strip():
-                    continue
-                
-                # Očistíme formátování od AI
-                suggestion = suggestion.strip()
-                if '. ' in suggestion:  # Odstraníme číslování (např. "1. ")
-                    suggestion = suggestion.split('. ', 1)[1]
-                
-                # Kontrola formátu "Artist - Title"
-                if ' - ' not in suggestion:
-                    continue
-                    
-                artist, title = suggestion.split(' - ', 1)
-                artist = artist.strip()
-                title = title.strip()
-                
-                status.update(f"[yellow]Hledám: {artist} - {title}[/yellow]")
-                
-                # Vyhledání na YouTube
-                search_query = f"{artist} {title} official"
-                with yt_dlp.YoutubeDL(self.search_opts) as ydl:
-                    try:
-                        video_results = ydl.extract_info(
-                            f"ytsearch1:{search_query}", 
-                            download=False
-                        )
-                        
-                        if video_results and 'entries' in video_results:
-                            entries = [e for e in video_results['entries'] if e]
-                            if entries:
-                                entry = entries[0]
-                                # Kontrola délky (ignorujeme příliš dlouhé/krátké)
-                                duration = entry.get('duration', 0)
-                                if 60 <= duration <= 600:  # mezi 1-10 minutami
-                                    result = SearchResult(
-                                        title=title,  # Použijeme původní název od AI
-                                        artist=artist,  # Použijeme původního interpreta od AI
-                                        duration=str(entry.get('duration_string', '0:00')),
-                                        video_id=entry.get('id', ''),
-                                        thumbnail_url=entry.get('thumbnail', None)
-                                    )
-                                    results.append(result)
-                                    status.update(f"[green]Nalezeno: {artist} - {title}[/green]")
-                                else:
-                                    status.update(f"[yellow]Přeskakuji: {artist} - {title} (nevhodná délka)[/yellow]")
-                    except Exception as e:
-                        status.update(f"[red]Nelze najít: {artist} - {title} ({str(e)})[/red]")
-                        continue
+    @retry(strategy=API_RETRY, circuit_name='openai')
+    def openai_chat(self, **kwargs):
+        """Chat completion přes OpenAI (opakuje se při 429/5xx, sdílí jistič)"""
+        return self.openai_client.chat.completions.create(**kwargs)
+
+    @retry(strategy=API_RETRY, circuit_name='ollama')
+    def ollama_generate(self, prompt: str, model: str = 'llama2') -> str:
+        """Odpověď lokální Ollamy (opakuje se při výpadku spojení, sdílí jistič)"""
+        response = requests.post(
+            'http://localhost:11434/api/generate',
+            json={
+                'model': model,
+                'prompt': prompt,
+                'stream': False,
+                'temperature': 0.7,
+                'top_p': 0.9
+            },
+            timeout=30
+        )
+        response.raise_for_status()
+        return response.json().get('response', '')
+
+    def _process_ai_suggestions(self, suggestions: Union[str, List[str]]) -> List[SearchResult]:
+        """Zpracování návrhů od AI a souběžné vyhledání na YouTube"""
+        parsed = parse_suggestions(suggestions)
+        results = self._resolve_suggestions(parsed, self._lookup_suggestion)
         
         if not results:
             self.console.print("[yellow]Varování: Žádné z AI doporučení nebylo nalezeno na YouTube[/yellow]")
         
         return results
 
+    def _resolve_suggestions(self, suggestions: List[Suggestion],
+                             lookup: Callable[[Suggestion], Optional[SearchResult]]) -> List[SearchResult]:
+        """Souběžně vyhledá návrhy a průběžně vypisuje ✓/✗"""
+        if not suggestions:
+            return []
+        
+        resolver = self._resolvers.get(lookup.__name__)
+        if resolver is None:
+            max_workers = self.config.get('search', {}).get('max_workers', 5)
+            resolver = SuggestionResolver(lookup, max_workers=max_workers)
+            self._resolvers[lookup.__name__] = resolver
+        
+        # Bez vlastního Status - volající (get_ai_recommendations) už spinner zobrazuje
+        self.console.print(f"[yellow]Vyhledávám {len(suggestions)} doporučených skladeb na YouTube...[/yellow]")
+        
+        def report(suggestion: Suggestion, result: Optional[SearchResult], error: Optional[Exception]) -> None:
+            if result is not None:
+                self.console.print(f"[green]✓[/green] {suggestion}")
+            elif error is not None:
+                self.console.print(f"[red]✗[/red] Nelze najít: {suggestion} ({error})")
+            else:
+                self.console.print(f"[red]✗[/red] Nenalezeno: {suggestion}")
+        
+        return resolver.resolve(suggestions, on_result=report)
+
+    def _lookup_suggestion(self, suggestion: Suggestion) -> Optional[SearchResult]:
+        """Vyhledá jeden návrh od AI na YouTube"""
+        search_query = f"{suggestion.artist} {suggestion.title} official"
+        with self.ydl_pool.session('search') as ydl:
+            video_results = ydl.extract_info(
+                f"ytsearch1:{search_query}", 
+                download=False
+            )
+        
+        if video_results and 'entries' in video_results:
+            entries = [e for e in video_results['entries'] if e]
+            if entries:
+                entry = entries[0]
+                # Kontrola délky (ignorujeme příliš dlouhé/krátké)
+                duration = entry.get('duration') or 0
+                if 60 <= duration <= 600:  # mezi 1-10 minutami
+                    return SearchResult(
+                        title=suggestion.title,  # Použijeme původní název od AI
+                        artist=suggestion.artist,  # Použijeme původního interpreta od AI
+                        duration=str(entry.get('duration_string', '0:00')),
+                        video_id=entry.get('id', ''),
+                        thumbnail_url=entry.get('thumbnail', None)
+                    )
+        return None
+
+    def _lookup_search_music(self, suggestion: Suggestion) -> Optional[SearchResult]:
+        """Vyhledá návrh přes search_music a vrátí první výsledek"""
+        search_results = self.search_music(f"{suggestion.title} {suggestion.artist}")
+        if not search_results:
+            return None
+        result = search_results[0]
+        # Přidáme dodatečné informace
+        for key, value in suggestion.extra.items():
+            setattr(result, key, value)
+        return result
+
     def _get_openai_recommendations(self, query: str) -> List[SearchResult]:
         """Získá doporučení od OpenAI"""
         if not self.openai_client or not self.openai_model:
             raise ConfigError("OpenAI není nakonfigurováno")
         
         try:
-            response = self.openai_client.chat.completions.create(
+            response = self.openai_chat(
                 model=self.openai_model,
                 messages=[
                     {"role": "system", "content": """Jsi hudební expert. 
@@ -975,7 +1335,7 @@ class YTBAIManager:
             
             # Získání odpovědi podle poskytovatele
             if provider == "openai":
-                response = self.openai_client.chat.completions.create(
+                response = self.openai_chat(
                     model="gpt-3.5-turbo",
                     messages=[
                         {"role": "system", "content": "You are a music expert. Always respond in the requested JSON format."},
@@ -1037,8 +1397,7 @@ class YTBAIManager:
                 ]
                 
                 # Vyhledáme skladby na YouTube
-                with Status("[yellow]Hledám doporučené skladby na YouTube...[/yellow]", spinner="dots"):
-                    return self._process_ai_suggestions(suggestions)
+                return self._process_ai_suggestions(suggestions)
                     
             except json.JSONDecodeError:
                 raise Exception(f"Neplatný JSON formát odpovědi od {provider}")
@@ -1178,17 +1537,18 @@ class YTBAIManager:
 
     def search_single_track(self, query: str) -> Optional[SearchResult]:
         """Vyhledá jednu konkrétní skladbu na YouTube"""
+        result = self._flights.do(
+            ('single', canonical_query(query)),
+            lambda: self._search_single_track(query)
+        )
+        # Volající si výsledek upravují, proto vracíme kopii
+        return replace(result) if result else None
+
+    def _search_single_track(self, query: str) -> Optional[SearchResult]:
+        """Vyhledá jednu konkrétní skladbu na YouTube (bez slučování dotazů)"""
         try:
-            # Použijeme yt-dlp pro přesné vyhledání
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': True,
-                'default_search': 'ytsearch1',  # Hledáme pouze jeden výsledek
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # Použijeme yt-dlp pro přesné vyhledání (hledáme pouze jeden výsledek)
+            with self.ydl_pool.session('search') as ydl:
                 result = ydl.extract_info(f"ytsearch1:{query}", download=False)
                 
                 if result and 'entries' in result and result['entries']:
@@ -1274,20 +1634,7 @@ Příklad:
 
 Odpověz POUZE v tomto formátu, bez dalšího textu."""
 
-            response = requests.post(
-                'http://localhost:11434/api/generate',
-                json={
-                    'model': 'llama2',
-                    'prompt': prompt,
-                    'stream': False,
-                    'temperature': 0.7,
-                    'top_p': 0.9
-                },
-                timeout=30
-            )
-            response.raise_for_status()
-            
-            recommendations = response.json().get('response', '')
+            recommendations = self.ollama_generate(prompt)
             if not recommendations:
                 raise ConfigError("Ollama nevrátila žádná doporučení")
             
@@ -1329,25 +1676,16 @@ Odpověz POUZE v tomto formátu, bez dalšího textu."""
             if current_song:
                 songs.append(current_song)
             
-            # Vyhledání skladeb na YouTube
-            results = []
-            with Status("[yellow]Vyhledávám doporučené skladby na YouTube...[/yellow]", spinner="dots"):
-                for song in songs:
-                    try:
-                        # Vyhledání na YouTube
-                        search_results = self.search_music(f"{song['title']} {song['artist']}")
-                        if search_results:
-                            result = search_results[0]
-                            # Přidáme dodatečné informace
-                            setattr(result, 'genre', song.get('genre', ''))
-                            setattr(result, 'reason', song.get('reason', ''))
-                            results.append(result)
-                            self.console.print(f"[green]✓[/green] {song['title']} - {song['artist']}")
-                        else:
-                            self.console.print(f"[red]✗[/red] Nenalezeno: {song['title']} - {song['artist']}")
-                    except Exception as e:
-                        self.console.print(f"[red]Chyba při vyhledávání: {e}[/red]")
-                        continue
+            # Souběžné vyhledání skladeb na YouTube
+            suggestions = [
+                Suggestion(
+                    artist=song['artist'],
+                    title=song['title'],
+                    extra={'genre': song.get('genre', ''), 'reason': song.get('reason', '')}
+                )
+                for song in songs
+            ]
+            results = self._resolve_suggestions(suggestions, self._lookup_search_music)
             
             if not results:
                 self.console.print("[yellow]Varování: Žádné z Ollama doporučení nebylo nalezeno na YouTube[/yellow]")
@@ -3,6 +3,7 @@ from pathlib import Path
 import logging
 from spotdl import Spotdl
 from ..manager.ytbai_manager import SearchResult
+from ..scheduler import BandwidthScheduler
 from dotenv import load_dotenv
 import os
 
@@ -108,11 +109,13 @@ class SpotifyManager:
             download_opts = self.download_settings.copy()
             download_opts['output'] = str(output_dir)
             
-            # Stažení pomocí spotdl s parametry
-            downloaded = self.spotdl.download(
-                result.video_id,
-                **download_opts
-            )
+            # Stažení pomocí spotdl s parametry - spotdl stahuje zvuk z YouTube,
+            # přenesená data nevidíme, plánovač tedy hlídá jen slot
+            with BandwidthScheduler.shared().slot('music.youtube.com', 'interactive'):
+                downloaded = self.spotdl.download(
+                    result.video_id,
+                    **download_opts
+                )
             if downloaded:
                 return Path(downloaded[0])
             return None
@@ -1,18 +1,25 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from pathlib import Path
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn, TransferSpeedColumn
 import yt_dlp
 from ..utils.error_handler import ErrorHandler
+from ..search_cache import SearchCache
+from ..ydl_pool import YDLPool
+from ..library_index import LibraryIndex
+from ..singleflight import SingleFlight
+from ..search_cache import canonical_query
+from ..ranking import RankingEngine, RankingWeights
+from ..formats import best_audio_format
+from ..loudness import LoudnessNormalizer, LoudnessStore, ffmpeg_binary
+from ..downloaded_index import DownloadedIndex
+from ..cover_art import CoverArtCache
+from ..disk_space import DiskSpaceManager
+from ..exceptions import DiskSpaceError
 import re
 import unicodedata
-import subprocess
-import requests
 import json
 from mutagen.id3 import ID3, TIT2, TPE1, APIC
-import shutil
-from PIL import Image
-from io import BytesIO
 import logging
 
 # Nastavení loggeru
@@ -46,7 +53,36 @@ class SearchResult:
     def thumbnail_path(self, path: Path):
         self._thumbnail_path = path
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Převede výsledek na slovník (pro cache)"""
+        return {
+            'video_id': self.video_id,
+            'title': self.title,
+            'artist': self.artist,
+            'duration': self.duration,
+            'genre': self.genre,
+            'tags': self.tags,
+            'thumbnail_url': self.thumbnail_url,
+            'size': self.size,
+            'audio_quality': self.audio_quality,
+            'audio_format': self.audio_format
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SearchResult':
+        """Vytvoří výsledek ze slovníku"""
+        return cls(**data)
+
 class SearchPreferences:
+    # Preference vyřazení -> příznak v RankingEngine
+    EXCLUDE_FLAGS = {
+        'covers': 'cover',
+        'live': 'live',
+        'remixes': 'remix',
+        'revivals': 'revival',
+        'karaoke': 'karaoke'
+    }
+
     def __init__(self):
         self.exclude = {
             'covers': True,
@@ -67,13 +103,41 @@ class SearchPreferences:
             'min_quality': '192k',
             'language': 'any'
         }
+        self.weights = RankingWeights()
+
+    @property
+    def engine(self) -> RankingEngine:
+        """Řadicí engine s vahami upravenými podle preferencí"""
+        weights = RankingWeights(**vars(self.weights))
+        if not self.prefer['official']:
+            weights.official = 0.0
+        if self.prefer['original']:
+            weights.cover *= 2
+            weights.remix *= 2
+        if self.prefer['studio']:
+            weights.live *= 2
+        return RankingEngine(weights)
+
+    def _excluded_flags(self) -> List[str]:
+        return [flag for key, flag in self.EXCLUDE_FLAGS.items() if self.exclude.get(key)]
 
-    def apply_to_results(self, results: List[SearchResult]) -> List[SearchResult]:
-        filtered = []
-        for result in results:
-            if self._should_include(result):
-                filtered.append(result)
-        return sorted(filtered, key=lambda x: self._calculate_preference_score(x), reverse=True)
+    def _should_include(self, result: SearchResult) -> bool:
+        """Zjistí, zda výsledek projde filtry"""
+        return bool(self.apply_to_results([result]))
+
+    def _calculate_preference_score(self, result: SearchResult, query: str = '') -> float:
+        """Vypočítá skóre výsledku podle preferencí"""
+        return float(self.engine.score([result], query)[0])
+
+    def apply_to_results(self, results: List[SearchResult], query: str = '') -> List[SearchResult]:
+        """Vyfiltruje a seřadí výsledky podle preferencí (jeden vektorový průchod)"""
+        return self.engine.rank(
+            results,
+            query,
+            exclude=self._excluded_flags(),
+            min_duration=self.filters['min_duration'],
+            max_duration=self.filters['max_duration']
+        )
 
 class YTBAIManager:
     def __init__(self):
@@ -83,6 +147,15 @@ class YTBAIManager:
         self._youtube = None
         self._ai_models = None
         self._progress = None
+        self._search_cache = None
+        self._ydl_pool = None
+        self._library_index = None
+        self._loudness = None
+        self._downloaded = None
+        self._disk_space = None
+        self._covers = None
+        self._flights = SingleFlight()
+        self._ranking = None
         
     @property
     def config(self):
@@ -132,6 +205,94 @@ class YTBAIManager:
             self._ai_models = AIModelManager(self.config)
         return self._ai_models
 
+    @property
+    def search_cache(self):
+        """Lazy loading pro cache výsledků vyhledávání"""
+        if self._search_cache is None:
+            cache_config = self.config.get('cache', {})
+            self._search_cache = SearchCache(
+                Path(self.config['paths']['cache_dir']).expanduser() / 'search',
+                ttl=cache_config.get('search_ttl'),
+                stale_ttl=cache_config.get('search_stale_ttl', 24 * 3600)
+            )
+        return self._search_cache
+
+    @property
+    def ydl_pool(self):
+        """Lazy loading pro pool instancí YoutubeDL"""
+        if self._ydl_pool is None:
+            self._ydl_pool = YDLPool({
+                'search': {
+                    'quiet': True,
+                    'no_warnings': True,
+                    'ignoreerrors': True,
+                    'logger': self.error_handler
+                },
+                'download': {
+                    'format': 'bestaudio/best',
+                    'postprocessors': [{
+                        'key': 'FFmpegExtractAudio',
+                        'preferredcodec': 'mp3',
+                        'preferredquality': '192',
+                    }],
+                    'quiet': True,
+                    'no_warnings': True,
+                    'logger': self.error_handler,
+                    'ffmpeg_location': str(Path(self.config['paths']['ffmpeg_dir']))
+                }
+            })
+        return self._ydl_pool
+
+    @property
+    def ranking(self):
+        """Lazy loading pro řadicí engine výsledků"""
+        if self._ranking is None:
+            self._ranking = RankingEngine(RankingWeights.from_config(self.config.get('ranking')))
+        return self._ranking
+
+    @property
+    def library_index(self):
+        """Lazy loading pro fulltextový index stažené hudby"""
+        if self._library_index is None:
+            self._library_index = LibraryIndex(
+                self.config['paths'].get('library_db', '~/.ytbai/library.db')
+            )
+        return self._library_index
+
+    @property
+    def downloaded(self):
+        """Lazy loading pro seznam stažených videí"""
+        if self._downloaded is None:
+            self._downloaded = DownloadedIndex(self.config['paths']['music_dir'])
+        return self._downloaded
+
+    @property
+    def covers(self):
+        """Lazy loading pro sdílenou cache obalů"""
+        if self._covers is None:
+            self._covers = CoverArtCache.from_config(self.config)
+            self._covers.prune()
+        return self._covers
+
+    @property
+    def disk_space(self):
+        """Lazy loading pro rezervace místa na disku (sdílené se všemi stahováními)"""
+        if self._disk_space is None:
+            self._disk_space = DiskSpaceManager.shared()
+            self._disk_space.configure_from(self.config)
+        return self._disk_space
+
+    @property
+    def loudness(self):
+        """Lazy loading pro normalizaci hlasitosti tagy"""
+        if self._loudness is None:
+            self._loudness = LoudnessNormalizer.from_config(
+                self.config,
+                LoudnessStore(self.library_index.db_path),
+                ffmpeg=ffmpeg_binary(self.config)
+            )
+        return self._loudness
+
     def _setup_progress(self):
         """Inicializace progress baru"""
         if self.progress and self.progress.live:
@@ -149,32 +310,6 @@ class YTBAIManager:
             expand=True  # Přidáno pro lepší zobrazení
         )
 
-    def _check_free_space(self, required_bytes: int) -> bool:
-        """Kontrola volného místa na disku"""
-        music_dir = Path(self.config['paths']['music_dir'])
-        free_space = shutil.disk_usage(music_dir).free
-        return free_space > required_bytes * 1.5  # 50% rezerva
-
-    def _download_and_resize_cover(self, url: str, size: tuple = (300, 300)) -> Optional[bytes]:
-        """Stáhne a upraví velikost cover art"""
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            # Otevření a resize obrázku
-            img = Image.open(BytesIO(response.content))
-            img = img.convert('RGB')  # Konverze na RGB
-            img.thumbnail(size)  # Zachová poměr stran
-            
-            # Konverze zpět na bytes
-            output = BytesIO()
-            img.save(output, format='JPEG', quality=90)
-            return output.getvalue()
-            
-        except Exception as e:
-            self.error_handler.warning(f"Chyba při stahování cover art: {e}")
-            return None
-
     def _add_cover_to_mp3(self, file_path: Path, cover_data: bytes) -> bool:
         """Přidá cover art do MP3 souboru"""
         try:
@@ -207,10 +342,9 @@ class YTBAIManager:
             audio['TIT2'] = TIT2(text=[result.title])
             audio['TPE1'] = TPE1(text=[result.artist])
             
-            # Přidání cover art
+            # Přidání cover art (ze sdílené cache, velikost podle metadata.cover_size)
             if result.thumbnail_url:
-                cover_size = self.config.get('cover_art', {}).get('size', (300, 300))
-                cover_data = self._download_and_resize_cover(result.thumbnail_url, cover_size)
+                cover_data = self.covers.cover_bytes(result.thumbnail_url, result.video_id)
                 if cover_data:
                     self._add_cover_to_mp3(file_path, cover_data)
             
@@ -242,31 +376,16 @@ class YTBAIManager:
         return filename
 
     def _normalize_audio(self, file_path: Path) -> bool:
-        """Normalizuje hlasitost MP3 souboru pomocí mp3gain"""
+        """Zapíše do souboru tagy ReplayGain/R128 podle změřené hlasitosti (EBU R128)"""
         try:
-            mp3gain_path = Path(self.config['paths']['ffmpeg_dir']) / 'mp3gain.exe'
-            if not mp3gain_path.exists():
-                self.error_handler.warning("mp3gain.exe nenalezen v bin/ složce")
-                return False
-
             self.error_handler.info(f"Normalizuji hlasitost: {file_path.name}")
             
-            # Spuštění mp3gain s parametry:
-            # -r = apply Track gain automatically (89.0 dB)
-            # -k = automatically lower Track/Album gain to not clip audio
-            # -c = ignore clipping warning when applying gain
-            process = subprocess.run(
-                [str(mp3gain_path), "-r", "-k", "-c", str(file_path)],
-                capture_output=True,
-                text=True
+            # Měření se uloží, opakovaná normalizace stejného souboru jen přepíše tagy
+            measurement = self.loudness.normalize(file_path)
+            self.error_handler.info(
+                f"Hlasitost normalizována: {file_path.name} ({measurement.integrated:.1f} LUFS)"
             )
-            
-            if process.returncode == 0:
-                self.error_handler.info(f"Hlasitost normalizována: {file_path.name}")
-                return True
-            else:
-                self.error_handler.warning(f"Chyba při normalizaci: {process.stderr}")
-                return False
+            return True
             
         except Exception as e:
             self.error_handler.error(f"Chyba při normalizaci zvuku: {e}")
@@ -294,16 +413,19 @@ class YTBAIManager:
     def download_song(self, result: SearchResult, is_last: bool = False) -> bool:
         """Stáhne skladbu z YouTube"""
         try:
-            # Kontrola volného místa
-            required_space = result.size or 1024 * 1024 * 50  # 50MB minimum
-            if not self._check_free_space(required_space):
-                self.error_handler.warning("Nedostatek místa na disku")
-                return False
-                
             # Kontrola duplicit
             if self._is_song_downloaded(result.video_id):
                 self.error_handler.info(f"Skladba již existuje: {result.title}")
                 return True
+            
+            # Jiná nahrávka téže skladby v knihovně
+            if self.config.get('download', {}).get('duplicates', 'skip') == 'skip':
+                existing = self.library_index.find_duplicate(result)
+                if existing and (not existing['path'] or Path(existing['path']).exists()):
+                    self.error_handler.info(
+                        f"Skladba již je v knihovně: {existing['artist']} - {existing['title']}"
+                    )
+                    return True
                 
             music_dir = Path(self.config['paths']['music_dir'])
             normalized_title = self._normalize_filename(f"{result.artist} - {result.title}")
@@ -337,126 +459,57 @@ class YTBAIManager:
             self.progress_task = self.progress
             
             # Stahování
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192',
-                }],
-                'outtmpl': str(output_path),
-                'quiet': True,
-                'no_warnings': True,
-                'logger': self.error_handler,
-                'ffmpeg_location': str(Path(self.config['paths']['ffmpeg_dir'])),
-                'progress_hooks': [self._progress_hook]
-            }
-            
             url = f"https://www.youtube.com/watch?v={result.video_id}"
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+            with self.ydl_pool.session(
+                'download',
+                params={'outtmpl': str(output_path)},
+                progress_hooks=[self._progress_hook]
+            ) as ydl:
+                info = ydl.extract_info(url, download=False, process=False)
+                # Místo podle velikosti zvoleného formátu, rezervace platí i pro souběžná stahování
+                with self.disk_space.reserve_for(info, music_dir, result.title):
+                    ydl.process_ie_result(info, download=True)
             
             # Dokončení
             if output_path.exists():
                 output_path = self._organize_downloaded_file(output_path, result)
                 self._mark_as_downloaded(result.video_id)
+                self.library_index.add_result(result, path=output_path)
                 
             if is_last:
                 self.progress.stop()
                 
             return True
             
+        except DiskSpaceError as e:
+            self.error_handler.warning(str(e))
+            if hasattr(self, 'progress') and self.progress and self.progress.live:
+                self.progress.stop()
+            return False
         except Exception as e:
             self.error_handler.error(f"Chyba při stahování {result.title}: {e}")
             if hasattr(self, 'progress') and self.progress and self.progress.live:
                 self.progress.stop()
             return False
 
-    def _get_thumbnail_cache(self, video_id: str) -> Optional[Path]:
-        """Získá cestu k náhledu v cache"""
-        cache_dir = Path(self.config['paths']['cache_dir']) / 'thumbnails'
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        return cache_dir / f"{video_id}.jpg"
-
     def _download_thumbnail(self, video_id: str, url: str) -> Optional[Path]:
-        """Stáhne náhled videa"""
-        try:
-            cache_path = self._get_thumbnail_cache(video_id)
-            if cache_path.exists():
-                return cache_path
-            
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            with open(cache_path, 'wb') as f:
-                f.write(response.content)
-            
-            return cache_path
-        except Exception as e:
-            self.error_handler.error(f"Chyba při stahování náhledu: {e}")
-            return None
+        """Stáhne náhled videa do sdílené cache obalů (stažení skladby ho pak použije jako obal)"""
+        return self.covers.original(url, video_id)
 
     def _is_song_downloaded(self, video_id: str) -> bool:
         """Zkontroluje, zda je skladba již stažena"""
-        try:
-            music_dir = Path(self.config['paths']['music_dir'])
-            downloaded_file = music_dir / '.downloaded.json'
-            
-            if not downloaded_file.exists():
-                return False
-            
-            with open(downloaded_file, 'r', encoding='utf-8') as f:
-                downloaded = json.load(f)
-                return video_id in downloaded
-            
-        except Exception:
-            return False
+        return self.downloaded.contains(video_id)
 
     def _mark_as_downloaded(self, video_id: str) -> None:
         """Označí skladbu jako staženou"""
         try:
-            music_dir = Path(self.config['paths']['music_dir'])
-            downloaded_file = music_dir / '.downloaded.json'
-            
-            downloaded = []
-            if downloaded_file.exists():
-                with open(downloaded_file, 'r', encoding='utf-8') as f:
-                    downloaded = json.load(f)
-                
-            if video_id not in downloaded:
-                downloaded.append(video_id)
-            
-            with open(downloaded_file, 'w', encoding='utf-8') as f:
-                json.dump(downloaded, f)
-            
+            self.downloaded.add(video_id)
         except Exception as e:
             self.error_handler.error(f"Chyba při ukládání seznamu stažených: {e}")
 
     def _calculate_relevance(self, entry: Dict[str, Any], query: str) -> float:
         """Vypočítá skóre relevance výsledku"""
-        score = 0.0
-        
-        # Shoda v názvu
-        title = entry.get('title', '').lower()
-        query = query.lower()
-        if query in title:
-            score += 1.0
-            
-        # Délka videa (preferujeme skladby 2-8 minut)
-        duration = entry.get('duration', 0)
-        if 120 <= duration <= 480:
-            score += 0.5
-            
-        # Počet zhlédnutí
-        views = entry.get('view_count', 0)
-        if views > 10000:
-            score += 0.3
-            
-        # Oficiální kanál
-        if entry.get('channel', '').endswith('- Topic'):
-            score += 0.8
-            
-        return score
+        return float(self.ranking.score([entry], query)[0])
 
     def _extract_genre(self, entry: Dict[str, Any]) -> Optional[str]:
         """Extrahuje žánr z tagů a popisu"""
@@ -513,9 +566,82 @@ class YTBAIManager:
             self.error_handler.warning("Prázdný vyhledávací dotaz")
             return []
         
+        # Cachujeme pouze běžné vyhledávání, rozšířené režimy mají proměnlivé výsledky
+        if use_related or use_recommendations or use_playlists:
+            return self._search_uncached(query, limit, use_related, use_recommendations, use_playlists)
+        
         try:
-            # Konfigurace yt-dlp podle parametrů
-            ydl_opts = self.ydl_opts.copy()
+            key = ('search', canonical_query(query), limit)
+            results = self._flights.do(key, lambda: self.search_cache.get_or_fetch(
+                query,
+                limit,
+                'yt_dlp',
+                lambda: [r.to_dict() for r in self._search_uncached(query, limit)]
+            ))
+            # Každý volající dostane vlastní instance výsledků
+            return [SearchResult.from_dict(r) for r in results]
+        except Exception as e:
+            self.error_handler.error(f"Chyba při vyhledávání: {e}")
+            return []
+
+    def iter_search(self, query: str, limit: int = 10) -> Iterator[SearchResult]:
+        """Vyhledá hudbu na YouTube a vrací výsledky průběžně
+
+        Záznamy ze stránky vyhledávání se zpracovávají jednotlivě,
+        první výsledek je tak k dispozici dřív než celý seznam.
+        """
+        if not query:
+            self.error_handler.warning("Prázdný vyhledávací dotaz")
+            return
+
+        cached = self.search_cache.peek(
+            query,
+            limit,
+            'yt_dlp',
+            refresh=lambda: [r.to_dict() for r in self._search_uncached(query, limit)]
+        )
+        if cached is not None:
+            for item in cached:
+                yield SearchResult.from_dict(item)
+            return
+
+        results = []
+        try:
+            with self.ydl_pool.session('search', params={'playlistend': limit}) as ydl:
+                self.error_handler.info(f"Vyhledávám: {query}")
+
+                # Bez zpracování vrací yt-dlp záznamy líně
+                search_results = ydl.extract_info(f"ytsearch{limit}:{query}", download=False, process=False)
+                if not search_results or 'entries' not in search_results:
+                    self.error_handler.warning("Žádné výsledky nenalezeny")
+                    return
+
+                for entry in search_results['entries']:
+                    if not entry:
+                        continue
+
+                    # Dotažení detailů jednoho videa
+                    entry = ydl.process_ie_result(entry, download=False)
+                    result = self._extract_video_info(entry) if entry else None
+                    if result:
+                        results.append(result)
+                        yield result
+
+                    if len(results) >= limit:
+                        break
+        except Exception as e:
+            self.error_handler.error(f"Chyba při vyhledávání: {e}")
+            return
+
+        if results:
+            self.search_cache.put(query, limit, 'yt_dlp', [r.to_dict() for r in results])
+
+    def _search_uncached(self, query: str, limit: int = 10, use_related: bool = False,
+                         use_recommendations: bool = False, use_playlists: bool = False) -> List[SearchResult]:
+        """Vyhledá hudbu na YouTube bez cache"""
+        try:
+            # Parametry yt-dlp pro toto vyhledávání
+            ydl_opts = {}
             
             # Nastavení limitu výsledků
             ydl_opts['playlistend'] = limit
@@ -537,7 +663,7 @@ class YTBAIManager:
                 ydl_opts['extract_flat'] = 'in_playlist'
                 ydl_opts['playlist_items'] = '1-5'  # První video a jeho doporučení
                 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with self.ydl_pool.session('search', params=ydl_opts) as ydl:
                 self.error_handler.info(f"Vyhledávám: {query}")
                 
                 # Vyhledání videí
@@ -613,19 +739,14 @@ class YTBAIManager:
             audio_quality = None
             
             # Najdeme nejlepší audio formát
-            for fmt in formats:
-                if fmt.get('acodec') != 'none' and fmt.get('vcodec') == 'none':  # pouze audio
-                    abr = fmt.get('abr', 0)  # audio bitrate
-                    asr = fmt.get('asr', 0)  # audio sample rate
-                    format_id = fmt.get('format_id', '')
-                    
-                    if not audio_format or abr > audio_format.get('abr', 0):
-                        audio_format = {
-                            'ext': fmt.get('ext', ''),
-                            'abr': abr,
-                            'asr': asr,
-                            'format_id': format_id
-                        }
+            best = best_audio_format(formats)
+            if best:
+                audio_format = {
+                    'ext': best.get('ext', ''),
+                    'abr': best.get('abr', 0),  # audio bitrate
+                    'asr': best.get('asr', 0),  # audio sample rate
+                    'format_id': best.get('format_id', '')
+                }
 
             if audio_format:
                 quality_str = f"{audio_format['abr']}k/{audio_format['asr']}Hz"
@@ -0,0 +1,155 @@
+from typing import List, Dict, Optional, Callable, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+import logging
+import time
+import os
+from .loudness import LoudnessMeasurement, LoudnessNormalizer, album_measurement, measure
+
+# Soubory, které normalizace zpracovává
+AUDIO_EXTS = ('.mp3', '.m4a', '.ogg', '.opus', '.flac')
+
+# Režimy z nastavení normalizace
+MODES = ('track', 'album', 'folder')
+
+@dataclass
+class NormalizeReport:
+    """Výsledek dávkové normalizace"""
+    total: int = 0
+    measured: int = 0
+    skipped: int = 0
+    tagged: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        """Propustnost přes všechny zpracované soubory (i přeskočené)"""
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+def _analyze(path: str, ffmpeg: str) -> Tuple[str, LoudnessMeasurement]:
+    """Měření v podřízeném procesu (funkce musí jít serializovat)"""
+    return path, measure(Path(path), ffmpeg)
+
+def album_key(path: Path, mode: str) -> Optional[str]:
+    """Skupina pro výpočet zisku alba
+
+    'folder' - všechny skladby ve stejné složce
+    'album' - tag alba (bez tagu složka), 'track' - bez skupiny
+    """
+    if mode == 'track':
+        return None
+    if mode == 'album':
+        try:
+            from mutagen import File
+            audio = File(str(path), easy=True)
+            album = (audio.get('album') or [None])[0] if audio else None
+            if album:
+                return f"{path.parent}|{album}"
+        except Exception:
+            pass
+    return str(path.parent)
+
+class NormalizeJob:
+    """Dávková normalizace složky nebo celé knihovny
+
+    Měření (dekódování celé skladby v ffmpeg) běží v poolu procesů
+    o velikosti počtu jader. Soubory, jejichž čas úpravy a velikost se od
+    posledního měření nezměnily, se neměří znovu. Tagy se zapisují
+    v hlavním procesu, protože jde jen o krátký zápis hlavičky.
+    """
+    def __init__(self, normalizer: LoudnessNormalizer, mode: str = 'track',
+                 workers: Optional[int] = None):
+        if mode not in MODES:
+            raise ValueError(f"Neznámý režim normalizace: {mode}")
+        self.normalizer = normalizer
+        self.mode = mode
+        self.workers = max(1, workers or os.cpu_count() or 2)
+
+    @staticmethod
+    def scan(root: Union[str, Path]) -> List[Path]:
+        """Najde zvukové soubory ve složce (rekurzivně)"""
+        root = Path(root).expanduser()
+        return sorted(p for p in root.rglob('*') if p.suffix.lower() in AUDIO_EXTS and p.is_file())
+
+    def run(self, root: Union[str, Path],
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> NormalizeReport:
+        """Změří a otaguje všechny soubory ve složce
+
+        Args:
+            root: Složka nebo kořen knihovny
+            progress_callback: Volá se s (hotovo, celkem) po každém souboru
+        """
+        start = time.perf_counter()
+        store = self.normalizer.store
+        files = self.scan(root)
+        report = NormalizeReport(total=len(files))
+        albums = {path: album_key(path, self.mode) for path in files}
+        stored_albums = {path: album for path, _, album in store.items()}
+
+        measurements: Dict[Path, LoudnessMeasurement] = {}
+        todo = []
+        # Skladby se změněnou skupinou (např. po přepnutí režimu) se jen přetagují
+        changed = set()
+        for path in files:
+            cached = store.get(path)
+            if not cached:
+                todo.append(path)
+                continue
+            measurements[path] = cached
+            if stored_albums.get(path) != albums[path]:
+                store.put(path, cached, albums[path])
+                changed.add(path)
+        report.skipped = len(files) - len(todo)
+
+        done = report.skipped
+        if progress_callback:
+            progress_callback(done, len(files))
+
+        if todo:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(todo))) as pool:
+                futures = {pool.submit(_analyze, str(path), self.normalizer.ffmpeg): path for path in todo}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        _, measurement = future.result()
+                        store.put(path, measurement, albums[path])
+                        measurements[path] = measurement
+                        changed.add(path)
+                        report.measured += 1
+                    except Exception as e:
+                        logging.error(f"Chyba při měření hlasitosti {path}: {e}")
+                        report.failed += 1
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, len(files))
+
+        report.tagged = self._apply(measurements, albums, changed, report)
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _apply(self, measurements: Dict[Path, LoudnessMeasurement], albums: Dict[Path, Optional[str]],
+               changed: set, report: NormalizeReport) -> int:
+        """Zapíše tagy změněným skladbám a celým albům, ve kterých se něco změnilo"""
+        groups: Dict[str, List[Path]] = {}
+        for path in measurements:
+            if albums[path]:
+                groups.setdefault(albums[path], []).append(path)
+
+        targets = {path: None for path in changed if not albums[path]}
+        for key, paths in groups.items():
+            if any(path in changed for path in paths):
+                album = album_measurement(measurements[path] for path in paths)
+                for path in paths:
+                    targets[path] = album
+
+        tagged = 0
+        for path, album in targets.items():
+            try:
+                self.normalizer.apply(path, measurements[path], album)
+                tagged += 1
+            except Exception as e:
+                logging.error(f"Chyba při zápisu tagů hlasitosti {path}: {e}")
+                report.failed += 1
+        return tagged
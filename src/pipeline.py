@@ -0,0 +1,365 @@
+from typing import List, Dict, Optional, Any
+from dataclasses import dataclass
+from pathlib import Path
+import subprocess
+import threading
+import logging
+import base64
+import queue
+import os
+from .exceptions import ConversionError
+from .formats import FormatPlan, negotiate
+from .loudness import LoudnessNormalizer
+from .cover_art import CoverArtCache, thumbnail_url
+from .downloader import ParallelDownloader, DownloadTask, DownloadResult
+from rich.progress import Progress, TaskID
+
+# Enkodéry ffmpeg pro podporované výstupní formáty
+ENCODERS = {
+    'mp3': 'libmp3lame',
+    'm4a': 'aac',
+    'ogg': 'libvorbis',
+    'opus': 'libopus'
+}
+
+# Jak se do kontejneru zapisuje obal
+COVER_FORMATS = {
+    '.mp3': 'id3',
+    '.m4a': 'mp4',
+    '.flac': 'flac',
+    '.ogg': 'vorbis',
+    '.opus': 'vorbis'
+}
+
+# Přípony náhledů, které ukládá yt-dlp (writethumbnail)
+THUMBNAIL_EXTS = ('.jpg', '.jpeg', '.png', '.webp')
+
+# Signál pro ukončení workerů fáze
+_DONE = object()
+
+@dataclass
+class Transcoder:
+    """Převod staženého audia pomocí ffmpeg (CPU fáze pipeline)"""
+    ffmpeg: str = 'ffmpeg'
+    codec: str = 'mp3'
+    bitrate: str = '192k'
+    sample_rate: int = 44100
+    keep_original: bool = False
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], ffmpeg: str = 'ffmpeg') -> 'Transcoder':
+        """Vytvoří převodník z sekcí 'audio' a 'conversion' konfigurace"""
+        audio = config.get('audio', {})
+        return cls(
+            ffmpeg=ffmpeg,
+            codec=config.get('conversion', {}).get('output_format', 'mp3'),
+            bitrate=audio.get('quality', '192k'),
+            sample_rate=audio.get('sample_rate', 44100),
+            keep_original=config.get('conversion', {}).get('keep_original', False)
+        )
+
+    def plan(self, info: Optional[Dict[str, Any]]) -> FormatPlan:
+        """Vyjedná, jak zdroj dostat do cílového formátu
+
+        Hlasitost se upravuje jen tagy, takže zdroj ve správném kodeku
+        stačí zkopírovat nebo přebalit.
+        """
+        return negotiate(info or {}, self.codec)
+
+    def command(self, source: Path, target: Path, copy: bool = False) -> List[str]:
+        """Příkaz ffmpeg pro převod (nebo přebalení) `source` na `target`"""
+        cmd = [self.ffmpeg, '-y', '-hide_banner', '-loglevel', 'error', '-i', str(source), '-vn']
+        if copy:
+            return cmd + ['-c:a', 'copy', str(target)]
+        cmd += [
+            '-c:a', ENCODERS.get(self.codec, self.codec),
+            '-b:a', self.bitrate,
+            '-ar', str(self.sample_rate),
+            str(target)
+        ]
+        return cmd
+
+    def transcode(self, source: Path, info: Optional[Dict[str, Any]] = None) -> Path:
+        """Převede soubor do cílového formátu a vrátí cestu k výsledku
+
+        Args:
+            source: Stažený soubor
+            info: Informace o videu z yt-dlp (pro vyjednání formátu)
+        """
+        plan = self.plan(info)
+        target = source.with_suffix(f'.{self.codec}')
+        if plan.action == 'copy' and target == source:
+            return source
+
+        output = target.with_name(f"{target.stem}.tmp{target.suffix}") if target == source else target
+        command = self.command(source, output, copy=not plan.needs_encode)
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0:
+            output.unlink(missing_ok=True)
+            raise ConversionError(f"Převod {source.name} selhal: {process.stderr.strip()}")
+
+        if output != target:
+            output.replace(target)
+        elif not self.keep_original:
+            source.unlink(missing_ok=True)
+        return target
+
+class Tagger:
+    """Zápis metadat a obalu do převedeného souboru (poslední fáze pipeline)
+
+    Obal se bere ze sdílené cache obalů (stažený jednou, ve velikosti
+    z konfigurace). Bez cache se použije náhled uložený yt-dlp.
+    """
+    def __init__(self, ffmpeg: str = 'ffmpeg', cover_art: bool = True,
+                 covers: Optional[CoverArtCache] = None):
+        self.ffmpeg = ffmpeg
+        self.cover_art = cover_art
+        self.covers = covers
+
+    def tag(self, path: Path, info: Dict[str, Any], source: Optional[Path] = None) -> None:
+        """Zapíše název, interpreta, album, žánr a obal
+
+        Args:
+            path: Převedený soubor
+            info: Informace o videu z yt-dlp
+            source: Původně stažený soubor (vedle něj leží náhled)
+        """
+        from mutagen import File
+
+        audio = File(str(path), easy=True)
+        if audio is None:
+            raise ConversionError(f"Nepodporovaný formát pro metadata: {path.name}")
+        if audio.tags is None:
+            audio.add_tags()
+
+        tags = {
+            'title': info.get('track') or info.get('title'),
+            'artist': info.get('artist') or info.get('uploader') or info.get('channel'),
+            'album': info.get('album'),
+            'genre': info.get('genre')
+        }
+        for key, value in tags.items():
+            if value:
+                audio[key] = str(value)
+        audio.save()
+
+        embed = self.cover_art and path.suffix in COVER_FORMATS
+        cover = None
+        if embed and self.covers:
+            cover = self.covers.cover(thumbnail_url(info), info.get('id'))
+            if cover:
+                self._add_cover(path, cover.read_bytes())
+
+        thumbnail = self._find_thumbnail(source or path)
+        if thumbnail:
+            try:
+                if embed and not cover:
+                    self._embed_cover(path, thumbnail)
+            finally:
+                thumbnail.unlink(missing_ok=True)
+
+    @staticmethod
+    def _find_thumbnail(path: Path) -> Optional[Path]:
+        for ext in THUMBNAIL_EXTS:
+            candidate = path.with_suffix(ext)
+            if candidate.exists():
+                return candidate
+        return None
+
+    def _embed_cover(self, path: Path, thumbnail: Path) -> None:
+        """Vloží náhled jako obal (webp se nejdřív převede na JPEG)"""
+        if thumbnail.suffix == '.webp':
+            jpeg = thumbnail.with_suffix('.jpg')
+            subprocess.run(
+                [self.ffmpeg, '-y', '-loglevel', 'error', '-i', str(thumbnail), str(jpeg)],
+                capture_output=True
+            )
+            thumbnail.unlink(missing_ok=True)
+            thumbnail = jpeg
+            if not thumbnail.exists():
+                return
+
+        self._add_cover(path, thumbnail.read_bytes(), 'image/png' if thumbnail.suffix == '.png' else 'image/jpeg')
+
+    @staticmethod
+    def _add_cover(path: Path, data: bytes, mime: str = 'image/jpeg') -> None:
+        """Zapíše obal způsobem, který používá daný kontejner"""
+        kind = COVER_FORMATS[path.suffix]
+        if kind == 'id3':
+            from mutagen.id3 import ID3, APIC
+
+            audio = ID3(str(path))
+            audio.add(APIC(
+                encoding=3,  # UTF-8
+                mime=mime,
+                type=3,  # Cover (front)
+                desc='Cover',
+                data=data
+            ))
+            audio.save()
+            return
+
+        if kind == 'mp4':
+            from mutagen.mp4 import MP4, MP4Cover
+
+            audio = MP4(str(path))
+            image_format = MP4Cover.FORMAT_PNG if mime == 'image/png' else MP4Cover.FORMAT_JPEG
+            audio['covr'] = [MP4Cover(data, imageformat=image_format)]
+            audio.save()
+            return
+
+        from mutagen import File
+        from mutagen.flac import Picture
+
+        picture = Picture()
+        picture.type = 3  # Cover (front)
+        picture.mime = mime
+        picture.desc = 'Cover'
+        picture.data = data
+        audio = File(str(path))
+        if kind == 'flac':
+            audio.clear_pictures()
+            audio.add_picture(picture)
+        else:
+            # Vorbis comment (Ogg Vorbis, Opus) nese obrázek jako base64 bloku FLAC
+            audio['metadata_block_picture'] = [base64.b64encode(picture.write()).decode('ascii')]
+        audio.save()
+
+class DownloadPipeline:
+    """Stahování rozdělené do fází s vlastními workery
+
+    Stažení (síť) běží v `downloader.max_workers` vláknech, převod
+    (ffmpeg, CPU) v poolu velikosti počtu jader a zápis metadat v jednom
+    vlákně. Měření hlasitosti patří k převodu, zápis jejích tagů
+    k metadatům. Mezi fázemi jsou omezené fronty - když převod nestíhá,
+    stahování počká a naopak pomalá síť neblokuje převod.
+    """
+    def __init__(self, downloader: ParallelDownloader, transcoder: Transcoder,
+                 tagger: Optional[Tagger] = None, transcode_workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, loudness: Optional[LoudnessNormalizer] = None):
+        self.downloader = downloader
+        self.transcoder = transcoder
+        self.tagger = tagger
+        self.loudness = loudness
+        self.transcode_workers = max(1, transcode_workers or os.cpu_count() or 2)
+        self.queue_size = queue_size or self.transcode_workers * 2
+
+    def run(self, tasks: List[DownloadTask], progress: Optional[Progress] = None) -> List[DownloadResult]:
+        """Zpracuje úlohy všemi fázemi
+
+        Returns:
+            Výsledky ve stejném pořadí jako úlohy. Playlisty projdou jen
+            fází stažení a dokončuje je volající.
+        """
+        if not tasks:
+            return []
+
+        results: List[Optional[DownloadResult]] = [None] * len(tasks)
+        rows: Dict[int, TaskID] = {}
+        pending: queue.Queue = queue.Queue()
+        to_transcode: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        to_tag: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        # Stavový řádek plánovače (fronta a propustnost všech stahování)
+        scheduler = self.downloader.scheduler
+        status_row = progress.add_task(scheduler.stats().summary(), total=None) if progress and scheduler else None
+
+        for index, task in enumerate(tasks):
+            if progress:
+                rows[index] = progress.add_task(f"[cyan]{task.title}", total=100)
+                task.progress_callback = self.downloader._progress_updater(
+                    progress, rows[index], task.progress_callback
+                )
+            pending.put((index, task))
+
+        def refresh_status() -> None:
+            if status_row is not None:
+                progress.update(status_row, description=f"[dim]{scheduler.stats().summary()}")
+
+        def stage(index: int, description: str) -> None:
+            refresh_status()
+            if progress:
+                progress.update(rows[index], description=f"[magenta]{tasks[index].title} ({description})")
+
+        def finish(index: int, result: DownloadResult) -> None:
+            results[index] = result
+            # Po převodu už na disku zůstal jen výsledný soubor
+            self.downloader.release_space(result.task)
+            refresh_status()
+            if progress and result.ok:
+                progress.update(rows[index], completed=100, description=f"[green]{tasks[index].title}")
+
+        def fetch_worker() -> None:
+            while True:
+                try:
+                    index, task = pending.get_nowait()
+                except queue.Empty:
+                    return
+                result = self.downloader.fetch(task)
+                if result.ok and not result.is_playlist:
+                    # Při plné frontě čekáme - převod nestíhá
+                    to_transcode.put((index, result, result.path, None))
+                else:
+                    finish(index, result)
+
+        def transcode_worker() -> None:
+            while (item := to_transcode.get()) is not _DONE:
+                index, result, source, _ = item
+                try:
+                    stage(index, "převod")
+                    self.downloader.set_state(result.task, 'transcoding')
+                    result.path = self.transcoder.transcode(source, result.info)
+                    measurement = self.loudness.measure(result.path) if self.loudness else None
+                    to_tag.put((index, result, source, measurement))
+                except Exception as e:
+                    self._fail(result, e)
+                    finish(index, result)
+
+        def tag_worker() -> None:
+            while (item := to_tag.get()) is not _DONE:
+                index, result, source, measurement = item
+                try:
+                    if self.tagger or measurement:
+                        stage(index, "metadata")
+                        self.downloader.set_state(result.task, 'tagging')
+                    if self.tagger:
+                        self.tagger.tag(result.path, result.info, source)
+                    if measurement:
+                        # Tagy hlasitosti až po ostatních - zápis mění čas úpravy souboru
+                        self.loudness.apply(result.path, measurement)
+                    self.downloader.set_state(result.task, 'done', path=result.path)
+                except Exception as e:
+                    self._fail(result, e)
+                finish(index, result)
+
+        fetchers = self._start(fetch_worker, min(self.downloader.max_workers, len(tasks)), "fetch")
+        transcoders = self._start(transcode_worker, self.transcode_workers, "transcode")
+        taggers = self._start(tag_worker, 1, "tag")
+
+        self._stop(fetchers, None, 0)
+        self._stop(transcoders, to_transcode, len(transcoders))
+        self._stop(taggers, to_tag, len(taggers))
+        return results
+
+    def _fail(self, result: DownloadResult, error: Exception) -> None:
+        logging.error(f"Chyba při zpracování {result.task.title}: {error}")
+        result.error = error
+        self.downloader.set_state(result.task, 'failed', error=str(error))
+
+    @staticmethod
+    def _start(target, count: int, name: str) -> List[threading.Thread]:
+        threads = [
+            threading.Thread(target=target, name=f"pipeline-{name}-{i}", daemon=True)
+            for i in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    @staticmethod
+    def _stop(threads: List[threading.Thread], inbox: Optional[queue.Queue], signals: int) -> None:
+        """Pošle workerům signál ukončení a počká na ně"""
+        for _ in range(signals):
+            inbox.put(_DONE)
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,166 @@
+from typing import List, Dict, Optional, Any, Sequence
+from dataclasses import dataclass, fields
+import numpy as np
+import re
+from .search_cache import canonical_query
+
+# Příznaky hledané v názvu videa (po převodu na kanonický tvar)
+FLAG_PATTERNS = {
+    'official': re.compile(r'\bofficial\b|\boficialni\b'),
+    'live': re.compile(r'\blive\b|\bkoncert\b|\bnazivo\b'),
+    'cover': re.compile(r'\bcover\b|\btribute\b'),
+    'karaoke': re.compile(r'\bkaraoke\b|\binstrumental\b'),
+    'remix': re.compile(r'\bremix\b|\bsped up\b|\bslowed\b|\bnightcore\b|\bmashup\b'),
+    'revival': re.compile(r'\brevival\b|\bre-?recorded\b')
+}
+
+# Všechny příznaky v jednom výrazu - název se prochází jen jednou
+FLAG_PATTERN = re.compile('|'.join(
+    f'(?P<{name}>{pattern.pattern})' for name, pattern in FLAG_PATTERNS.items()
+))
+
+# Pořadí sloupců matice příznaků
+FEATURES = (
+    'duration', 'views', 'topic', 'overlap',
+    'official', 'live', 'cover', 'karaoke', 'remix', 'revival'
+)
+
+@dataclass
+class RankingWeights:
+    """Váhy příznaků pro výpočet skóre"""
+    overlap: float = 1.0          # Podíl slov dotazu obsažených v názvu
+    duration_fit: float = 0.5     # Délka v preferovaném rozsahu
+    views: float = 0.05           # log10 počtu zhlédnutí
+    topic: float = 0.8            # Kanál "Interpret - Topic"
+    official: float = 0.6
+    live: float = -0.4
+    cover: float = -0.6
+    karaoke: float = -1.0
+    remix: float = -0.3
+    revival: float = -0.3
+    min_fit_duration: int = 120   # Preferovaný rozsah délky v sekundách
+    max_fit_duration: int = 480
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> 'RankingWeights':
+        """Vytvoří váhy z konfigurace, neznámé klíče ignoruje"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in (config or {}).items() if k in names})
+
+def _field(candidate: Any, name: str, default: Any = None) -> Any:
+    """Hodnota z položky yt-dlp (slovník) nebo z SearchResult"""
+    if isinstance(candidate, dict):
+        return candidate.get(name, default)
+    return getattr(candidate, name, default)
+
+def _duration_seconds(value: Any) -> float:
+    """Délka v sekundách z čísla nebo textu "m:ss" / "h:mm:ss" """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        try:
+            seconds = 0
+            for part in value.split(':'):
+                seconds = seconds * 60 + int(part)
+            return float(seconds)
+        except ValueError:
+            return 0.0
+    return 0.0
+
+class RankingEngine:
+    """Vektorové řazení výsledků vyhledávání
+
+    Kandidáti (záznamy yt-dlp nebo SearchResult) se v jednom průchodu
+    převedou na matici příznaků, skóre je pak jediný maticový součin
+    s vektorem vah. Filtrování i řazení probíhá nad celými sloupci.
+    """
+    def __init__(self, weights: Optional[RankingWeights] = None):
+        self.weights = weights or RankingWeights()
+
+    def features(self, candidates: Sequence[Any], query: str = '') -> np.ndarray:
+        """Sestaví matici příznaků (řádek = kandidát, sloupce podle FEATURES)
+
+        Text každého kandidáta se normalizuje jen jednou.
+        """
+        query_tokens = set(canonical_query(query).split())
+        flag_names = FEATURES[4:]
+        rows = []
+
+        for candidate in candidates:
+            title = canonical_query(_field(candidate, 'title') or '')
+            channel = _field(candidate, 'channel') or _field(candidate, 'artist') or ''
+            found = {match.lastgroup for match in FLAG_PATTERN.finditer(title)}
+            overlap = len(query_tokens.intersection(title.split())) / len(query_tokens) if query_tokens else 0.0
+
+            rows.append((
+                _duration_seconds(_field(candidate, 'duration')),
+                _field(candidate, 'view_count') or 0,
+                channel.endswith('- Topic'),
+                overlap,
+                *(name in found for name in flag_names)
+            ))
+
+        matrix = np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURES))
+        return matrix
+
+    def score_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        """Vypočítá skóre pro matici příznaků"""
+        w = self.weights
+        duration = matrix[:, 0]
+        fit = (duration >= w.min_fit_duration) & (duration <= w.max_fit_duration)
+
+        columns = np.column_stack([
+            fit,
+            np.log10(matrix[:, 1] + 1.0),
+            matrix[:, 2:]
+        ])
+        vector = np.array([
+            w.duration_fit, w.views, w.topic, w.overlap,
+            w.official, w.live, w.cover, w.karaoke, w.remix, w.revival
+        ])
+        return columns @ vector
+
+    def score(self, candidates: Sequence[Any], query: str = '') -> np.ndarray:
+        """Vrátí skóre všech kandidátů"""
+        if not candidates:
+            return np.zeros(0)
+        return self.score_matrix(self.features(candidates, query))
+
+    def rank(self, candidates: Sequence[Any], query: str = '',
+             exclude: Optional[Sequence[str]] = None,
+             min_duration: int = 0, max_duration: int = 0,
+             limit: Optional[int] = None) -> List[Any]:
+        """Vyfiltruje a seřadí kandidáty v jednom průchodu
+
+        Args:
+            candidates: Záznamy yt-dlp nebo SearchResult
+            query: Dotaz pro výpočet shody s názvem
+            exclude: Příznaky, které kandidáta vyřazují (např. 'cover', 'live')
+            min_duration: Minimální délka v sekundách (0 = bez omezení)
+            max_duration: Maximální délka v sekundách (0 = bez omezení)
+            limit: Maximální počet vrácených kandidátů
+
+        Returns:
+            Kandidáti seřazení od nejlepšího, při shodě skóre v původním pořadí
+        """
+        if not candidates:
+            return []
+
+        matrix = self.features(candidates, query)
+        mask = np.ones(len(candidates), dtype=bool)
+
+        for name in exclude or ():
+            mask &= matrix[:, FEATURES.index(name)] == 0
+        # Neznámou délku (0) filtry délky nevyřazují
+        duration = matrix[:, 0]
+        if min_duration:
+            mask &= (duration == 0) | (duration >= min_duration)
+        if max_duration:
+            mask &= (duration == 0) | (duration <= max_duration)
+
+        indices = np.flatnonzero(mask)
+        scores = self.score_matrix(matrix[indices])
+        order = indices[np.argsort(-scores, kind='stable')]
+        if limit is not None:
+            order = order[:limit]
+        return [candidates[i] for i in order]
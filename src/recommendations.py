@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Any, Callable, Iterable
+import threading
+import logging
+
+# Šablony dotazů pro hledání podobných skladeb
+RECOMMENDATION_TEMPLATES = [
+    "{artist} similar songs",   # Podobné skladby od stejného interpreta
+    "songs like {title}",       # Podobné skladby podle názvu
+    "mix {artist} {title}",     # YouTube mix style
+    "{artist} best songs",      # Nejlepší skladby od interpreta
+    "if you like {title}"       # Doporučení stylem "pokud se vám líbí..."
+]
+
+# Konstanta pro reciprocal rank fusion
+RRF_K = 60
+
+class RecommendationEngine:
+    """Souběžné vyhledávání doporučení pro sadu skladeb
+
+    Dotazy ze šablon se spouští paralelně s omezeným počtem vláken.
+    Nalezené záznamy se deduplikují napříč vlákny a jakmile je k dispozici
+    dost unikátních výsledků, další dotazy se už nespouští. Výsledky se
+    řadí pomocí reciprocal rank fusion - záznam nalezený více dotazy
+    a na vyšších pozicích má přednost.
+    """
+    def __init__(self, search: Callable[[str], List[Dict[str, Any]]],
+                 fanout: int = 4, limit: int = 10,
+                 templates: Optional[List[str]] = None):
+        self.search = search
+        self.fanout = max(1, fanout)
+        self.limit = limit
+        self.templates = templates or RECOMMENDATION_TEMPLATES
+
+    def build_queries(self, seeds: Iterable[Any]) -> List[str]:
+        """Sestaví dotazy - nejdřív první šablona pro všechny skladby, pak další"""
+        seeds = list(seeds)
+        queries = []
+        for template in self.templates:
+            for seed in seeds:
+                query = template.format(artist=seed.artist, title=seed.title)
+                if query not in queries:
+                    queries.append(query)
+        return queries
+
+    def _is_acceptable(self, entry: Optional[Dict[str, Any]], exclude: set) -> bool:
+        """Přijímáme pouze videa (ne playlisty), která nejsou živá ani vyloučená"""
+        if not entry or not entry.get('id') or entry['id'] in exclude:
+            return False
+        if entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab':
+            return False
+        return not entry.get('is_live', False) and entry.get('live_status') != 'is_live'
+
+    def recommend(self, seeds: List[Any]) -> List[Dict[str, Any]]:
+        """Vrátí seřazená doporučení (záznamy z vyhledávání)
+
+        Args:
+            seeds: Skladby s atributy artist, title a video_id
+
+        Returns:
+            Nejvýše `limit` unikátních záznamů seřazených podle skóre
+        """
+        exclude = {seed.video_id for seed in seeds}
+        queries = self.build_queries(seeds)
+
+        # Sdílený stav mezi vlákny
+        lock = threading.Lock()
+        stop = threading.Event()
+        candidates: Dict[str, Dict[str, Any]] = {}
+        scores: Dict[str, float] = {}
+        order: Dict[str, int] = {}
+
+        def run(query: str) -> None:
+            if stop.is_set():
+                return
+            entries = self.search(query) or []
+            with lock:
+                for rank, entry in enumerate(e for e in entries if self._is_acceptable(e, exclude)):
+                    video_id = entry['id']
+                    if video_id not in candidates:
+                        # Po dosažení limitu už jen přičítáme skóre známým záznamům
+                        if len(candidates) >= self.limit:
+                            continue
+                        candidates[video_id] = entry
+                        order[video_id] = len(order)
+                    scores[video_id] = scores.get(video_id, 0.0) + 1.0 / (RRF_K + rank)
+                if len(candidates) >= self.limit:
+                    stop.set()
+
+        with ThreadPoolExecutor(max_workers=min(self.fanout, len(queries) or 1)) as executor:
+            futures = [executor.submit(run, query) for query in queries]
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.warning(f"Chyba při hledání doporučení: {e}")
+                if stop.is_set():
+                    # Dotazy, které ještě nezačaly, už nespouštíme
+                    for pending in futures:
+                        pending.cancel()
+
+        ranked = sorted(candidates, key=lambda vid: (-scores[vid], order[vid]))
+        return [candidates[vid] for vid in ranked[:self.limit]]
@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Any, Callable, Union, TypeVar, Generic
+from dataclasses import dataclass, field
+import threading
+import logging
+from .search_cache import canonical_query
+
+T = TypeVar('T')
+
+@dataclass
+class Suggestion:
+    """Návrh skladby od AI ve tvaru "Interpret - Název" """
+    artist: str
+    title: str
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        """Klíč pro deduplikaci a cache"""
+        return canonical_query(f"{self.artist} {self.title}")
+
+    def __str__(self) -> str:
+        return f"{self.artist} - {self.title}"
+
+def parse_suggestions(suggestions: Union[str, List[str]]) -> List[Suggestion]:
+    """Převede odpověď AI na seznam návrhů
+
+    Přijímá text i seznam řádků, odstraní číslování ("1. ")
+    a přeskočí řádky, které nejsou ve formátu "Interpret - Název".
+    """
+    if isinstance(suggestions, str):
+        suggestions = suggestions.split('\n')
+
+    parsed = []
+    for line in suggestions:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Odstraníme číslování (např. "1. ")
+        if '. ' in line and line.split('. ', 1)[0].isdigit():
+            line = line.split('. ', 1)[1]
+
+        if ' - ' not in line:
+            continue
+
+        artist, title = line.split(' - ', 1)
+        artist = artist.strip().strip('"')
+        title = title.strip().strip('"')
+        if artist and title:
+            parsed.append(Suggestion(artist=artist, title=title))
+
+    return parsed
+
+class SuggestionResolver(Generic[T]):
+    """Souběžné vyhledání návrhů AI na YouTube
+
+    Každý unikátní návrh se hledá jen jednou, úspěšné výsledky se
+    pamatují pro další volání. Počet souběžných hledání je omezen.
+    """
+    def __init__(self, lookup: Callable[[Suggestion], Optional[T]], max_workers: int = 5):
+        self.lookup = lookup
+        self.max_workers = max_workers
+        self._cache: Dict[str, T] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, suggestions: List[Suggestion],
+                on_result: Optional[Callable[[Suggestion, Optional[T], Optional[Exception]], None]] = None
+                ) -> List[T]:
+        """Vyhledá všechny návrhy a vrátí nalezené výsledky v původním pořadí
+
+        Args:
+            suggestions: Návrhy k vyhledání
+            on_result: Callback volaný po dokončení každého návrhu
+                (návrh, výsledek nebo None, výjimka nebo None)
+
+        Returns:
+            Seznam nalezených výsledků bez duplicit
+        """
+        # Deduplikace - první výskyt určuje pořadí
+        unique: Dict[str, Suggestion] = {}
+        for suggestion in suggestions:
+            unique.setdefault(suggestion.key, suggestion)
+
+        resolved: Dict[str, Optional[T]] = {}
+        pending = []
+        for key, suggestion in unique.items():
+            with self._lock:
+                cached = self._cache.get(key)
+            if cached is not None:
+                resolved[key] = cached
+                if on_result:
+                    on_result(suggestion, cached, None)
+            else:
+                pending.append(suggestion)
+
+        if pending:
+            workers = max(1, min(self.max_workers, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self.lookup, suggestion): suggestion
+                    for suggestion in pending
+                }
+                # Výsledky zpracováváme v hlavním vlákně v pořadí dokončení
+                for future in as_completed(futures):
+                    suggestion = futures[future]
+                    error = None
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logging.warning(f"Vyhledání návrhu {suggestion} selhalo: {e}")
+                        result, error = None, e
+
+                    resolved[suggestion.key] = result
+                    if result is not None:
+                        with self._lock:
+                            self._cache[suggestion.key] = result
+                    if on_result:
+                        on_result(suggestion, result, error)
+
+        return [resolved[key] for key in unique if resolved.get(key) is not None]
@@ -1,65 +1,285 @@
-from typing import TypeVar, Callable, Optional, Type, Union, List
-import time
+from typing import TypeVar, Callable, Optional, Type, Union, List, Dict, Iterator, Tuple
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 from functools import wraps
+import threading
+import asyncio
 import logging
-from .exceptions import RetryError, NetworkError, APIError
+import random
+import time
+from .exceptions import RetryError, NetworkError, APIError, CircuitOpenError
 
 T = TypeVar('T')
 
+# HTTP stavy, které znamenají přetížení nebo výpadek serveru (ne chybu požadavku)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Výjimky knihoven, které nejsou povinné (yt-dlp, http.client, openai)
+TRANSIENT_NAMES = ('TransportError', 'IncompleteRead', 'APIConnectionError', 'APITimeoutError')
+
 class RetryStrategy:
-    """Strategie pro opakování pokusů"""
-    def __init__(self, 
+    """Strategie pro opakování pokusů
+
+    Zpoždění roste exponenciálně (delay * backoff_factor^(pokus-1), nejvýš
+    max_delay) a náhodně se zkracuje až o `jitter` (0.5 = o polovinu),
+    aby souběžné úlohy neopakovaly požadavky ve stejný okamžik. Pokud
+    server pošle Retry-After, čeká se přesně podle něj - když je delší
+    než `max_retry_after`, další pokus se už nedělá.
+    """
+    def __init__(self,
                  max_attempts: int = 3,
                  delay: float = 1.0,
                  backoff_factor: float = 2.0,
-                 exceptions: Union[Type[Exception], List[Type[Exception]]] = (Exception,)):
+                 exceptions: Union[Type[Exception], List[Type[Exception]]] = (Exception,),
+                 jitter: float = 0.5,
+                 max_delay: float = 60.0,
+                 retry_statuses: Tuple[int, ...] = RETRY_STATUSES,
+                 max_retry_after: float = 120.0):
         self.max_attempts = max_attempts
         self.delay = delay
         self.backoff_factor = backoff_factor
         self.exceptions = exceptions if isinstance(exceptions, (list, tuple)) else [exceptions]
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self.max_retry_after = max_retry_after
 
-    def get_delay(self, attempt: int) -> float:
+    def get_delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
         """Vypočítá zpoždění pro další pokus"""
-        return self.delay * (self.backoff_factor ** (attempt - 1))
+        if error is not None:
+            wait = retry_after(error)
+            if wait is not None:
+                return wait
+        base = min(self.delay * (self.backoff_factor ** (attempt - 1)), self.max_delay)
+        return base * (1 - self.jitter * random.random())
+
+    def should_retry(self, error: BaseException) -> bool:
+        """Opakovat při výjimce ze seznamu, výpadku spojení nebo HTTP stavu přetížení"""
+        if isinstance(error, CircuitOpenError):
+            return False
+        return (isinstance(error, tuple(self.exceptions))
+                or status_of(error) in self.retry_statuses
+                or is_transient(error))
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    """Výjimka a všechny, ze kterých vznikla (i zabalené v DownloadError z yt-dlp)"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        exc_info = getattr(error, 'exc_info', None)
+        if isinstance(exc_info, tuple) and len(exc_info) > 1 and isinstance(exc_info[1], BaseException):
+            error = exc_info[1]
+        else:
+            error = error.__cause__ or error.__context__
+
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP stav z výjimky (requests, yt-dlp, urllib, openai)"""
+    for e in _error_chain(error):
+        for source in (e, getattr(e, 'response', None)):
+            if source is None:
+                continue
+            for attr in ('status', 'status_code', 'code', 'http_status'):
+                value = getattr(source, attr, None)
+                if isinstance(value, int) and 100 <= value < 600:
+                    return value
+    return None
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Doba čekání z hlavičky Retry-After (sekundy nebo HTTP datum)"""
+    for e in _error_chain(error):
+        for source in (getattr(e, 'response', None), e):
+            headers = getattr(source, 'headers', None)
+            if not headers:
+                continue
+            try:
+                value = headers.get('Retry-After') or headers.get('retry-after')
+            except Exception:
+                continue
+            if not value:
+                continue
+            value = str(value).strip()
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                pass
+            try:
+                moment = parsedate_to_datetime(value)
+                if moment.tzinfo is None:
+                    moment = moment.replace(tzinfo=timezone.utc)
+                return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+def is_transient(error: BaseException) -> bool:
+    """Dočasná chyba sítě nebo serveru, kterou má smysl opakovat"""
+    transient: Tuple[type, ...] = (NetworkError, ConnectionError, TimeoutError)
+    try:
+        import requests
+        transient += (requests.ConnectionError, requests.Timeout)
+    except ImportError:
+        pass
+    for e in _error_chain(error):
+        if isinstance(e, transient) or type(e).__name__ in TRANSIENT_NAMES:
+            return True
+    return status_of(error) in RETRY_STATUSES
+
+class CircuitBreaker:
+    """Jistič pro jeden backend (YouTube, Ollama, OpenAI, Webshare)
+
+    Po `failure_threshold` chybách za sebou se jistič rozpojí a volání
+    okamžitě končí CircuitOpenError, dokud neuplyne `reset_timeout`
+    (nebo doba z Retry-After). Pak projde jedno zkušební volání -
+    úspěch jistič sepne, chyba ho znovu rozpojí.
+    """
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._open_until and time.monotonic() < self._open_until:
+                return 'open'
+            return 'half_open' if self._open_until else 'closed'
+
+    def before_call(self) -> None:
+        """Propustí volání, nebo vyhodí CircuitOpenError"""
+        with self._lock:
+            if not self._open_until:
+                return
+            remaining = self._open_until - time.monotonic()
+            if remaining > 0 or self._trial:
+                raise CircuitOpenError(
+                    f"Služba {self.name} je nedostupná, další pokus za {max(remaining, 0):.0f}s",
+                    self.name,
+                    max(remaining, 0.0)
+                )
+            # Jedno zkušební volání, ostatní dál končí hned
+            self._trial = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._open_until = 0.0
+            self._trial = False
 
-def retry(strategy: Optional[RetryStrategy] = None):
+    def record_failure(self, wait: Optional[float] = None) -> None:
+        """Započítá chybu backendu (wait = Retry-After, rozpojí jistič hned)"""
+        with self._lock:
+            self._failures += 1
+            trial, self._trial = self._trial, False
+            if wait is not None:
+                timeout = wait  # Server sám řekl, kdy to zkusit znovu
+            elif trial or self._failures >= self.failure_threshold:
+                timeout = self.reset_timeout
+            else:
+                return
+            self._open_until = time.monotonic() + timeout
+        logging.warning(f"Jistič {self.name} rozpojen na {timeout:.0f}s po {self._failures} chybách")
+
+    def reset(self) -> None:
+        self.record_success()
+
+# Jističe podle backendu - sdílí je všechna volání v procesu
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def circuit(name: str, **kwargs) -> CircuitBreaker:
+    """Sdílený jistič pro backend (vytvoří se při prvním použití)"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
+
+def retry(strategy: Optional[RetryStrategy] = None, circuit_name: Optional[str] = None):
     """Dekorátor pro opakování operací při selhání
-    
+
+    Funguje pro běžné funkce (čeká time.sleep) i pro korutiny (čeká
+    asyncio.sleep, neblokuje event loop).
+
     Args:
         strategy: Strategie pro opakování pokusů
+        circuit_name: Jistič backendu - chyby se započítávají a při
+            rozpojeném jističi volání hned selže CircuitOpenError
     """
     if strategy is None:
         strategy = RetryStrategy()
 
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        breaker = circuit(circuit_name) if circuit_name else None
+
+        def attempt_failed(error: BaseException, attempt: int) -> Optional[float]:
+            """Zpracuje chybu pokusu a vrátí zpoždění, nebo None (už neopakovat)"""
+            if not strategy.should_retry(error):
+                # Backend odpověděl (např. 404) - je v pořádku, jen požadavek ne
+                if breaker and not isinstance(error, CircuitOpenError):
+                    breaker.record_success()
+                raise error
+            wait = retry_after(error)
+            if breaker:
+                breaker.record_failure(wait)
+
+            logging.warning(
+                f"Pokus {attempt}/{strategy.max_attempts} selhal pro {func.__name__}: {str(error)}"
+            )
+            if attempt >= strategy.max_attempts:
+                return None
+            if wait is not None and wait > strategy.max_retry_after:
+                logging.warning(f"Server žádá počkat {wait:.0f}s, další pokus se nedělá")
+                return None
+            delay = strategy.get_delay(attempt, error)
+            logging.info(f"Čekám {delay:.1f}s před dalším pokusem...")
+            return delay
+
+        def exhausted(last_exception: BaseException, attempt: int) -> RetryError:
+            return RetryError(
+                f"Operace selhala po {attempt} pokusech",
+                attempt,
+                last_exception
+            )
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs) -> T:
+                for attempt in range(1, strategy.max_attempts + 1):
+                    if breaker:
+                        breaker.before_call()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        delay = attempt_failed(e, attempt)
+                        if delay is None:
+                            raise exhausted(e, attempt) from e
+                        await asyncio.sleep(delay)
+                        continue
+                    if breaker:
+                        breaker.record_success()
+                    return result
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs) -> T:
-            last_exception = None
-            
             for attempt in range(1, strategy.max_attempts + 1):
+                if breaker:
+                    breaker.before_call()
                 try:
-                    return func(*args, **kwargs)
-                except tuple(strategy.exceptions) as e:
-                    last_exception = e
-                    
-                    # Logování pokusu
-                    logging.warning(
-                        f"Pokus {attempt}/{strategy.max_attempts} selhal pro {func.__name__}: {str(e)}"
-                    )
-                    
-                    # Pokud není poslední pokus, čekáme
-                    if attempt < strategy.max_attempts:
-                        delay = strategy.get_delay(attempt)
-                        logging.info(f"Čekám {delay:.1f}s před dalším pokusem...")
-                        time.sleep(delay)
-                    
-            # Pokud všechny pokusy selhaly
-            raise RetryError(
-                f"Operace selhala po {strategy.max_attempts} pokusech",
-                strategy.max_attempts,
-                last_exception
-            )
-            
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    delay = attempt_failed(e, attempt)
+                    if delay is None:
+                        raise exhausted(e, attempt) from e
+                    time.sleep(delay)
+                    continue
+                if breaker:
+                    breaker.record_success()
+                return result
         return wrapper
     return decorator
 
@@ -85,4 +305,4 @@ DOWNLOAD_RETRY = RetryStrategy(
     delay=5.0,
     backoff_factor=2.0,
     exceptions=[NetworkError, ConnectionError, TimeoutError]
-) 
\ No newline at end of file
+)
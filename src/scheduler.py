@@ -0,0 +1,236 @@
+from typing import List, Dict, Optional, Any, Tuple
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+import threading
+import itertools
+import time
+
+# Třídy priority - nižší číslo má přednost
+PRIORITIES = {
+    'interactive': 0,  # Stažení, které uživatel právě spustil
+    'batch': 1,        # Fronta, obnovené úlohy, playlisty
+    'prefetch': 2      # Náhledy, obaly a jiné spekulativní stahování
+}
+
+# Kolikrát dráž platí přenos za data, když běží přenos vyšší priority
+PRIORITY_COST = {0: 1, 1: 2, 2: 4}
+
+def host_of(url_or_host: str) -> str:
+    """Host z URL (nebo přímo zadaný host)"""
+    if '://' in url_or_host:
+        return urlparse(url_or_host).hostname or url_or_host
+    return url_or_host
+
+class TokenBucket:
+    """Omezení rychlosti přenosu (bajty za sekundu)
+
+    Rychlost 0 znamená bez omezení. Zásobník `burst` dovolí krátkou
+    špičku nad limit, průměr se drží na `rate`.
+    """
+    def __init__(self, rate: float = 0, burst: Optional[float] = None):
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate: float, burst: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = max(0.0, float(rate or 0))
+            self.burst = float(burst) if burst else max(self.rate, 64 * 1024)
+            self._tokens = self.burst
+            self._updated = time.monotonic()
+
+    def consume(self, amount: float) -> float:
+        """Odebere `amount` tokenů, případně počká, až budou k dispozici
+
+        Returns:
+            Doba čekání v sekundách
+        """
+        with self._lock:
+            if not self.rate:
+                return 0.0
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Tokeny mohou jít do mínusu - dluh se splatí čekáním
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+@dataclass
+class SchedulerStats:
+    """Okamžitý stav plánovače"""
+    queued: Dict[str, int] = field(default_factory=dict)
+    active: Dict[str, int] = field(default_factory=dict)
+    hosts: Dict[str, int] = field(default_factory=dict)
+    throughput: float = 0.0  # bajty za sekundu za posledních pár sekund
+    total_bytes: int = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self.queued.values())
+
+    @property
+    def active_count(self) -> int:
+        return sum(self.active.values())
+
+    def summary(self) -> str:
+        """Krátký popis pro stavový řádek"""
+        return (
+            f"Aktivní: {self.active_count} · ve frontě: {self.queue_depth} · "
+            f"{self.throughput / 1024:.0f} KB/s"
+        )
+
+class Transfer:
+    """Přidělený slot jednoho přenosu"""
+    def __init__(self, scheduler: 'BandwidthScheduler', host: str, priority: int):
+        self.scheduler = scheduler
+        self.host = host
+        self.priority = priority
+        self.bytes = 0
+
+    def consume(self, amount: int) -> None:
+        """Započítá přenesená data a podle limitu šířky pásma přibrzdí"""
+        if amount > 0:
+            self.bytes += amount
+            self.scheduler._consume(self, amount)
+
+class BandwidthScheduler:
+    """Společné řízení všech stahování
+
+    Přenos si před začátkem vyžádá slot. Sloty se přidělují podle
+    priority (v rámci stejné priority podle pořadí příchodu) s limitem
+    souběžných přenosů celkem i na jeden host. Interaktivní přenosy mají
+    navíc `interactive_reserve` slotů jen pro sebe, takže nečekají, až
+    doběhne dávka. Přenesená data procházejí společným TokenBucket,
+    nižší priority jsou při souběhu s vyšší zpomaleny víc.
+    """
+    _shared: Optional['BandwidthScheduler'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_active: int = 4, per_host: int = 2, bandwidth: float = 0,
+                 interactive_reserve: int = 1, window: float = 5.0):
+        self._cond = threading.Condition()
+        self._order = itertools.count()
+        self._waiting: List[Tuple[int, int, str]] = []
+        self._active: Dict[int, int] = {}
+        self._hosts: Dict[str, int] = {}
+        self._samples: deque = deque()
+        self._total_bytes = 0
+        self.window = window
+        self.bucket = TokenBucket()
+        self.configure(max_active, per_host, bandwidth, interactive_reserve)
+
+    @classmethod
+    def shared(cls) -> 'BandwidthScheduler':
+        """Plánovač sdílený v procesu"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def configure(self, max_active: int = 4, per_host: int = 2, bandwidth: float = 0,
+                  interactive_reserve: int = 1) -> None:
+        """Změní limity (platí i pro čekající přenosy)"""
+        with self._cond:
+            self.max_active = max(1, max_active)
+            self.per_host = max(1, per_host)
+            self.interactive_reserve = max(0, interactive_reserve)
+            self.bucket.configure(bandwidth)
+            self._cond.notify_all()
+
+    def configure_from(self, config: Dict[str, Any]) -> None:
+        """Limity ze sekce download konfigurace (bandwidth_limit v KB/s, 0 = bez omezení)"""
+        download = config.get('download', {})
+        max_concurrent = download.get('max_concurrent', 3)
+        self.configure(
+            max_active=download.get('max_active', max_concurrent + 1),
+            per_host=download.get('per_host', max_concurrent),
+            bandwidth=download.get('bandwidth_limit', 0) * 1024
+        )
+
+    def _can_start(self, priority: int, host: str) -> bool:
+        limit = self.max_active + (self.interactive_reserve if priority == 0 else 0)
+        return sum(self._active.values()) < limit and self._hosts.get(host, 0) < self.per_host
+
+    def acquire(self, url_or_host: str, priority: str = 'batch',
+                timeout: Optional[float] = None) -> Optional[Transfer]:
+        """Počká na slot pro přenos
+
+        Returns:
+            Přenos, nebo None při vypršení `timeout`
+        """
+        host = host_of(url_or_host)
+        level = PRIORITIES[priority]
+        entry = (level, next(self._order), host)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self._cond:
+            self._waiting.append(entry)
+            try:
+                while True:
+                    # Slot dostane první čekající (podle priority), pro jehož host je místo
+                    ready = [w for w in self._waiting if self._can_start(w[0], w[2])]
+                    if ready and min(ready) == entry:
+                        break
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting.remove(entry)
+                # Jiný čekající mohl mezitím získat nárok
+                self._cond.notify_all()
+
+            self._active[level] = self._active.get(level, 0) + 1
+            self._hosts[host] = self._hosts.get(host, 0) + 1
+        return Transfer(self, host, level)
+
+    def release(self, transfer: Transfer) -> None:
+        with self._cond:
+            self._active[transfer.priority] -= 1
+            self._hosts[transfer.host] -= 1
+            if not self._hosts[transfer.host]:
+                del self._hosts[transfer.host]
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, url_or_host: str, priority: str = 'batch'):
+        """Slot pro přenos po dobu bloku with"""
+        transfer = self.acquire(url_or_host, priority)
+        try:
+            yield transfer
+        finally:
+            self.release(transfer)
+
+    def _consume(self, transfer: Transfer, amount: int) -> None:
+        with self._cond:
+            self._total_bytes += amount
+            now = time.monotonic()
+            self._samples.append((now, amount))
+            self._trim(now)
+            higher = any(count for level, count in self._active.items() if level < transfer.priority)
+        cost = PRIORITY_COST.get(transfer.priority, 1) if higher else 1
+        self.bucket.consume(amount * cost)
+
+    def _trim(self, now: float) -> None:
+        while self._samples and self._samples[0][0] < now - self.window:
+            self._samples.popleft()
+
+    def stats(self) -> SchedulerStats:
+        """Hloubka fronty, aktivní přenosy a propustnost"""
+        names = {level: name for name, level in PRIORITIES.items()}
+        with self._cond:
+            self._trim(time.monotonic())
+            queued: Dict[str, int] = {}
+            for level, _, _ in self._waiting:
+                queued[names[level]] = queued.get(names[level], 0) + 1
+            return SchedulerStats(
+                queued=queued,
+                active={names[level]: count for level, count in self._active.items() if count},
+                hosts=dict(self._hosts),
+                throughput=sum(amount for _, amount in self._samples) / self.window,
+                total_bytes=self._total_bytes
+            )
@@ -0,0 +1,184 @@
+from typing import Optional, Any, Dict, List, Callable, Union
+from pathlib import Path
+import threading
+import unicodedata
+import logging
+import time
+import re
+from .cache import Cache
+
+# Výchozí doba platnosti výsledků podle zdroje (v sekundách)
+DEFAULT_SEARCH_TTL = {
+    'youtube_api': 6 * 3600,
+    'yt_dlp': 3600
+}
+
+# Jak dlouho po vypršení TTL ještě smíme vrátit starý výsledek
+DEFAULT_STALE_TTL = 24 * 3600
+
+# Přípony, které manager přidává k dotazu a nemají vliv na klíč cache
+QUERY_SUFFIXES = (' music audio',)
+
+# Bloky kombinujících znaků (diakritika po rozkladu NFKD)
+COMBINING_MARKS = re.compile('[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]')
+WHITESPACE = re.compile(r'\s+')
+
+def canonical_query(query: str) -> str:
+    """Převede dotaz na kanonický tvar pro klíč cache
+
+    Malá písmena, bez diakritiky, bez přípony " music audio"
+    a s jednou mezerou mezi slovy.
+    """
+    query = query or ''
+    if not query.isascii():
+        query = COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', query))
+    query = WHITESPACE.sub(' ', query.lower()).strip()
+
+    for suffix in QUERY_SUFFIXES:
+        suffix = suffix.strip()
+        if query.endswith(' ' + suffix):
+            query = query[:-len(suffix) - 1].rstrip()
+
+    return query
+
+class SearchCache:
+    """Cache výsledků vyhledávání s TTL podle zdroje
+
+    Výsledky se ukládají jako seznam slovníků. Po vypršení TTL se ještě
+    po dobu `stale_ttl` vrací stará data a na pozadí se spustí obnovení.
+    """
+    def __init__(self, cache_dir: Union[str, Path],
+                 ttl: Optional[Dict[str, int]] = None,
+                 stale_ttl: int = DEFAULT_STALE_TTL):
+        self.ttl = {**DEFAULT_SEARCH_TTL, **(ttl or {})}
+        self.stale_ttl = stale_ttl
+
+        # Cache na disku drží položky po dobu nejdelšího TTL + stale okno
+        self.cache = Cache(cache_dir, max_age=max(self.ttl.values()) + stale_ttl)
+
+        # Paměťová vrstva, aby opakovaný dotaz nečetl disk
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+
+    def _make_key(self, source: str, query: str) -> str:
+        """Vytvoří klíč cache pro zdroj a dotaz"""
+        return f"search:{source}:{canonical_query(query)}"
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Načte položku z paměti nebo z disku"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                entry = self.cache.get(key)
+                if entry is not None:
+                    self._memory[key] = entry
+            return entry
+
+    def _store(self, key: str, results: List[Dict[str, Any]], max_results: int) -> None:
+        """Uloží výsledky do paměti i na disk"""
+        entry = {
+            'fetched_at': time.time(),
+            'max_results': max_results,
+            'results': results
+        }
+        with self._lock:
+            self._memory[key] = entry
+            try:
+                self.cache.set(key, entry)
+            except Exception as e:
+                logging.error(f"Chyba při ukládání výsledků vyhledávání: {e}")
+
+    def get(self, query: str, max_results: int, source: str) -> Optional[List[Dict[str, Any]]]:
+        """Vrátí čerstvé výsledky z cache nebo None"""
+        entry = self._load(self._make_key(source, query))
+        if not entry or entry.get('max_results', 0) < max_results:
+            return None
+
+        age = time.time() - entry.get('fetched_at', 0)
+        if age > self.ttl.get(source, 0):
+            return None
+
+        return entry['results'][:max_results]
+
+    def peek(self, query: str, max_results: int, source: str,
+             refresh: Optional[Callable[[], List[Dict[str, Any]]]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Vrátí čerstvé nebo ještě použitelné staré výsledky, jinak None
+
+        Pokud jsou výsledky staré a je zadána funkce `refresh`,
+        obnoví se na pozadí.
+        """
+        key = self._make_key(source, query)
+        entry = self._load(key)
+
+        # Záznam s menším počtem výsledků nestačí
+        if not entry or entry.get('max_results', 0) < max_results:
+            return None
+
+        age = time.time() - entry.get('fetched_at', 0)
+        ttl = self.ttl.get(source, 0)
+
+        if age <= ttl:
+            return entry['results'][:max_results]
+
+        if age <= ttl + self.stale_ttl:
+            # Vrátíme stará data a obnovíme je na pozadí
+            if refresh:
+                self._refresh_in_background(key, max_results, refresh)
+            return entry['results'][:max_results]
+
+        return None
+
+    def put(self, query: str, max_results: int, source: str, results: List[Dict[str, Any]]) -> None:
+        """Uloží výsledky vyhledávání"""
+        self._store(self._make_key(source, query), results, max_results)
+
+    def get_or_fetch(self, query: str, max_results: int, source: str,
+                     fetch: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Vrátí výsledky z cache, případně je získá funkcí `fetch`
+
+        Args:
+            query: Vyhledávací dotaz
+            max_results: Požadovaný počet výsledků
+            source: Zdroj výsledků (youtube_api, yt_dlp)
+            fetch: Funkce, která provede skutečné vyhledávání
+
+        Returns:
+            Seznam výsledků jako slovníky
+        """
+        cached = self.peek(query, max_results, source, refresh=fetch)
+        if cached is not None:
+            return cached
+
+        results = fetch()
+        if results:
+            self.put(query, max_results, source, results)
+        return results
+
+    def _refresh_in_background(self, key: str, max_results: int,
+                               fetch: Callable[[], List[Dict[str, Any]]]) -> None:
+        """Spustí obnovení položky v samostatném vlákně"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                results = fetch()
+                if results:
+                    self._store(key, results, max_results)
+            except Exception as e:
+                logging.warning(f"Obnovení cache vyhledávání selhalo: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def invalidate(self, query: str, source: str) -> None:
+        """Odstraní dotaz z cache"""
+        key = self._make_key(source, query)
+        with self._lock:
+            self._memory.pop(key, None)
+            self.cache.invalidate(key)
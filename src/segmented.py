@@ -0,0 +1,436 @@
+from typing import List, Optional, Callable, Tuple
+from dataclasses import dataclass, field
+from pathlib import Path
+import threading
+import hashlib
+import logging
+import json
+import time
+import os
+import re
+from .exceptions import DownloadError, NetworkError
+from .retry import RetryStrategy, NETWORK_RETRY
+from .scheduler import BandwidthScheduler, Transfer
+from .disk_space import DiskSpaceManager
+
+# Velikost bloku pro čtení odpovědi a pro ověření souboru
+BLOCK_SIZE = 64 * 1024
+VERIFY_BLOCK_SIZE = 1024 * 1024
+
+Range = Tuple[int, int]  # [začátek, konec) v bajtech
+
+def adapt_chunk(rate: float, target_seconds: float, min_chunk: int, max_chunk: int) -> int:
+    """Velikost dalšího úseku tak, aby se stáhl zhruba za `target_seconds`
+
+    Zaokrouhluje se na BLOCK_SIZE. Pomalé spojení dostává malé úseky (při
+    chybě přijde o málo a na konci souboru nezdržuje ostatní), rychlé
+    velké (méně požadavků).
+    """
+    size = int(rate * target_seconds) // BLOCK_SIZE * BLOCK_SIZE
+    return max(min_chunk, min(max_chunk, size))
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    """Seřadí úseky a spojí ty, které se dotýkají nebo překrývají"""
+    merged: List[List[int]] = []
+    for start, end in sorted(r for r in ranges if r[1] > r[0]):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def missing_ranges(done: List[Range], size: int) -> List[Range]:
+    """Úseky souboru, které ještě nejsou stažené"""
+    gaps, position = [], 0
+    for start, end in merge_ranges(done):
+        if start > position:
+            gaps.append((position, start))
+        position = max(position, end)
+    if position < size:
+        gaps.append((position, size))
+    return gaps
+
+@dataclass
+class RemoteFile:
+    """Co server prozradil o souboru v odpovědi na úvodní dotaz"""
+    url: str
+    size: int = 0
+    ranges: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    filename: Optional[str] = None
+
+@dataclass
+class SegmentedResult:
+    """Výsledek segmentovaného stažení"""
+    path: Path
+    size: int
+    digest: str
+    resumed: int = 0       # bajty převzaté z přerušeného stažení
+    connections: int = 1   # kolik spojení se skutečně použilo
+    elapsed: float = 0.0
+
+@dataclass
+class _Job:
+    """Sdílený stav jednoho stahování mezi spojeními"""
+    remote: RemoteFile
+    part_path: Path
+    state_path: Path
+    done: List[Range] = field(default_factory=list)
+    pending: List[Range] = field(default_factory=list)
+    completed: int = 0
+    error: Optional[BaseException] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    abort: threading.Event = field(default_factory=threading.Event)
+
+    def take(self, size: int) -> Optional[Range]:
+        """Přidělí spojení další úsek (nejvýš `size` bajtů)"""
+        with self.lock:
+            if not self.pending or self.abort.is_set():
+                return None
+            start, end = self.pending[0]
+            piece = (start, min(end, start + size))
+            if piece[1] == end:
+                self.pending.pop(0)
+            else:
+                self.pending[0] = (piece[1], end)
+            return piece
+
+    def finish(self, piece: Range, written: int) -> None:
+        """Zapíše staženou část úseku, nestažený zbytek vrátí do fronty"""
+        start, end = piece
+        with self.lock:
+            if written:
+                self.done = merge_ranges(self.done + [(start, start + written)])
+            if start + written < end:
+                self.pending = merge_ranges(self.pending + [(start + written, end)])
+            self.save()
+
+    def save(self) -> None:
+        """Atomicky uloží stav pro obnovení (volá se pod zámkem)"""
+        state = {
+            'url': self.remote.url,
+            'size': self.remote.size,
+            'etag': self.remote.etag,
+            'last_modified': self.remote.last_modified,
+            'done': [list(r) for r in self.done]
+        }
+        temp_path = self.state_path.with_name(f".{self.state_path.name}.tmp")
+        temp_path.write_text(json.dumps(state), encoding='utf-8')
+        temp_path.replace(self.state_path)
+
+class SegmentedDownloader:
+    """Stahování velkých souborů po úsecích přes více spojení (HTTP Range)
+
+    Soubor se stahuje do `<název>.part`, který se předem alokuje na plnou
+    velikost - každé spojení zapisuje svůj úsek rovnou na jeho místo.
+    Velikost úseků se přizpůsobuje rychlosti spojení (adapt_chunk).
+    Stažené úseky se průběžně ukládají do `<název>.part.json`, takže
+    přerušené stažení pokračuje jen chybějícími částmi (pokud se soubor
+    na serveru mezitím nezměnil - kontroluje se velikost, ETag
+    a Last-Modified). Nakonec se soubor jedním průchodem ověří
+    (kontrolní součet) a přejmenuje na cílový název.
+
+    Každé spojení si bere vlastní slot v plánovači, takže se dodrží
+    limit spojení na host i společný limit šířky pásma. Server bez
+    podpory Range se stáhne jedním spojením od začátku.
+    """
+    def __init__(self, session=None, connections: int = 4,
+                 min_chunk: int = 1024 * 1024, max_chunk: int = 32 * 1024 * 1024,
+                 target_seconds: float = 4.0, strategy: RetryStrategy = NETWORK_RETRY,
+                 scheduler: Optional[BandwidthScheduler] = None,
+                 space: Optional[DiskSpaceManager] = None, timeout: float = 30.0):
+        if session is None:
+            import requests
+            session = requests.Session()
+        self.session = session
+        self.connections = max(1, connections)
+        self.min_chunk = max(BLOCK_SIZE, min_chunk)
+        self.max_chunk = max(self.min_chunk, max_chunk)
+        self.target_seconds = target_seconds
+        self.strategy = strategy
+        self.scheduler = scheduler or BandwidthScheduler.shared()
+        self.space = space or DiskSpaceManager.shared()
+        self.timeout = timeout
+
+    @staticmethod
+    def part_paths(path: Path) -> Tuple[Path, Path]:
+        """Rozpracovaný soubor a soubor se stavem pro obnovení"""
+        return path.with_name(f"{path.name}.part"), path.with_name(f"{path.name}.part.json")
+
+    def probe(self, url: str) -> RemoteFile:
+        """Zjistí velikost, podporu Range a validátory souboru (dotaz na první bajt)"""
+        response = self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            headers = response.headers
+            remote = RemoteFile(
+                url=url,
+                etag=headers.get('ETag'),
+                last_modified=headers.get('Last-Modified'),
+                filename=self._filename(headers.get('Content-Disposition'))
+            )
+            total = re.search(r'/(\d+)\s*$', headers.get('Content-Range', ''))
+            if response.status_code == 206 and total:
+                remote.size = int(total.group(1))
+                remote.ranges = True
+            else:
+                remote.size = int(headers.get('Content-Length') or 0)
+            return remote
+        finally:
+            response.close()
+
+    @staticmethod
+    def _filename(content_disposition: Optional[str]) -> Optional[str]:
+        if not content_disposition or 'filename=' not in content_disposition:
+            return None
+        name = content_disposition.split('filename=')[1].split(';')[0].strip().strip('"')
+        return os.path.basename(name) or None
+
+    def download(self, url: str, path: Path, priority: str = 'interactive',
+                 checksum: Optional[Tuple[str, str]] = None,
+                 progress: Optional[Callable[[int, int], None]] = None,
+                 remote: Optional[RemoteFile] = None) -> SegmentedResult:
+        """Stáhne soubor, případně dokončí přerušené stažení
+
+        Args:
+            url: Adresa souboru
+            path: Cílový soubor
+            priority: Třída priority v plánovači
+            checksum: Očekávaný součet (algoritmus, hex), např. ('sha256', '...')
+            progress: Volá se s (staženo, celkem) po každém bloku
+            remote: Výsledek probe(), pokud už ho volající má
+
+        Raises:
+            DownloadError: Pokud stažení selže (stav zůstane pro obnovení)
+                nebo nesedí kontrolní součet (rozpracovaný soubor se smaže)
+        """
+        started = time.monotonic()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part_path, state_path = self.part_paths(path)
+        try:
+            remote = remote or self.probe(url)
+        except Exception as e:
+            raise DownloadError(f"Nelze zjistit informace o souboru {path.name}: {e}") from e
+        remote.url = url
+
+        job = _Job(remote, part_path, state_path)
+        if remote.ranges and remote.size:
+            job.done = self._load_state(job)
+        job.pending = missing_ranges(job.done, remote.size)
+        job.completed = resumed = sum(end - start for start, end in job.done)
+        if resumed:
+            logging.info(f"Pokračuji ve stahování {path.name} od {resumed}/{remote.size} B")
+
+        with self.space.reserve(remote.size - resumed, path.parent, path.name) as reservation:
+            if self._preallocate(part_path, remote.size):
+                reservation.account(remote.size)  # Místo je už zabrané alokací
+            if remote.ranges and remote.size:
+                connections = self._run_segmented(job, priority, progress)
+            else:
+                connections = self._run_single(job, priority, progress)
+
+        if job.error is not None:
+            raise DownloadError(f"Stahování {path.name} přerušeno: {job.error}") from job.error
+
+        digest = self.verify(job, checksum)
+        part_path.replace(path)
+        state_path.unlink(missing_ok=True)
+        return SegmentedResult(path, remote.size or job.completed, digest, resumed,
+                               connections, time.monotonic() - started)
+
+    def _load_state(self, job: _Job) -> List[Range]:
+        """Stažené úseky z přerušeného stažení, pokud se soubor nezměnil"""
+        if not job.state_path.exists() or not job.part_path.exists():
+            return []
+        try:
+            state = json.loads(job.state_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Poškozený stav stahování {job.state_path.name}: {e}")
+            return []
+        remote = job.remote
+        if (state.get('size') != remote.size
+                or state.get('etag') != remote.etag
+                or state.get('last_modified') != remote.last_modified):
+            logging.info(f"Soubor {job.part_path.stem} se na serveru změnil, stahuji znovu")
+            return []
+        return merge_ranges([tuple(r) for r in state.get('done', [])])
+
+    @staticmethod
+    def _preallocate(part_path: Path, size: int) -> bool:
+        """Vytvoří rozpracovaný soubor v plné velikosti (zachová stažená data)
+
+        Returns:
+            True, pokud je místo na disku skutečně alokované
+        """
+        mode = 'r+b' if part_path.exists() else 'w+b'
+        with open(part_path, mode) as f:
+            f.truncate(size)
+            if size and hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, size)
+                    return True
+                except OSError:
+                    pass  # Souborový systém to nepodporuje, zůstane řídký soubor
+        return False
+
+    def _run_segmented(self, job: _Job, priority: str,
+                       progress: Optional[Callable[[int, int], None]]) -> int:
+        """Spustí spojení - první čeká na slot, další jen když je volný hned"""
+        missing = sum(end - start for start, end in job.pending)
+        wanted = min(self.connections, max(1, -(-missing // self.min_chunk)))
+        transfers = [self.scheduler.acquire(job.remote.url, priority)]
+        while len(transfers) < wanted:
+            transfer = self.scheduler.acquire(job.remote.url, priority, timeout=0)
+            if transfer is None:
+                break
+            transfers.append(transfer)
+
+        threads = [
+            threading.Thread(target=self._worker, args=(job, transfer, progress),
+                             name=f"segment-{i}", daemon=True)
+            for i, transfer in enumerate(transfers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with job.lock:
+            job.save()
+        if job.error is None and job.pending:
+            job.error = NetworkError("Některé úseky se nepodařilo stáhnout")
+        return len(transfers)
+
+    def _worker(self, job: _Job, transfer: Transfer,
+                progress: Optional[Callable[[int, int], None]]) -> None:
+        chunk = self.min_chunk
+        attempt = 0
+        try:
+            with open(job.part_path, 'r+b') as f:
+                while True:
+                    piece = job.take(chunk)
+                    if piece is None:
+                        return
+                    written = 0
+                    started = time.monotonic()
+                    try:
+                        f.seek(piece[0])
+                        for block in self._fetch(job, piece, transfer):
+                            f.write(block)
+                            written += len(block)
+                            self._advance(job, len(block), progress)
+                        f.flush()
+                        if piece[0] + written < piece[1]:
+                            raise NetworkError(f"Spojení ukončeno po {written} B z úseku {piece}")
+                    except Exception as e:
+                        f.flush()
+                        job.finish(piece, written)
+                        if job.abort.is_set():
+                            return
+                        attempt += 1
+                        if attempt >= self.strategy.max_attempts or not self.strategy.should_retry(e):
+                            self._fail(job, e)
+                            return
+                        delay = self.strategy.get_delay(attempt, e)
+                        logging.warning(f"Úsek {piece} selhal ({e}), další pokus za {delay:.1f}s")
+                        chunk = self.min_chunk
+                        if job.abort.wait(delay):
+                            return
+                        continue
+                    job.finish(piece, written)
+                    attempt = 0
+                    rate = written / max(time.monotonic() - started, 1e-3)
+                    chunk = adapt_chunk(rate, self.target_seconds, self.min_chunk, self.max_chunk)
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            self.scheduler.release(transfer)
+
+    def _fetch(self, job: _Job, piece: Range, transfer: Transfer):
+        """Bloky dat jednoho úseku"""
+        start, end = piece
+        headers = {'Range': f"bytes={start}-{end - 1}"}
+        # Změněný soubor vrátí celý obsah (200) místo úseku; slabý ETag If-Range nepovoluje
+        etag = job.remote.etag
+        validator = etag if etag and not etag.startswith('W/') else job.remote.last_modified
+        if validator:
+            headers['If-Range'] = validator
+        with self.session.get(job.remote.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise DownloadError(f"Server nevrátil požadovaný úsek (HTTP {response.status_code}), soubor se změnil")
+            remaining = end - start
+            for block in response.iter_content(chunk_size=BLOCK_SIZE):
+                if job.abort.is_set():
+                    return
+                block = block[:remaining]
+                remaining -= len(block)
+                transfer.consume(len(block))
+                yield block
+                if not remaining:
+                    return
+
+    def _run_single(self, job: _Job, priority: str,
+                    progress: Optional[Callable[[int, int], None]]) -> int:
+        """Server bez podpory Range - jedno spojení od začátku, bez obnovení"""
+        job.completed = 0
+        with self.scheduler.slot(job.remote.url, priority) as transfer:
+            try:
+                with self.session.get(job.remote.url, stream=True, timeout=self.timeout) as response, \
+                        open(job.part_path, 'r+b') as f:
+                    response.raise_for_status()
+                    for block in response.iter_content(chunk_size=BLOCK_SIZE):
+                        if block:
+                            f.write(block)
+                            transfer.consume(len(block))
+                            self._advance(job, len(block), progress)
+                    f.truncate()
+                if job.remote.size and job.completed != job.remote.size:
+                    raise NetworkError(f"Staženo {job.completed} B z {job.remote.size} B")
+            except Exception as e:
+                job.error = e
+        return 1
+
+    @staticmethod
+    def _advance(job: _Job, amount: int, progress: Optional[Callable[[int, int], None]]) -> None:
+        with job.lock:
+            job.completed += amount
+            completed = job.completed
+        if progress:
+            progress(completed, job.remote.size)
+
+    @staticmethod
+    def _fail(job: _Job, error: BaseException) -> None:
+        """První chyba ukončí i ostatní spojení"""
+        with job.lock:
+            if job.error is None:
+                job.error = error
+        job.abort.set()
+
+    def verify(self, job: _Job, checksum: Optional[Tuple[str, str]] = None) -> str:
+        """Ověří velikost a spočítá součet jedním průchodem souborem
+
+        Returns:
+            Hex součet (algoritmus z `checksum`, jinak sha256)
+
+        Raises:
+            DownloadError: Pokud nesedí velikost nebo součet
+        """
+        algorithm, expected = checksum or ('sha256', None)
+        size = job.part_path.stat().st_size
+        if job.remote.size and size != job.remote.size:
+            raise DownloadError(f"Velikost {job.part_path.name} nesedí: {size} B místo {job.remote.size} B")
+
+        digest = hashlib.new(algorithm)
+        with open(job.part_path, 'rb') as f:
+            while block := f.read(VERIFY_BLOCK_SIZE):
+                digest.update(block)
+        result = digest.hexdigest()
+
+        if expected and result.lower() != expected.lower():
+            # Chybná data by obnovení jen zopakovalo - začne se znovu
+            job.part_path.unlink(missing_ok=True)
+            job.state_path.unlink(missing_ok=True)
+            raise DownloadError(f"Kontrolní součet {job.part_path.name} nesedí ({algorithm})")
+        return result
@@ -4,11 +4,14 @@ from tkinter import filedialog
 from rich.console import Console
 from rich.panel import Panel
 from typing import Dict, Any
-from rich.prompt import Prompt, Confirm
+from rich.prompt import Prompt, Confirm, FloatPrompt
 import json
 from datetime import datetime
 from ..themes.theme_manager import ThemeManager
 from rich.status import Status
+from ..loudness import LoudnessNormalizer, ffmpeg_binary
+from ..normalize_job import NormalizeJob
+from rich.progress import Progress, TextColumn, BarColumn, MofNCompleteColumn
 
 class SettingsManager:
     def __init__(self, console: Console, config: Dict[str, Any]):
@@ -141,47 +144,112 @@ class SettingsManager:
         self.console.print("[green]Nastavení uloženo[/green]")
 
     def _configure_normalization(self):
-        """Nastavení normalizace hlasitosti pomocí MP3Gain"""
+        """Nastavení normalizace hlasitosti (tagy ReplayGain/R128)"""
         self.console.print("\n[cyan]Nastavení normalizace hlasitosti:[/cyan]")
+        normalization = self.config.get('audio', {}).get('normalization', {})
         
         # Zapnutí/vypnutí
         enabled = Confirm.ask(
             "Povolit normalizaci?",
-            default=self.config.get('audio', {}).get('normalization', {}).get('enabled', True)
+            default=normalization.get('enabled', True)
         )
         
+        if 'audio' not in self.config:
+            self.config['audio'] = {}
+        
         if enabled:
-            # Typ normalizace
+            # Seskupení pro album gain (track = jen skladby, album = podle tagu alba, folder = podle složky)
             norm_type = Prompt.ask(
                 "Typ normalizace",
                 choices=["track", "album", "folder"],
-                default=self.config.get('audio', {}).get('normalization', {}).get('type', 'track')
+                default=normalization.get('type', 'track')
             )
             
-            # Target gain (89 dB je standard pro MP3Gain)
-            target_gain = "89.0"  # MP3Gain standard
+            # Cílová hlasitost v LUFS (EBU R128 doporučuje -23, streamovací služby -14 až -16)
+            previous_level = normalization.get('target_level', -16.0)
+            target_level = FloatPrompt.ask(
+                "Cílová hlasitost (LUFS)",
+                default=float(previous_level)
+            )
             
-            if 'audio' not in self.config:
-                self.config['audio'] = {}
-            if 'normalization' not in self.config['audio']:
-                self.config['audio']['normalization'] = {}
-                
-            self.config['audio']['normalization'].update({
+            self.config['audio']['normalization'] = {
+                **normalization,
                 'enabled': enabled,
                 'type': norm_type,
-                'target_gain': float(target_gain)
-            })
+                'target_level': target_level
+            }
+            self.config['audio']['normalization'].pop('target_gain', None)
+            self.save_config()
+            
+            # Změna cílové úrovně je jen přepis tagů, nic se znovu nepřevádí
+            if target_level != previous_level and Confirm.ask("Přepsat tagy hlasitosti v knihovně?", default=True):
+                self._retag_loudness()
+            
+            # Rozsah normalizace je nezávislý na typu (seskupení zisku alb)
+            scope = Prompt.ask(
+                "Normalizovat nyní (none = ne, folder = vybraná složka, library = celá knihovna)",
+                choices=["none", "folder", "library"],
+                default="none"
+            )
+            if scope == 'folder':
+                root = tk.Tk()
+                root.withdraw()
+                folder = filedialog.askdirectory(title="Vyberte složku k normalizaci")
+                root.destroy()
+                if folder:
+                    self._normalize_folder(Path(folder))
+            elif scope == 'library':
+                music_dir = self.config.get('paths', {}).get('music_dir', '~/Music/YouTube')
+                self._normalize_folder(Path(music_dir).expanduser())
         else:
-            self.config['audio']['normalization'] = {'enabled': False}
+            self.config['audio']['normalization'] = {**normalization, 'enabled': False}
+            self.save_config()
             
-        self.save_config()
         self.console.print("[green]Nastavení uloženo[/green]")
 
+    def _retag_loudness(self):
+        """Přepíše tagy ReplayGain/R128 podle uložených měření"""
+        try:
+            normalizer = LoudnessNormalizer.from_config(self.config, ffmpeg=ffmpeg_binary(self.config))
+            with Status("[yellow]Přepisuji tagy hlasitosti...[/yellow]", spinner="dots"):
+                count = normalizer.retag()
+            normalizer.store.close()
+            self.console.print(f"[green]Přepsáno souborů: {count}[/green]")
+        except Exception as e:
+            self.console.print(f"[red]Chyba při přepisu tagů: {e}[/red]")
+
     def _normalize_folder(self, folder_path: Path):
-        """Normalizace celé složky"""
-        # TODO: Implementovat normalizaci celé složky pomocí MP3Gain
-        # Použít mp3gain.exe -r -k -c na všechny soubory ve složce
-        pass
+        """Normalizace celé složky (měření v poolu procesů, pak zápis tagů)"""
+        normalizer = None
+        try:
+            mode = self.config.get('audio', {}).get('normalization', {}).get('type', 'track')
+            normalizer = LoudnessNormalizer.from_config(self.config, ffmpeg=ffmpeg_binary(self.config))
+            job = NormalizeJob(normalizer, mode=mode)
+            
+            with Progress(
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                MofNCompleteColumn(),
+                console=self.console
+            ) as progress:
+                task = progress.add_task(f"[cyan]Normalizuji {folder_path.name}", total=None)
+                report = job.run(
+                    folder_path,
+                    progress_callback=lambda done, total: progress.update(task, completed=done, total=total)
+                )
+            
+            self.console.print(
+                f"[green]Hotovo: {report.total} souborů "
+                f"(změřeno {report.measured}, beze změny {report.skipped}, otagováno {report.tagged}) "
+                f"za {report.elapsed:.1f} s - {report.files_per_second:.1f} souborů/s[/green]"
+            )
+            if report.failed:
+                self.console.print(f"[yellow]Chyby: {report.failed} (podrobnosti v logu)[/yellow]")
+        except Exception as e:
+            self.console.print(f"[red]Chyba při normalizaci složky: {e}[/red]")
+        finally:
+            if normalizer:
+                normalizer.store.close()
 
     def _configure_conversion(self):
         """Nastavení konverze formátů"""
@@ -441,6 +509,7 @@ class SettingsManager:
                 "bitrate_type": "vbr",
                 "normalization": {
                     "enabled": True,
+                    "type": "track",
                     "target_level": -16,
                     "true_peak": -1
                 }
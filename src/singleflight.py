@@ -0,0 +1,61 @@
+from typing import Dict, Callable, Hashable, TypeVar, Generic, Optional
+import threading
+
+T = TypeVar('T')
+
+class _Call(Generic[T]):
+    """Probíhající volání, na které čekají další vlákna"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight(Generic[T]):
+    """Slučování souběžných požadavků se stejným klíčem
+
+    Pokud se na stejný klíč ptá více vláken současně, skutečné volání
+    provede jen první z nich a ostatní počkají na jeho výsledek
+    (nebo výjimku). Výsledky se nepamatují - po dokončení volání
+    spustí další požadavek nové volání.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call[T]] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Zavolá `fn`, nebo počká na již probíhající volání se stejným klíčem
+
+        Args:
+            key: Klíč požadavku (např. dotaz nebo ID videa)
+            fn: Funkce, která provede skutečný požadavek
+
+        Returns:
+            Výsledek sdílený všemi souběžnými volajícími
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Zjistí, zda pro klíč právě probíhá volání"""
+        with self._lock:
+            return key in self._calls
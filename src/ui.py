@@ -8,6 +8,9 @@ from rich.layout import Layout
 from rich import box
 from typing import List, Set, Dict, Any, Optional, Union, Callable, TypeVar, Generic
 from pathlib import Path
+import sys
+# Moduly balíčku src se načítají jako src.<modul> i při spuštění ze složky src
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 from manager import YTBAIManager, SearchResult
 from utils import download_and_process_thumbnail, cleanup_thumbnail_cache, get_image_preview
 import os
@@ -16,7 +19,7 @@ from rich.status import Status
 import json
 from config import load_config
 from themes import ThemeManager
-from exceptions import ConfigError, APIError
+from src.exceptions import ConfigError, APIError
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
 from icons import Icons
 from icon_sets import IconSets
@@ -33,6 +36,8 @@ import time
 import re
 import yt_dlp
 from webshare import WebshareDownloader
+from src.dedup import group_duplicates
+from src.genre_catalog import GenreCatalog
 from themes.default_themes import DefaultThemes
 from themes.icon_themes import IconThemes
 from themes.icons import Icons
@@ -70,12 +75,31 @@ class UI:
         self.ui_core = UICore(console, self.config)
         self.error_handler = ErrorHandler(console)
         
+        # Počet skrytých duplicit podle video_id hlavní nahrávky
+        self._duplicate_counts: Dict[str, int] = {}
+        
     def start(self):
         """Hlavní smyčka"""
+        self._offer_resume()
         while True:
             choice = self.ui_core.show_main_menu()
             # Zpracování volby pomocí jednotlivých modulů
 
+    def _offer_resume(self) -> None:
+        """Nabídne dokončení stahování přerušených při minulém běhu"""
+        queue = getattr(self.manager, 'download_queue', None)
+        if queue is None:
+            return
+        try:
+            jobs = queue.unfinished()
+            if not jobs:
+                return
+            self.console.print(f"[yellow]Nalezeno nedokončených stahování: {len(jobs)}[/yellow]")
+            if Prompt.ask(f"Obnovit nedokončená stahování ({len(jobs)})? [y/n]", choices=['y', 'n']) == 'y':
+                self.manager.resume_downloads()
+        except Exception as e:
+            logging.error(f"Chyba při obnově stahování: {e}")
+
     def _load_config(self) -> Dict[str, Any]:
         try:
             if self.config_file.exists():
@@ -122,6 +146,10 @@ class UI:
 
     def display_results(self, results: List[SearchResult], downloaded_ids: Set[str], selected_indices: Set[int]) -> None:
         """Zobrazí výsledky vyhledávání"""
+        self.console.print(self._build_results_table(results, downloaded_ids, selected_indices))
+
+    def _build_results_table(self, results: List[SearchResult], downloaded_ids: Set[str], selected_indices: Set[int]) -> Table:
+        """Sestaví tabulku výsledků vyhledávání"""
         table = Table(show_header=True)
         table.add_column("č.", justify="right", style="cyan", width=4)
         table.add_column("Název", style="white", ratio=2)
@@ -133,6 +161,9 @@ class UI:
         for i, result in enumerate(results, 1):
             # Ošetření dlouhých názvů
             title = result.title[:70] + "..." if len(result.title) > 70 else result.title
+            hidden = self._duplicate_counts.get(result.video_id)
+            if hidden:
+                title += f" [dim](+{hidden})[/dim]"
             artist = result.artist[:30] + "..." if len(result.artist) > 30 else result.artist
             
             # Získání velikosti souboru
@@ -154,11 +185,32 @@ class UI:
                 status
             )
 
-        self.console.print(table)
+        return table
+
+    def _collapse_duplicates(self, results: List[SearchResult]) -> List[SearchResult]:
+        """Sloučí více nahrávek téže skladby do jednoho řádku"""
+        groups = group_duplicates(results)
+        self._duplicate_counts = {
+            group.primary.video_id: len(group.duplicates)
+            for group in groups if group.duplicates
+        }
+        return [group.primary for group in groups]
+
+    def _stream_search(self, query: str, downloaded_ids: Set[str]) -> List[SearchResult]:
+        """Vyhledá skladby a zobrazuje výsledky průběžně, jak přicházejí"""
+        results: List[SearchResult] = []
+        self._duplicate_counts = {}
+        with Live(self._build_results_table(results, downloaded_ids, set()),
+                  console=self.console, refresh_per_second=8) as live:
+            for result in self.manager.iter_search(query):
+                results.append(result)
+                downloaded_ids.update(self.manager.downloaded_ids([result]))
+                live.update(self._build_results_table(results, downloaded_ids, set()))
+        return results
 
     def discovery_loop(self, initial_results: List[SearchResult]) -> None:
         """Smyčka pro objevování hudby"""
-        current_results = initial_results
+        current_results = self._collapse_duplicates(initial_results)
         downloaded_ids: Set[str] = set()
         selected_indices: Set[int] = set()  # Pro ukládání vybraných skladeb
 
@@ -168,12 +220,15 @@ class UI:
 
         while True:
             self.console.clear()
+            # Stažené skladby na celé stránce zjistíme jedním dotazem
+            downloaded_ids.update(self.manager.downloaded_ids(current_results))
             self.display_results(current_results, downloaded_ids, selected_indices)  # Přidáme selected_indices
             
             options = [
                 "[cyan]1-{0}[/cyan] Vybrat/zrušit výběr skladby".format(len(current_results)),
                 "[green]S[/green] Stáhnout vybrané skladby",
                 "[yellow]N[/yellow] Nové vyhledávání",
+                "[yellow]L[/yellow] Hledat ve stažené hudbě",
                 "[yellow]P[/yellow] Podobné skladby",
                 "[yellow]V[/yellow] Vybrat vše",
                 "[yellow]O[/yellow] Odznačit vše",
@@ -187,10 +242,20 @@ class UI:
                 break
             elif choice == "N":
                 query = Prompt.ask("Zadejte nový vyhledávací dotaz")
-                current_results = self.manager.search_music(query)
+                self.console.clear()
+                current_results = self._collapse_duplicates(self._stream_search(query, downloaded_ids))
+                selected_indices.clear()
+            elif choice == "L":
+                query = Prompt.ask("Zadejte dotaz pro hledání v knihovně")
+                library_results = self.manager.search_library(query)
+                if not library_results:
+                    self.console.print("[yellow]Ve stažené hudbě nic nenalezeno[/yellow]")
+                    continue
+                current_results = library_results
+                downloaded_ids.update(track.video_id for track in library_results)
                 selected_indices.clear()
             elif choice == "P":
-                current_results = self.manager.get_recommendations(current_results)
+                current_results = self._collapse_duplicates(self.manager.get_recommendations(current_results))
                 selected_indices.clear()
             elif choice == "S":
                 if not selected_indices:
@@ -198,9 +263,8 @@ class UI:
                     continue
                     
                 # Stažení vybraných skladeb
-                selected_tracks = [current_results[i] for i in selected_indices]
-                with Status(f"[yellow]Stahuji {len(selected_tracks)} skladeb...[/yellow]", spinner="dots"):
-                    self.manager.process_download(selected_tracks)
+                selected_tracks = [current_results[i] for i in sorted(selected_indices)]
+                self.manager.process_download(selected_tracks)
                 downloaded_ids.update(track.video_id for track in selected_tracks)
                 selected_indices.clear()
                 self.console.print(f"[green]Úspěšně staženo {len(selected_tracks)} skladeb[/green]")
@@ -1627,7 +1691,8 @@ Pro použití Ollama:
                     self.console.print("[yellow]Nejsou vybrány žádné položky[/yellow]")
                     continue
                 
-                # Kopírování vybraných položek
+                # Kopírování vybraných položek (dvojice zdroj, cíl kvůli obalům složek)
+                copied = []
                 with Progress() as progress:
                     task = progress.add_task("[cyan]Kopíruji...", total=len(selected_indices))
                     
@@ -1640,6 +1705,7 @@ Pro použití Ollama:
                             dest_path.parent.mkdir(parents=True, exist_ok=True)
                             try:
                                 shutil.copy2(source_path, dest_path)
+                                copied.append((source_path, dest_path))
                             except Exception as e:
                                 self.console.print(f"[error]Chyba při kopírování {rel_path}: {e}[/error]")
                         
@@ -1657,11 +1723,14 @@ Pro použití Ollama:
                                             if song_path.exists():
                                                 dest_path = playlist_folder / song_path.name
                                                 shutil.copy2(song_path, dest_path)
+                                                copied.append((song_path, dest_path))
                             except Exception as e:
                                 self.console.print(f"[error]Chyba při kopírování playlistu {rel_path}: {e}[/error]")
                         
                         progress.update(task, advance=1)
                 
+                # Obaly alb ze sdílené cache do cílových složek
+                self.manager.export_covers(copied)
                 self.console.print("[success]Kopírování dokončeno[/success]")
                 break
             
@@ -1959,7 +2028,7 @@ Pro použití Ollama:
                             if results:
                                 # Zobrazíme výsledky vyhledávání
                                 self.console.print("\n[yellow]Nalezené skladby:[/yellow]")
-                                downloaded_ids = set()
+                                downloaded_ids = self.manager.downloaded_ids(results)
                                 selected_indices = {0}  # Předvybereme první výsledek
                                 
                                 self.display_results(results, downloaded_ids, selected_indices)
@@ -2358,34 +2427,20 @@ Uživatel: {user_input}
 
     def _get_genre_recommendation(self, message: str) -> Optional[dict]:
         """Zská doporučení skladby podle kontextu zprávy"""
-        genre_file = self.manager.project_root / "data" / "genre_list.json"
-        if not genre_file.exists():
-            return None
-            
-        with open(genre_file, 'r', encoding='utf-8') as f:
-            genres = json.load(f)
-            
-        # Zkusíme najít zmínku o žánru v odpovědi
-        mentioned_genres = []
-        for genre in genres.keys():
-            if genre.lower() in message.lower():
-                mentioned_genres.append(genre)
+        # Sdílený katalog se znovu načte jen po změně souboru
+        catalog = GenreCatalog.shared(self.manager.project_root / "data" / "genre_list.json")
         
-        if not mentioned_genres:
-            # Pokud není zmíněn žádný žánr, vybereme náhodný
-            if genres:
-                mentioned_genres = [random.choice(list(genres.keys()))]  # Odstraněn nadbytečný komentář
-            else:
-                return None
+        # Zkusíme najít zmínku o žánru v odpovědi, jinak vybereme náhodný
+        mentioned_genres = catalog.genres_in_text(message)
+        track = catalog.random_track(mentioned_genres[0] if mentioned_genres else None)
+        if not track:
+            return None
         
-        # Vybereme náhodnou skladbu z prvního nalezeného žánru
-        genre = mentioned_genres[0]
-        if genres[genre]:
-            return {
-                'song': random.choice(genres[genre]),
-                'genre': genre
-            }
-        return None
+        genre, song = track
+        return {
+            'song': song,
+            'genre': genre
+        }
 
     def display_image(self, path: Path) -> None:
         """Zobrazí obrázek v terminálu (pouze pro Kitty)"""
@@ -2434,36 +2489,31 @@ Uživatel: {user_input}
     def _download_song(self, song_info: Dict[str, str]) -> None:
         """Stáhne skladbu s progress barem"""
         try:
-            with Progress() as progress:
-                task = progress.add_task(
-                    f"[yellow]Stahuji: {song_info['title']} - {song_info['artist']}",
-                    total=100
-                )
-                
-                def progress_callback(d):
-                    if d['status'] == 'downloading':
-                        downloaded = d.get('downloaded_bytes', 0)
-                        total = d.get('total_bytes', 0)
-                        if total:
-                            progress.update(task, completed=(downloaded/total)*100)
-
-                download_opts = self.manager.ydl_opts.copy()
-                download_opts.update({
-                    'progress_hooks': [progress_callback]
-                })
-                
-                if 'url' in song_info:
+            if 'url' in song_info:
+                with Progress() as progress:
+                    task = progress.add_task(
+                        f"[yellow]Stahuji: {song_info['title']} - {song_info['artist']}",
+                        total=100
+                    )
+                    
+                    def progress_callback(d):
+                        if d['status'] == 'downloading':
+                            downloaded = d.get('downloaded_bytes', 0)
+                            total = d.get('total_bytes', 0)
+                            if total:
+                                progress.update(task, completed=(downloaded/total)*100)
+
                     # Přímé stažení pomocí URL
-                    with yt_dlp.YoutubeDL(download_opts) as ydl:
+                    with self.manager.ydl_pool.session('direct', progress_hooks=[progress_callback]) as ydl:
                         ydl.download([song_info['url']])
+            else:
+                # Vyhledání a stažení (process_download zobrazuje vlastní průběh)
+                query = f"{song_info['title']} {song_info['artist']}"
+                results = self.manager.search_music(query)
+                if results:
+                    self.manager.process_download([results[0]])
                 else:
-                    # Vyhledání a stažení
-                    query = f"{song_info['title']} {song_info['artist']}"
-                    results = self.manager.search_music(query)
-                    if results:
-                        self.manager.process_download([results[0]])
-                    else:
-                        raise Exception("Skladba nebyla nalezena")
+                    raise Exception("Skladba nebyla nalezena")
                     
             self.console.print(f"[green]Staženo: {song_info['title']}[/green]")
             self._save_recommendation(song_info, "Staženo z chatu")
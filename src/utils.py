@@ -1,20 +1,21 @@
 import os
 from pathlib import Path
+import sys
+# Moduly balíčku src se načítají jako src.<modul> i při spuštění ze složky src
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 import json
 import logging
 from typing import Any, Dict, Optional
 from rich.console import Console
-import requests
 from PIL import Image
-from io import BytesIO
 import tiktoken
 import time
-import hashlib
 import numpy as np
 import platform
 import subprocess
 import io
 import base64
+from src.cover_art import CoverArtCache
 
 console = Console()
 
@@ -52,7 +53,9 @@ def create_default_config(config_path: Path) -> Dict[str, Any]:
         "download": {
             "format": "mp3",
             "quality": "192k",
-            "max_concurrent": 3
+            "max_concurrent": 3,
+            "per_host": 3,
+            "bandwidth_limit": 0
         },
         "api": {
             "openai": {
@@ -73,53 +76,25 @@ def create_default_config(config_path: Path) -> Dict[str, Any]:
     
     return config
 
-def download_and_process_thumbnail(url: str, cache_dir: Path, size: tuple[int, int] = (100, 100)) -> Optional[Path]:
+def download_and_process_thumbnail(url: str, config: Dict[str, Any], video_id: Optional[str] = None,
+                                    size: tuple[int, int] = (100, 100)) -> Optional[Path]:
     """Stáhne a zpracuje náhled videa
     
+    Originál se ukládá do sdílené cache obalů (CoverArtCache.from_config)
+    pod video_id, takže ho později použije i zápis metadat a export
+    do telefonu. Souběžné požadavky na stejný náhled se sloučí.
+    
     Args:
         url: URL náhledu
-        cache_dir: Adresář pro cache
+        config: Konfigurace (paths.cache_dir, limity cache)
+        video_id: ID videa - klíč v cache sdílený se stahováním
         size: Požadovaná velikost náhledu (šířka, výška)
         
     Returns:
         Path k uloženému náhledu nebo None při chybě
     """
-    try:
-        # Vytvoříme hash z URL pro název souboru
-        filename = hashlib.md5(url.encode()).hexdigest() + ".jpg"
-        cache_path = cache_dir / filename
-        
-        # Pokud existuje v cache, vrátíme ho
-        if cache_path.exists():
-            return cache_path
-            
-        # Stáhneme náhled
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        # Otevřeme jako obrázek
-        img = Image.open(BytesIO(response.content))
-        
-        # Změníme velikost se zachováním poměru stran
-        img.thumbnail(size)
-        
-        # Vytvoříme nový obrázek s přesnou velikostí a bílým pozadím
-        thumb = Image.new('RGB', size, 'white')
-        
-        # Vypočítáme pozici pro vycentrování
-        x = (size[0] - img.width) // 2
-        y = (size[1] - img.height) // 2
-        
-        # Vložíme zmenšený obrázek
-        thumb.paste(img, (x, y))
-        
-        # Uložíme do cache
-        thumb.save(cache_path, "JPEG", quality=85)
-        return cache_path
-        
-    except Exception as e:
-        logging.error(f"Chyba při zpracování náhledu: {e}")
-        return None
+    covers = CoverArtCache.from_config(config)
+    return covers.cover(url, video_id, size=tuple(size), quality=85, pad=True, priority='prefetch')
 
 def sanitize_filename(filename: str) -> str:
     """Očistí název souboru od neplatných znaků"""
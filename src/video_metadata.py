@@ -0,0 +1,151 @@
+from typing import List, Dict, Optional, Any, Iterable, Union
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+import threading
+import logging
+import json
+import time
+
+@dataclass
+class VideoMetadata:
+    """Detaily videa z YouTube Data API"""
+    video_id: str
+    duration: str = 'PT0M0S'  # ISO 8601
+    title: str = ''
+    channel: str = ''
+    thumbnails: Dict[str, Any] = field(default_factory=dict)
+    fetched_at: float = 0.0
+
+    @classmethod
+    def from_api_item(cls, item: Dict[str, Any]) -> 'VideoMetadata':
+        """Vytvoří instanci z položky odpovědi videos().list"""
+        snippet = item.get('snippet', {})
+        return cls(
+            video_id=item['id'],
+            duration=item.get('contentDetails', {}).get('duration', 'PT0M0S'),
+            title=snippet.get('title', ''),
+            channel=snippet.get('channelTitle', ''),
+            thumbnails=snippet.get('thumbnails', {}),
+            fetched_at=time.time()
+        )
+
+class VideoMetadataResolver:
+    """Dávkové získávání detailů videí s trvalou cache
+
+    Neznámá ID se posílají do videos().list po nejvýše 50 kusech,
+    známá ID se vrací rovnou z cache bez volání API.
+    """
+    BATCH_SIZE = 50
+
+    def __init__(self, youtube: Any, cache_file: Union[str, Path], max_age: int = 30 * 24 * 3600):
+        self.youtube = youtube
+        self.cache_file = Path(cache_file)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._items: Dict[str, VideoMetadata] = self._load()
+        # ID, která právě dotahuje jiné vlákno
+        self._inflight: Dict[str, threading.Event] = {}
+
+    def _load(self) -> Dict[str, VideoMetadata]:
+        """Načte cache ze souboru"""
+        try:
+            if self.cache_file.exists():
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return {
+                        video_id: VideoMetadata(**data)
+                        for video_id, data in json.load(f).items()
+                    }
+        except Exception as e:
+            logging.error(f"Chyba při načítání cache metadat videí: {e}")
+        return {}
+
+    def _save(self) -> None:
+        """Uloží cache do souboru"""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with self._lock:
+                data = {video_id: asdict(meta) for video_id, meta in self._items.items()}
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp_file.replace(self.cache_file)
+        except Exception as e:
+            logging.error(f"Chyba při ukládání cache metadat videí: {e}")
+
+    def get(self, video_id: str) -> Optional[VideoMetadata]:
+        """Vrátí metadata z cache, pokud jsou platná"""
+        with self._lock:
+            meta = self._items.get(video_id)
+        if meta and time.time() - meta.fetched_at <= self.max_age:
+            return meta
+        return None
+
+    def remember(self, items: Iterable[Dict[str, Any]]) -> List[VideoMetadata]:
+        """Uloží do cache položky odpovědi videos().list"""
+        metas = [VideoMetadata.from_api_item(item) for item in items if item.get('id')]
+        with self._lock:
+            for meta in metas:
+                self._items[meta.video_id] = meta
+        return metas
+
+    def resolve(self, video_ids: Iterable[str]) -> Dict[str, VideoMetadata]:
+        """Vrátí metadata pro zadaná ID, chybějící dotáhne z API
+
+        ID, která současně dotahuje jiné vlákno, se znovu nežádají -
+        počká se na jeho výsledek.
+
+        Args:
+            video_ids: ID videí (mohou se opakovat)
+
+        Returns:
+            Slovník video_id -> VideoMetadata (bez ID, která API nezná)
+        """
+        result: Dict[str, VideoMetadata] = {}
+        missing: List[str] = []
+        for video_id in dict.fromkeys(video_ids):
+            meta = self.get(video_id)
+            if meta:
+                result[video_id] = meta
+            else:
+                missing.append(video_id)
+
+        if not missing or not self.youtube:
+            return result
+
+        # Rozdělení na ID, která dotáhneme sami, a ID, na která počkáme
+        owned: List[str] = []
+        waiting: Dict[str, threading.Event] = {}
+        with self._lock:
+            for video_id in missing:
+                event = self._inflight.get(video_id)
+                if event is None:
+                    self._inflight[video_id] = threading.Event()
+                    owned.append(video_id)
+                else:
+                    waiting[video_id] = event
+
+        try:
+            for start in range(0, len(owned), self.BATCH_SIZE):
+                batch = owned[start:start + self.BATCH_SIZE]
+                response = self.youtube.videos().list(
+                    id=','.join(batch),
+                    part="contentDetails,snippet",
+                    maxResults=self.BATCH_SIZE
+                ).execute()
+                for meta in self.remember(response.get('items', [])):
+                    result[meta.video_id] = meta
+        finally:
+            with self._lock:
+                for video_id in owned:
+                    self._inflight.pop(video_id).set()
+
+        if owned:
+            self._save()
+
+        for video_id, event in waiting.items():
+            event.wait()
+            meta = self.get(video_id)
+            if meta:
+                result[video_id] = meta
+
+        return result
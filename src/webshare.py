@@ -1,22 +1,36 @@
 from pathlib import Path
+import sys
+# Moduly balíčku src se načítají jako src.<modul> i při spuštění ze složky src
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 import requests
 from typing import Optional, Dict, List
 from rich.progress import Progress
 import json
-from exceptions import ConfigError
+from src.exceptions import ConfigError, RetryError, CircuitOpenError
+from src.retry import retry, API_RETRY
+from src.segmented import SegmentedDownloader
 
 class WebshareDownloader:
     """Třída pro stahování z Webshare"""
     
     BASE_URL = "https://webshare.cz/"
     
-    def __init__(self, username: str, password: str):
+    def __init__(self, username: str, password: str, connections: int = 4):
         self.username = username
         self.password = password
         self.session = requests.Session()
         self.token = None
+        self.connections = connections
         self._login()
 
+    @retry(strategy=API_RETRY, circuit_name='webshare')
+    def _post(self, path: str, **kwargs) -> requests.Response:
+        """POST na API Webshare (opakuje se při výpadku spojení a 429/5xx)"""
+        response = self.session.post(f"{self.BASE_URL}{path}", timeout=30, **kwargs)
+        if response.status_code >= 500 or response.status_code == 429:
+            response.raise_for_status()
+        return response
+
     def _login(self) -> None:
         """Přihlášení do Webshare"""
         try:
@@ -41,8 +55,8 @@ class WebshareDownloader:
             response.raise_for_status()
             
             # Přidáme cookies ze session do dalšího requestu
-            response = self.session.post(
-                f"{self.BASE_URL}api/login/",
+            response = self._post(
+                "api/login/",
                 data=data,
                 headers=headers
             )
@@ -68,14 +82,14 @@ class WebshareDownloader:
             # Uložíme token do session
             self.session.cookies.set('wst', self.token)
                 
-        except requests.RequestException as e:
+        except (requests.RequestException, RetryError, CircuitOpenError) as e:
             raise ConfigError(f"Chyba při komunikaci s Webshare: {str(e)}")
 
     def search(self, query: str, limit: int = 10) -> List[Dict]:
         """Vyhledávání audio souborů"""
         try:
-            response = self.session.post(
-                f"{self.BASE_URL}search/",
+            response = self._post(
+                "search/",
                 data={
                     "what": query,
                     "offset": 0,
@@ -93,14 +107,14 @@ class WebshareDownloader:
                 
             return data.get("files", [])
             
-        except requests.RequestException as e:
+        except (requests.RequestException, RetryError, CircuitOpenError) as e:
             raise ConfigError(f"Chyba při vyhledávání: {str(e)}")
 
     def get_download_link(self, ident: str) -> str:
         """Získání odkazu ke stažení"""
         try:
-            response = self.session.post(
-                f"{self.BASE_URL}file_link/",
+            response = self._post(
+                "file_link/",
                 data={
                     "ident": ident,
                     "wst": self.token
@@ -114,42 +128,32 @@ class WebshareDownloader:
                 
             return data.get("link")
             
-        except requests.RequestException as e:
+        except (requests.RequestException, RetryError, CircuitOpenError) as e:
             raise ConfigError(f"Chyba při získávání odkazu: {str(e)}")
 
-    def download_file(self, ident: str, output_dir: Path) -> Path:
-        """Stažení souboru s progress barem"""
+    def download_file(self, ident: str, output_dir: Path, priority: str = 'interactive') -> Path:
+        """Stažení souboru s progress barem
+
+        Stahuje se po úsecích přes více spojení (SegmentedDownloader),
+        přerušené stažení stejného souboru pokračuje tam, kde skončilo.
+        """
         try:
             download_link = self.get_download_link(ident)
+            downloader = SegmentedDownloader(self.session, connections=self.connections)
+            remote = downloader.probe(download_link)
+            file_path = output_dir / (remote.filename or f"webshare_{ident}.mp3")
             
             with Progress() as progress:
-                task = progress.add_task("[cyan]Stahuji z Webshare...", total=100)
-                
-                response = self.session.get(download_link, stream=True)
-                response.raise_for_status()
-                
-                # Získání názvu souboru
-                filename = None
-                content_disposition = response.headers.get('content-disposition')
-                if content_disposition and 'filename=' in content_disposition:
-                    filename = content_disposition.split('filename=')[1].strip('"')
-                if not filename:
-                    filename = f"webshare_{ident}.mp3"
-                
-                file_path = output_dir / filename
-                file_size = int(response.headers.get('content-length', 0))
-                
-                # Stažení souboru po částech
-                with open(file_path, 'wb') as f:
-                    downloaded = 0
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            if file_size:
-                                progress.update(task, completed=(downloaded / file_size) * 100)
-                
-                return file_path
+                task = progress.add_task("[cyan]Stahuji z Webshare...", total=remote.size or None)
+                result = downloader.download(
+                    download_link,
+                    file_path,
+                    priority=priority,
+                    progress=lambda done, total: progress.update(task, completed=done),
+                    remote=remote
+                )
+            
+            return result.path
                 
         except Exception as e:
             raise ConfigError(f"Chyba při stahování: {str(e)}")
@@ -0,0 +1,270 @@
+from typing import Optional, Any, Dict, List, Callable, Iterator, Tuple
+from contextlib import contextmanager
+import threading
+import logging
+import json
+import time
+import yt_dlp
+
+_MISSING = object()
+
+# Volby, které yt-dlp použije jen při sestavení instance - zápůjčkou je nelze změnit
+BUILD_OPTIONS = frozenset({
+    'postprocessors', 'logger', 'progress_hooks', 'postprocessor_hooks',
+    'cookiefile', 'cookiesfrombrowser', 'proxy', 'source_address'
+})
+
+class YDLPool:
+    """Pool předehřátých instancí yt_dlp.YoutubeDL
+
+    Instance se drží podle profilu (search, flat, download) a případných
+    dalších voleb. Jednu instanci v daném okamžiku používá jen jedno vlákno,
+    po vrácení zůstává v poolu i s inicializovanými extraktory, cookies
+    a HTTP spojeními. Nečinné instance s přídavnými volbami se po
+    `idle_timeout` sekundách bez použití zavřou, instance samotných
+    profilů zůstávají.
+    """
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None, max_size: int = 4,
+                 idle_timeout: float = 300.0):
+        self.profiles: Dict[str, Dict[str, Any]] = dict(profiles or {})
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[Tuple[str, str], List[yt_dlp.YoutubeDL]] = {}
+        self._created: Dict[Tuple[str, str], int] = {}
+        self._last_used: Dict[Tuple[str, str], float] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def register(self, profile: str, options: Dict[str, Any]) -> None:
+        """Zaregistruje (nebo přepíše) profil voleb"""
+        with self._condition:
+            self.profiles[profile] = dict(options)
+            # Staré instance profilu už neodpovídají volbám
+            for key in [k for k in self._idle if k[0] == profile]:
+                for ydl in self._idle.pop(key):
+                    self._close_instance(ydl)
+                self._created.pop(key, None)
+
+    def split_options(self, profile: str,
+                      options: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Rozdělí volby úlohy na přídavné volby sestavení a parametry zápůjčky
+
+        Volby shodné s profilem se vynechají. Z ostatních jsou součástí
+        klíče instance jen ty, které se uplatní při sestavení (BUILD_OPTIONS),
+        zbytek (outtmpl, paths apod.) se nastaví jen po dobu zápůjčky.
+
+        Returns:
+            Dvojice (overrides, params) pro session()
+        """
+        base = self.profiles.get(profile, {})
+        overrides, params = {}, {}
+        for name, value in options.items():
+            if base.get(name, _MISSING) == value:
+                continue
+            (overrides if name in BUILD_OPTIONS else params)[name] = value
+        return overrides, params
+
+    @staticmethod
+    def _options_key(overrides: Optional[Dict[str, Any]]) -> str:
+        """Stabilní klíč pro přídavné volby"""
+        if not overrides:
+            return ''
+        return json.dumps(overrides, sort_keys=True, default=repr)
+
+    def _take_stale(self, current: Tuple[str, str]) -> List[yt_dlp.YoutubeDL]:
+        """Odebere nečinné instance přídavných voleb, které se dlouho nepoužily (volá se pod zámkem)"""
+        now = time.monotonic()
+        stale = []
+        for key in [k for k in self._idle if k[1] and k != current]:
+            if now - self._last_used.get(key, 0.0) < self.idle_timeout:
+                continue
+            instances = self._idle.pop(key)
+            stale.extend(instances)
+            self._created[key] = self._created.get(key, 0) - len(instances)
+            if self._created[key] <= 0:
+                self._created.pop(key, None)
+                self._last_used.pop(key, None)
+        return stale
+
+    def _acquire(self, key: Tuple[str, str], options: Dict[str, Any]) -> yt_dlp.YoutubeDL:
+        """Vydá volnou instanci, případně vytvoří novou nebo počká"""
+        with self._condition:
+            stale = self._take_stale(key)
+        for ydl in stale:
+            self._close_instance(ydl)
+
+        with self._condition:
+            self._last_used[key] = time.monotonic()
+            while True:
+                if self._closed:
+                    raise RuntimeError("YDLPool je uzavřen")
+                idle = self._idle.get(key)
+                if idle:
+                    return idle.pop()
+                if self._created.get(key, 0) < self.max_size:
+                    self._created[key] = self._created.get(key, 0) + 1
+                    break
+                self._condition.wait()
+
+        # Vytvoření instance mimo zámek - inicializace extraktorů trvá
+        try:
+            return yt_dlp.YoutubeDL(options)
+        except Exception:
+            with self._condition:
+                self._created[key] -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, key: Tuple[str, str], ydl: yt_dlp.YoutubeDL) -> None:
+        """Vrátí instanci do poolu"""
+        with self._condition:
+            if self._closed:
+                self._close_instance(ydl)
+                return
+            self._idle.setdefault(key, []).append(ydl)
+            self._last_used[key] = time.monotonic()
+            self._condition.notify()
+
+    def _discard(self, key: Tuple[str, str], ydl: yt_dlp.YoutubeDL) -> None:
+        """Zahodí instanci (např. po neočekávané chybě)"""
+        self._close_instance(ydl)
+        with self._condition:
+            self._created[key] = max(0, self._created.get(key, 1) - 1)
+            self._condition.notify()
+
+    @staticmethod
+    def _close_instance(ydl: yt_dlp.YoutubeDL) -> None:
+        try:
+            ydl.__exit__(None, None, None)
+        except Exception as e:
+            logging.debug(f"Chyba při uzavírání YoutubeDL: {e}")
+
+    @staticmethod
+    def _apply_params(ydl: yt_dlp.YoutubeDL, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Dočasně nastaví parametry instance, vrátí původní hodnoty"""
+        previous = {}
+        for name, value in params.items():
+            previous[name] = ydl.params.get(name, _MISSING)
+            # Novější yt-dlp drží outtmpl jako slovník podle typu souboru
+            if name == 'outtmpl' and isinstance(value, str) and isinstance(previous[name], dict):
+                value = {**previous[name], 'default': value}
+            ydl.params[name] = value
+        return previous
+
+    @contextmanager
+    def session(self, profile: str, overrides: Optional[Dict[str, Any]] = None,
+                params: Optional[Dict[str, Any]] = None,
+                progress_hooks: Optional[List[Callable]] = None,
+                postprocessor_hooks: Optional[List[Callable]] = None) -> Iterator[yt_dlp.YoutubeDL]:
+        """Zapůjčí instanci YoutubeDL pro daný profil
+
+        Args:
+            profile: Název registrovaného profilu
+            overrides: Volby, které mění sestavení instance (jsou součástí klíče)
+            params: Parametry platné jen po dobu zápůjčky (např. outtmpl)
+            progress_hooks: Hooky průběhu stahování jen pro tuto zápůjčku
+            postprocessor_hooks: Hooky postprocesorů jen pro tuto zápůjčku
+        """
+        if profile not in self.profiles:
+            raise KeyError(f"Neznámý profil YoutubeDL: {profile}")
+
+        key = (profile, self._options_key(overrides))
+        ydl = self._acquire(key, {**self.profiles[profile], **(overrides or {})})
+
+        previous = self._apply_params(ydl, params or {})
+        progress_hooks = list(progress_hooks or [])
+        postprocessor_hooks = list(postprocessor_hooks or [])
+        for hook in progress_hooks:
+            ydl.add_progress_hook(hook)
+        for hook in postprocessor_hooks:
+            ydl.add_postprocessor_hook(hook)
+
+        healthy = True
+        try:
+            yield ydl
+        except BaseException as e:
+            # Běžné chyby (nenalezené video apod.) instanci nepoškodí,
+            # přerušení uprostřed stahování ale může nechat rozpracovaný stav
+            healthy = isinstance(e, Exception)
+            raise
+        finally:
+            for hook in progress_hooks:
+                if hook in ydl._progress_hooks:
+                    ydl._progress_hooks.remove(hook)
+            for hook in postprocessor_hooks:
+                if hook in ydl._postprocessor_hooks:
+                    ydl._postprocessor_hooks.remove(hook)
+            for name, value in previous.items():
+                if value is _MISSING:
+                    ydl.params.pop(name, None)
+                else:
+                    ydl.params[name] = value
+
+            if healthy:
+                self._release(key, ydl)
+            else:
+                self._discard(key, ydl)
+
+    def close(self) -> None:
+        """Uzavře všechny instance v poolu"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, {}
+            self._condition.notify_all()
+        for instances in idle.values():
+            for ydl in instances:
+                self._close_instance(ydl)
+
+def benchmark(iterations: int = 20, query: Optional[str] = None) -> Dict[str, float]:
+    """Porovná režii vytvoření YoutubeDL na volání s poolem
+
+    Bez dotazu měří jen sestavení instance (extraktory, cookies, síťová vrstva),
+    s dotazem provede i skutečné vyhledávání `ytsearch1`.
+
+    Returns:
+        Průměrná doba jednoho volání v ms pro oba režimy
+    """
+    options = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': 'in_playlist',
+        'ignoreerrors': True
+    }
+
+    def call(ydl: yt_dlp.YoutubeDL) -> None:
+        if query:
+            ydl.extract_info(f"ytsearch1:{query}", download=False)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with yt_dlp.YoutubeDL(options) as ydl:
+            call(ydl)
+    fresh = (time.perf_counter() - start) / iterations * 1000
+
+    pool = YDLPool({'search': options})
+    try:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            with pool.session('search') as ydl:
+                call(ydl)
+        pooled = (time.perf_counter() - start) / iterations * 1000
+    finally:
+        pool.close()
+
+    return {'fresh_ms': fresh, 'pooled_ms': pooled}
+
+if __name__ == "__main__":
+    import argparse
+    from rich.console import Console
+
+    parser = argparse.ArgumentParser(description="Benchmark poolu YoutubeDL")
+    parser.add_argument('-n', '--iterations', type=int, default=20)
+    parser.add_argument('-q', '--query', help="Provést i skutečné vyhledávání")
+    args = parser.parse_args()
+
+    result = benchmark(args.iterations, args.query)
+    console = Console()
+    console.print(f"Nová instance na volání: [yellow]{result['fresh_ms']:.1f} ms[/yellow]")
+    console.print(f"Instance z poolu:        [green]{result['pooled_ms']:.1f} ms[/green]")
+    if result['pooled_ms'] > 0:
+        console.print(f"Zrychlení: {result['fresh_ms'] / result['pooled_ms']:.1f}×")
@@ -0,0 +1,133 @@
+import os
+import sys
+import threading
+import time
+import types
+import pytest
+from src.cover_art import CoverArtCache, parse_size, thumbnail_url
+
+class FakeResponse:
+    def __init__(self, content, content_type='image/jpeg'):
+        self.content = content
+        self.headers = {'content-type': content_type}
+
+    def raise_for_status(self):
+        pass
+
+@pytest.fixture
+def fake_requests(monkeypatch):
+    """Modul requests, který jen počítá požadavky"""
+    calls = []
+    lock = threading.Lock()
+
+    def get(url, timeout=None):
+        with lock:
+            calls.append(url)
+        time.sleep(0.05)
+        return FakeResponse(b'image:' + url.encode())
+
+    monkeypatch.setitem(sys.modules, 'requests', types.SimpleNamespace(get=get))
+    return calls
+
+class TestCoverArtCache:
+    def test_original_downloaded_once(self, tmp_path, fake_requests):
+        """Souběžné požadavky na stejný obal stáhnou originál jen jednou"""
+        covers = CoverArtCache(tmp_path)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(covers.original('https://i.ytimg.com/vi/abc/hq.jpg', 'abc')))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert fake_requests == ['https://i.ytimg.com/vi/abc/hq.jpg']
+        assert set(results) == {tmp_path / 'originals' / 'abc.jpg'}
+
+    def test_video_id_reuses_search_thumbnail(self, tmp_path, fake_requests):
+        """Obal ke stažené skladbě použije originál uložený při vyhledávání"""
+        covers = CoverArtCache(tmp_path)
+        covers.original('https://i.ytimg.com/vi/abc/hqdefault.jpg', 'abc')
+        path = covers.original('https://i.ytimg.com/vi/abc/maxresdefault.jpg', 'abc')
+
+        assert len(fake_requests) == 1
+        assert path.read_bytes() == b'image:https://i.ytimg.com/vi/abc/hqdefault.jpg'
+        # Bez URL se obal vezme jen z cache
+        assert covers.original(video_id='abc') == path
+        assert covers.original(video_id='xyz') is None
+
+    def test_prefetch_in_parallel(self, tmp_path, fake_requests):
+        """Předběžné stažení běží souběžně a vynechá duplicity"""
+        covers = CoverArtCache(tmp_path, workers=4)
+        items = [(f"https://i.ytimg.com/vi/{i}/hq.jpg", str(i)) for i in range(4)]
+        start = time.perf_counter()
+        futures = covers.prefetch(items + items[:2] + [(None, 'bez-url')])
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        covers.close()
+
+        assert len(futures) == 4
+        assert sorted(fake_requests) == sorted(url for url, _ in items)
+        assert elapsed < 0.15
+
+    def test_prune_removes_least_recently_used(self, tmp_path, fake_requests):
+        """Nad limitem se mažou nejdéle nepoužité obaly, použitý obal zůstane"""
+        covers = CoverArtCache(tmp_path, max_bytes=10 ** 6)
+        paths = [covers.original(f"https://i.ytimg.com/vi/{i}/hq.jpg", str(i)) for i in range(3)]
+        for age, path in zip((300, 200, 100), paths):
+            os.utime(path, (time.time() - age, time.time() - age))
+        covers.original(video_id='0')  # nejstarší se právě použil
+
+        covers.max_bytes = paths[0].stat().st_size * 2
+        assert covers.prune() == 1
+        assert paths[0].exists() and not paths[1].exists() and paths[2].exists()
+
+        covers.max_age = 0
+        assert covers.prune() == 2
+
+    def test_from_config_shares_video_id_key(self, tmp_path, fake_requests):
+        """Náhled z vyhledávání i obal pro tagy leží pod stejným klíčem"""
+        config = {'paths': {'cache_dir': str(tmp_path)}, 'cache': {'covers_max_mb': 5}}
+        covers = CoverArtCache.from_config(config)
+        searched = covers.original('https://i.ytimg.com/vi/abc/hq.jpg', 'abc')
+        assert searched == tmp_path / 'covers' / 'originals' / 'abc.jpg'
+        assert CoverArtCache.from_config(config).original(video_id='abc') == searched
+        assert covers.max_bytes == 5 * 1024 * 1024
+
+    def test_sizes_derived_once(self, tmp_path, fake_requests, monkeypatch):
+        """Každá velikost a kvalita se odvodí jen jednou"""
+        pytest.importorskip("PIL")
+        from PIL import Image
+        from io import BytesIO
+
+        buffer = BytesIO()
+        Image.new('RGB', (640, 360), 'red').save(buffer, format='JPEG')
+        monkeypatch.setitem(sys.modules, 'requests', types.SimpleNamespace(
+            get=lambda url, timeout=None: FakeResponse(buffer.getvalue())
+        ))
+
+        covers = CoverArtCache(tmp_path, size='300x300', quality=80)
+        first = covers.cover('https://i.ytimg.com/vi/abc/hq.jpg', 'abc')
+        assert first == tmp_path / '300x300_q80' / 'abc.jpg'
+        assert Image.open(first).size == (300, 169)
+
+        mtime = first.stat().st_mtime_ns
+        assert covers.cover(video_id='abc') == first
+        assert first.stat().st_mtime_ns == mtime
+
+        padded = covers.cover(video_id='abc', size=(100, 100), quality=85, pad=True)
+        assert Image.open(padded).size == (100, 100)
+
+def test_parse_size():
+    assert parse_size('500x400') == (500, 400)
+    assert parse_size(320) == (320, 320)
+    assert parse_size([150, 150]) == (150, 150)
+    assert parse_size(None) == (300, 300)
+
+def test_thumbnail_url():
+    assert thumbnail_url({'thumbnail': 'a'}) == 'a'
+    assert thumbnail_url({'thumbnails': [{'url': 'small'}, {'url': 'big'}]}) == 'big'
+    assert thumbnail_url({}) is None
@@ -0,0 +1,55 @@
+import pytest
+from src.dedup import fingerprint, group_duplicates, collapse
+
+def entry(video_id, title, channel='', duration=210):
+    return {'id': video_id, 'title': title, 'channel': channel, 'duration': duration}
+
+class TestFingerprint:
+    def test_same_length_needs_known_durations(self):
+        """Jistá shoda (pro smazání souboru) vyžaduje obě délky"""
+        known = fingerprint(entry('a', 'Kabát - Pohoda', duration=209))
+        assert known.same_length(fingerprint(entry('b', 'Kabát - Pohoda', duration=215)))
+        assert not known.same_length(fingerprint(entry('b', 'Kabát - Pohoda', duration=300)))
+        unknown = fingerprint(entry('c', 'Kabát - Pohoda', duration=0))
+        assert unknown.matches(known)
+        assert not unknown.same_length(known)
+
+    def test_upload_variants_share_fingerprint(self):
+        """Oficiální video, Topic kanál a HQ audio mají stejný otisk"""
+        prints = {
+            fingerprint(entry('a', 'Kabát - Pohoda (Official Video)', 'Kabát Official')).tokens,
+            fingerprint(entry('b', 'Pohoda', 'Kabát - Topic')).tokens,
+            fingerprint(entry('c', 'KABÁT - Pohoda [HQ Audio]', 'fan')).tokens,
+            fingerprint(entry('d', 'Kabát - Pohoda ft. Někdo (lyrics)', 'x')).tokens
+        }
+        assert prints == {'kabat pohoda'}
+
+    def test_distinct_recordings_differ(self):
+        """Živá verze nebo remix je jiná nahrávka"""
+        studio = fingerprint(entry('a', 'Kabát - Pohoda'))
+        assert fingerprint(entry('b', 'Kabát - Pohoda (Live)')).tokens != studio.tokens
+        assert fingerprint(entry('c', 'Kabát - Pohoda [Remix]')).tokens != studio.tokens
+
+class TestGroupDuplicates:
+    def test_groups_by_tokens_and_duration(self):
+        """Seskupí nahrávky s podobnou délkou, výrazně delší verzi ponechá zvlášť"""
+        items = [
+            entry('a', 'Kabát - Pohoda (Official Video)', duration=212),
+            entry('b', 'Pohoda', 'Kabát - Topic', duration=205),
+            entry('c', 'Kabát - Pohoda', duration=400),
+            entry('d', 'Kabát - Pohoda lyrics', duration='3:29'),
+            entry('e', 'Kabát - Dole v dole', duration=212)
+        ]
+        groups = group_duplicates(items)
+
+        assert [[i['id'] for i in g.items] for g in groups] == [['a', 'b', 'd'], ['c'], ['e']]
+
+    def test_neighbouring_bucket(self):
+        """Délky těsně kolem hranice koše se stále spárují"""
+        items = [entry('a', 'Kabát - Pohoda', duration=209), entry('b', 'Kabát - Pohoda', duration=211)]
+        assert [i['id'] for i in collapse(items)] == ['a']
+
+    def test_unknown_duration_matches(self):
+        """Neznámá délka se spáruje s jakoukoli délkou"""
+        items = [entry('a', 'Kabát - Pohoda', duration=0), entry('b', 'Kabát - Pohoda', duration=300)]
+        assert [i['id'] for i in collapse(items)] == ['a']
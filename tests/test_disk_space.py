@@ -0,0 +1,100 @@
+import threading
+from collections import namedtuple
+import pytest
+from src import disk_space
+from src.disk_space import DiskSpaceManager, estimate_size, parse_bitrate, TAG_OVERHEAD, FALLBACK_BYTES
+from src.exceptions import DiskSpaceError
+
+MB = 1024 * 1024
+Usage = namedtuple('Usage', 'total used free')
+
+@pytest.fixture
+def free_space(monkeypatch):
+    """Nastaví volné místo, které vrací shutil.disk_usage"""
+    state = {'free': 100 * MB}
+    monkeypatch.setattr(disk_space.shutil, 'disk_usage', lambda path: Usage(0, 0, state['free']))
+    return state
+
+class TestEstimateSize:
+    def test_exact_filesize(self):
+        """Velikost zdroje ze zvoleného formátu, výstup podle cílového datového toku"""
+        info = {'duration': 200, 'formats': [
+            {'format_id': '140', 'acodec': 'mp4a.40.2', 'vcodec': 'none', 'ext': 'm4a', 'abr': 128, 'filesize': 3_200_000},
+            {'format_id': '251', 'acodec': 'opus', 'vcodec': 'none', 'ext': 'webm', 'abr': 160, 'filesize': 4_000_000},
+        ]}
+        estimate = estimate_size(info, 'mp3', '192k')
+        assert estimate.exact
+        assert estimate.download == 4_000_000
+        assert estimate.output == 192_000 * 200 // 8
+        assert estimate.peak == 4_000_000 + 4_800_000 + TAG_OVERHEAD
+
+    def test_copy_needs_no_second_file(self):
+        """Formát, který se jen zkopíruje, zabere místo jednou (i s přibližnou velikostí)"""
+        info = {'duration': 200, 'formats': [
+            {'acodec': 'opus', 'vcodec': 'none', 'ext': 'opus', 'abr': 160, 'filesize_approx': 4_000_000},
+        ]}
+        estimate = estimate_size(info, 'opus', '192k')
+        assert not estimate.exact
+        assert estimate.peak == 4_000_000 + TAG_OVERHEAD
+
+    def test_bitrate_times_duration(self):
+        """Bez velikosti se zdroj odhadne z datového toku a délky"""
+        info = {'duration': 100, 'formats': [{'acodec': 'opus', 'vcodec': 'none', 'ext': 'webm', 'abr': 160}]}
+        assert estimate_size(info, 'mp3', '128k').download == 160_000 * 100 // 8
+
+    def test_fallback(self):
+        assert estimate_size({}, 'mp3').peak == FALLBACK_BYTES + TAG_OVERHEAD
+
+    def test_parse_bitrate(self):
+        assert parse_bitrate('192k') == 192_000
+        assert parse_bitrate(160) == 160_000
+        assert parse_bitrate(None) == 0
+
+class TestDiskSpaceManager:
+    def test_reservations_add_up(self, tmp_path, free_space):
+        """Souběžné rezervace se sčítají, po uvolnění je místo znovu k dispozici"""
+        manager = DiskSpaceManager(margin=10 * MB)
+        first = manager.reserve(50 * MB, tmp_path, 'první')
+        with pytest.raises(DiskSpaceError):
+            manager.reserve(50 * MB, tmp_path, 'druhá')
+
+        first.release()
+        first.release()  # Opakované uvolnění nic nedělá
+        with manager.reserve(50 * MB, tmp_path, 'druhá'):
+            assert manager.reserved(tmp_path) == 50 * MB
+        assert manager.reserved(tmp_path) == 0
+
+    def test_written_data_shrinks_reservation(self, tmp_path, free_space):
+        """Zapsaná data už snížila volné místo, rezervace je nepočítá podruhé"""
+        manager = DiskSpaceManager(margin=0)
+        reservation = manager.reserve(60 * MB, tmp_path)
+        reservation.account(40 * MB)
+        free_space['free'] -= 40 * MB
+
+        assert manager.available(tmp_path) == 40 * MB
+        manager.reserve(40 * MB, tmp_path).release()
+
+    def test_missing_target_dir(self, tmp_path, free_space):
+        """Cílová složka ještě nemusí existovat"""
+        manager = DiskSpaceManager(margin=0)
+        manager.reserve(MB, tmp_path / 'Music' / 'YouTube').release()
+
+    def test_concurrent_reservations_never_overcommit(self, tmp_path, free_space):
+        """Ze souběžných žádostí projde jen tolik, kolik se vejde"""
+        manager = DiskSpaceManager(margin=0)
+        granted, lock = [], threading.Lock()
+
+        def worker():
+            try:
+                reservation = manager.reserve(10 * MB, tmp_path)
+                with lock:
+                    granted.append(reservation)
+            except DiskSpaceError:
+                pass
+
+        threads = [threading.Thread(target=worker) for _ in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(granted) == 10
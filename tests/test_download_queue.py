@@ -0,0 +1,73 @@
+import pytest
+from src.download_queue import DownloadQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = DownloadQueue(tmp_path / "downloads.db")
+    yield queue
+    queue.close()
+
+class TestDownloadQueue:
+    def test_enqueue_returns_unfinished_job(self, queue, tmp_path):
+        """Opakované přidání nedokončeného videa nevytvoří novou úlohu"""
+        first = queue.enqueue("abc", "Skladba", tmp_path)
+        second = queue.enqueue("abc", "Skladba", tmp_path)
+        assert first.id == second.id
+
+        queue.set_state(first.id, 'done')
+        third = queue.enqueue("abc", "Skladba", tmp_path)
+        assert third.id != first.id
+
+    def test_state_transitions_count_attempts(self, queue, tmp_path):
+        """Každý vstup do stavu fetching je nový pokus"""
+        job = queue.enqueue("abc", "Skladba", tmp_path)
+        queue.set_state(job.id, 'fetching')
+        queue.set_state(job.id, 'failed', error="timeout")
+        queue.retry_failed()
+        queue.set_state(job.id, 'fetching')
+        queue.set_state(job.id, 'transcoding')
+        queue.set_state(job.id, 'done', path=tmp_path / "abc.mp3")
+
+        job = queue.get(job.id)
+        assert job.state == 'done'
+        assert job.attempts == 2
+        assert job.error is None
+        assert job.path == str(tmp_path / "abc.mp3")
+
+    def test_unknown_state_is_rejected(self, queue, tmp_path):
+        """Neznámý stav vyvolá chybu"""
+        job = queue.enqueue("abc", "Skladba", tmp_path)
+        with pytest.raises(ValueError):
+            queue.set_state(job.id, 'paused')
+
+    def test_unfinished_survive_reopen(self, tmp_path):
+        """Nedokončené úlohy přežijí uzavření a znovuotevření databáze"""
+        queue = DownloadQueue(tmp_path / "downloads.db")
+        a = queue.enqueue("a", "A", tmp_path)
+        b = queue.enqueue("b", "B", tmp_path)
+        queue.enqueue("c", "C", tmp_path)
+        queue.set_state(a.id, 'tagging')
+        queue.set_state(b.id, 'done')
+        queue.close()
+
+        reopened = DownloadQueue(tmp_path / "downloads.db")
+        try:
+            assert [job.video_id for job in reopened.unfinished()] == ["a", "c"]
+        finally:
+            reopened.close()
+
+    def test_stats_and_clear_finished(self, queue, tmp_path):
+        """Statistiky stavů a mazání hotových úloh"""
+        for video_id in ("a", "b", "c"):
+            queue.enqueue(video_id, video_id, tmp_path)
+        queue.set_state(1, 'done')
+        queue.set_state(2, 'failed', error="chyba")
+
+        stats = queue.stats()
+        assert stats['done'] == 1
+        assert stats['failed'] == 1
+        assert stats['queued'] == 1
+
+        assert queue.clear_finished() == 1
+        assert queue.stats()['done'] == 0
+        assert [job.video_id for job in queue.failed()] == ["b"]
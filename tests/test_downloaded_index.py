@@ -0,0 +1,50 @@
+import json
+from src.downloaded_index import DownloadedIndex
+
+class TestDownloadedIndex:
+    def test_reads_legacy_snapshot(self, tmp_path):
+        """Původní .downloaded.json (seznam ID) se načte beze změny formátu"""
+        (tmp_path / ".downloaded.json").write_text(json.dumps(["a", "b"]), encoding='utf-8')
+        index = DownloadedIndex(tmp_path)
+        assert "a" in index
+        assert index.contains("b")
+        assert not index.contains("c")
+
+    def test_add_appends_to_log(self, tmp_path):
+        """Zápis jen připíše řádek do žurnálu, snímek se nepřepisuje"""
+        index = DownloadedIndex(tmp_path)
+        assert index.add("a")
+        assert not index.add("a")
+        assert index.add_many(["b", "c", "b"]) == 2
+
+        assert not (tmp_path / ".downloaded.json").exists()
+        assert (tmp_path / ".downloaded.log").read_text(encoding='utf-8').split() == ["a", "b", "c"]
+        assert len(DownloadedIndex(tmp_path)) == 3
+
+    def test_compaction(self, tmp_path):
+        """Po daném počtu zápisů se žurnál sloučí do snímku"""
+        index = DownloadedIndex(tmp_path, compact_after=3)
+        index.add_many(["a", "b"])
+        assert (tmp_path / ".downloaded.log").exists()
+
+        index.add("c")
+        assert not (tmp_path / ".downloaded.log").exists()
+        assert json.loads((tmp_path / ".downloaded.json").read_text(encoding='utf-8')) == ["a", "b", "c"]
+
+        index.add("d")
+        index.close()
+        assert len(json.loads((tmp_path / ".downloaded.json").read_text(encoding='utf-8'))) == 4
+
+    def test_log_folded_on_load(self, tmp_path):
+        """Žurnál z minulého sezení se při načtení sloučí do snímku"""
+        DownloadedIndex(tmp_path).add_many(["a", "b"])
+        index = DownloadedIndex(tmp_path)
+        assert len(index) == 2
+        assert not (tmp_path / ".downloaded.log").exists()
+        assert json.loads((tmp_path / ".downloaded.json").read_text(encoding='utf-8')) == ["a", "b"]
+
+    def test_contains_many(self, tmp_path):
+        """Dávkový dotaz vrátí jen stažená ID"""
+        index = DownloadedIndex(tmp_path)
+        index.add_many(f"id{i}" for i in range(30000))
+        assert index.contains_many(["id5", "x", "id29999"]) == {"id5", "id29999"}
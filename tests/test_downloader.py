@@ -0,0 +1,127 @@
+import pytest
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+pytest.importorskip("yt_dlp")
+
+from src.downloader import ParallelDownloader, DownloadTask
+from src.download_queue import DownloadQueue
+
+class FakeYDL:
+    """YoutubeDL, které jen chvíli čeká místo stahování"""
+    def __init__(self, fail_ids, postprocessor_hooks=(), extractions=None):
+        self.fail_ids = fail_ids
+        self.postprocessor_hooks = list(postprocessor_hooks)
+        self.extractions = extractions if extractions is not None else []
+        self.params = {}
+
+    def extract_info(self, url, download=False, process=True):
+        video_id = url.rsplit('=', 1)[1]
+        self.extractions.append(video_id)
+        if video_id in self.fail_ids:
+            raise RuntimeError("Video není dostupné")
+        if video_id.startswith('PL'):
+            return {'_type': 'playlist', 'id': video_id, 'title': video_id, 'entries': [{'id': 'a'}, {'id': 'b'}]}
+        return {'id': video_id, 'title': video_id}
+
+    def process_ie_result(self, info, download=True):
+        if info.get('_type') == 'playlist':
+            assert not download
+            # Položky se nesmí rozbalovat po stránkách videí
+            assert self.params['extract_flat'] == 'in_playlist'
+            return info
+        time.sleep(0.1)
+        for name in ('FFmpegExtractAudio', 'FFmpegMetadata'):
+            for hook in self.postprocessor_hooks:
+                hook({'status': 'started', 'postprocessor': name})
+        return info
+
+    def prepare_filename(self, info):
+        return f"/music/{info['title']}.webm"
+
+class FakePool:
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+        self.extractions = []
+
+    def split_options(self, profile, options):
+        return {}, dict(options)
+
+    @contextmanager
+    def session(self, profile, overrides=None, params=None, progress_hooks=None, postprocessor_hooks=None):
+        yield FakeYDL(self.fail_ids, postprocessor_hooks or (), self.extractions)
+
+def make_tasks(count):
+    options = {'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3'}]}
+    return [DownloadTask(f"id{i}", f"Skladba {i}", Path("/music"), options) for i in range(count)]
+
+class TestParallelDownloader:
+    def test_downloads_run_concurrently(self):
+        """Úlohy běží souběžně až do max_workers"""
+        downloader = ParallelDownloader(max_workers=4, pool=FakePool())
+        try:
+            start = time.perf_counter()
+            results = downloader.download_all(make_tasks(4))
+            elapsed = time.perf_counter() - start
+        finally:
+            downloader.cleanup()
+
+        assert elapsed < 0.3
+        assert [r.path for r in results] == [Path(f"/music/id{i}.mp3") for i in range(4)]
+
+    def test_single_extraction_per_download(self):
+        """Stránka videa se extrahuje jen jednou, stažení použije stejné info"""
+        pool = FakePool()
+        downloader = ParallelDownloader(max_workers=2, pool=pool)
+        try:
+            downloader.download_all(make_tasks(3))
+        finally:
+            downloader.cleanup()
+
+        assert sorted(pool.extractions) == ["id0", "id1", "id2"]
+
+    def test_failure_is_isolated(self):
+        """Chyba jedné úlohy neukončí ostatní"""
+        downloader = ParallelDownloader(max_workers=2, pool=FakePool(fail_ids={'id1'}))
+        try:
+            results = downloader.download_all(make_tasks(3))
+        finally:
+            downloader.cleanup()
+
+        assert [r.ok for r in results] == [True, False, True]
+        assert results[1].error is not None
+
+    def test_states_are_journaled(self, tmp_path):
+        """Stavy úloh se zapisují do fronty"""
+        queue = DownloadQueue(tmp_path / "downloads.db")
+        tasks = make_tasks(2)
+        for task in tasks:
+            task.job_id = queue.enqueue(task.video_id, task.title, task.output_path).id
+
+        downloader = ParallelDownloader(max_workers=2, pool=FakePool(fail_ids={'id1'}), queue=queue)
+        try:
+            downloader.download_all(tasks)
+        finally:
+            downloader.cleanup()
+
+        done, failed = queue.get(tasks[0].job_id), queue.get(tasks[1].job_id)
+        assert done.state == 'done'
+        assert done.path == "/music/id0.mp3"
+        assert failed.state == 'failed'
+        assert failed.error
+        assert queue.unfinished() == []
+        queue.close()
+
+    def test_playlist_is_listed_flat(self):
+        """Playlist se nestahuje, jen se vypíšou jeho položky"""
+        downloader = ParallelDownloader(max_workers=2, pool=FakePool())
+        task = DownloadTask("PLmix", "Mix", Path("/music"), {})
+        try:
+            result, = downloader.download_all([task])
+        finally:
+            downloader.cleanup()
+
+        assert result.ok and result.is_playlist
+        assert result.path is None
+        assert [entry['id'] for entry in result.info['entries']] == ['a', 'b']
@@ -0,0 +1,60 @@
+from pathlib import Path
+from src.formats import negotiate, best_audio_format, format_selector
+from src.pipeline import Transcoder
+
+FORMATS = [
+    {'format_id': '18', 'acodec': 'mp4a.40.2', 'vcodec': 'avc1', 'ext': 'mp4', 'abr': 96},
+    {'format_id': '140', 'acodec': 'mp4a.40.2', 'vcodec': 'none', 'ext': 'm4a', 'abr': 129.5},
+    {'format_id': '251', 'acodec': 'opus', 'vcodec': 'none', 'ext': 'webm', 'abr': 135.2},
+    {'format_id': '249', 'acodec': 'opus', 'vcodec': 'none', 'ext': 'webm', 'abr': None}
+]
+
+class TestNegotiate:
+    def test_best_audio_format(self):
+        """Vybere se audio bez videa s nejvyšším datovým tokem"""
+        assert best_audio_format(FORMATS)['format_id'] == '251'
+        assert best_audio_format([]) is None
+
+    def test_copy_when_container_matches(self):
+        """AAC v m4a se pro výstup m4a jen zkopíruje"""
+        plan = negotiate({'acodec': 'mp4a.40.2', 'ext': 'm4a'}, 'm4a')
+        assert plan.action == 'copy'
+        assert not plan.needs_encode
+
+    def test_remux_when_only_container_differs(self):
+        """Opus ve webm se pro výstup opus jen přebalí"""
+        plan = negotiate({'acodec': 'opus', 'ext': 'webm'}, 'opus')
+        assert plan.action == 'remux'
+
+    def test_transcode_other_codec(self):
+        """Jiný kodek se musí převést"""
+        assert negotiate({'acodec': 'opus', 'ext': 'webm'}, 'mp3').action == 'transcode'
+        assert negotiate({'acodec': 'opus', 'ext': 'webm'}, 'm4a').action == 'transcode'
+
+    def test_falls_back_to_format_list(self):
+        """Bez vybraného formátu se použije nejlepší audio ze seznamu"""
+        assert negotiate({'formats': FORMATS}, 'opus').action == 'remux'
+
+    def test_format_selector_prefers_target_codec(self):
+        """Výběr formátu upřednostní zdroj v cílovém kodeku"""
+        assert 'acodec=opus' in format_selector('opus')
+        assert format_selector('neznamy') == 'bestaudio/best'
+
+class TestTranscoderPlan:
+    def test_plan_follows_negotiation(self):
+        """Převodník přebalí zdroj ve shodném kodeku"""
+        info = {'acodec': 'opus', 'ext': 'webm'}
+        assert Transcoder(codec='opus').plan(info).action == 'remux'
+        assert Transcoder(codec='mp3').plan(info).action == 'transcode'
+
+    def test_remux_command_copies_stream(self):
+        """Přebalení kopíruje zvukovou stopu beze změny"""
+        cmd = Transcoder(codec='opus').command(Path("a.webm"), Path("a.opus"), copy=True)
+        assert cmd[-3:] == ['-c:a', 'copy', 'a.opus']
+        assert '-b:a' not in cmd
+
+    def test_copy_skips_ffmpeg(self, tmp_path):
+        """Soubor už v cílovém formátu se vrátí beze změny"""
+        source = tmp_path / "a.m4a"
+        source.write_bytes(b"data")
+        assert Transcoder(codec='m4a', ffmpeg='/neexistuje').transcode(source, {'acodec': 'mp4a.40.2', 'ext': 'm4a'}) == source
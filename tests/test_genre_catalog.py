@@ -0,0 +1,65 @@
+import json
+import os
+from src.genre_catalog import GenreCatalog
+
+def song(video_id, title=""):
+    return {'title': title or video_id, 'artist': '', 'video_id': video_id, 'downloaded': True}
+
+class TestGenreCatalog:
+    def test_reads_legacy_file_and_dedupes(self, tmp_path):
+        """Původní genre_list.json se načte, duplicity se nepřidají"""
+        path = tmp_path / "genre_list.json"
+        path.write_text(json.dumps({'Rock': [song("a")]}), encoding='utf-8')
+        catalog = GenreCatalog(path)
+
+        assert not catalog.add('Rock', song("a"))
+        assert catalog.add('Rock', song("b"))
+        assert catalog.add_many([('Jazz', song("c")), ('Jazz', song("c"))]) == 1
+        assert len(catalog) == 3
+        assert catalog.contains('Jazz', "c")
+
+    def test_incremental_persistence(self, tmp_path):
+        """Nové skladby se připisují do žurnálu, snímek se přepíše až při sloučení"""
+        path = tmp_path / "genre_list.json"
+        catalog = GenreCatalog(path, compact_after=3)
+        catalog.add_many([('Rock', song("a")), ('Pop', song("b"))])
+        assert not path.exists()
+        assert len(GenreCatalog(path)) == 2
+
+        catalog.add('Rock', song("c"))
+        assert not catalog.log_path.exists()
+        assert {g: [s['video_id'] for s in songs] for g, songs in json.loads(path.read_text(encoding='utf-8')).items()} == {
+            'Rock': ["a", "c"], 'Pop': ["b"]
+        }
+
+    def test_shared_instance_reloads_on_change(self, tmp_path):
+        """Sdílená instance se znovu načte jen po změně souboru"""
+        path = tmp_path / "genre_list.json"
+        path.write_text(json.dumps({'Rock': [song("a")]}), encoding='utf-8')
+        catalog = GenreCatalog.shared(path)
+        assert GenreCatalog.shared(path) is catalog
+        assert not catalog.refresh()
+
+        path.write_text(json.dumps({'Rock': [song("a")], 'Metal': [song("m")]}), encoding='utf-8')
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert GenreCatalog.shared(path).genres() == ['Rock', 'Metal']
+
+    def test_genres_in_text(self, tmp_path):
+        """Žánry se najdou bez ohledu na velikost písmen, delší název má přednost"""
+        catalog = GenreCatalog(tmp_path / "genre_list.json")
+        catalog.add_many([('Rock', song("a")), ('Hard Rock', song("b")), ('Jazz', song("c"))])
+
+        assert catalog.genres_in_text("Zkus něco jako HARD ROCK nebo jazz") == ['Hard Rock', 'Jazz']
+        assert catalog.genres_in_text("mám rád rock") == ['Rock']
+        assert catalog.genres_in_text("nic") == []
+
+    def test_random_track(self, tmp_path):
+        """Náhodná skladba ze žánru nebo z libovolného neprázdného žánru"""
+        catalog = GenreCatalog(tmp_path / "genre_list.json")
+        assert catalog.random_track() is None
+
+        catalog.add('Jazz', song("c"))
+        assert catalog.random_track('Jazz') == ('Jazz', song("c"))
+        assert catalog.random_track() == ('Jazz', song("c"))
+        assert catalog.random_track('Polka') is None
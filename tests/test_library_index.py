@@ -0,0 +1,99 @@
+import pytest
+from src.library_index import LibraryIndex
+from src.genre_catalog import GenreCatalog
+
+@pytest.fixture
+def index(tmp_path):
+    index = LibraryIndex(tmp_path / "library.db")
+    yield index
+    index.close()
+
+class TestLibraryIndex:
+    def test_search_ignores_diacritics(self, index):
+        """Vyhledávání nerozlišuje diakritiku ani velikost písmen"""
+        index.add_track('a', 'Žába', 'Mládek', genre='country')
+        index.add_track('b', 'Dole v dole', 'Kabát', genre='rock')
+
+        assert [t['video_id'] for t in index.search("mladek zaba")] == ['a']
+        assert [t['video_id'] for t in index.search("KABAT")] == ['b']
+
+    def test_prefix_search(self, index):
+        """Poslední slovo dotazu se hledá jako prefix"""
+        index.add_track('a', 'Nothing Else Matters', 'Metallica', tags=['metal', 'ballad'])
+
+        assert [t['video_id'] for t in index.search("metall")] == ['a']
+        assert [t['video_id'] for t in index.search("ballad noth")] == ['a']
+
+    def test_update_keeps_single_entry(self, index):
+        """Opakované přidání skladbu aktualizuje a zachová žánr"""
+        index.add_track('a', 'Stary nazev', 'Kabat', genre='rock')
+        index.add_track('a', 'Novy nazev', 'Kabat', path='/music/novy.mp3')
+
+        assert index.count() == 1
+        assert index.search("stary") == []
+        track = index.search("novy")[0]
+        assert track['genre'] == 'rock'
+        assert track['path'] == '/music/novy.mp3'
+
+    def test_special_characters_in_query(self, index):
+        """Syntaxe FTS5 v dotazu nezpůsobí chybu"""
+        index.add_track('a', 'AC/DC - Thunderstruck', 'AC/DC')
+
+        assert [t['video_id'] for t in index.search('"ac/dc" (thunder')] == ['a']
+        assert index.search('***') == []
+
+    def test_rebuild_from_library(self, index, tmp_path):
+        """Index se naplní ze souborů v knihovně"""
+        music_dir = tmp_path / "music"
+        (music_dir / "Kabát").mkdir(parents=True)
+        (music_dir / "Kabát" / "Kabát - Pohoda.mp3").write_bytes(b"")
+
+        assert index.rebuild_from_library(music_dir) == 1
+        track = index.search("pohoda")[0]
+        assert track['artist'] == 'Kabát'
+        assert track['video_id'] == 'file:Kabát/Kabát - Pohoda.mp3'
+
+    def test_rebuild_merges_catalog_and_files(self, index, tmp_path):
+        """Soubor skladby z katalogu se přiřadí k jejímu video ID, ne jako druhý záznam"""
+        music_dir = tmp_path / "music"
+        (music_dir / "Kabát").mkdir(parents=True)
+        (music_dir / "Kabát" / "Kabát - Pohoda.mp3").write_bytes(b"")
+        (music_dir / "Kabát" / "Kabát - Žízeň.mp3").write_bytes(b"")
+        catalog = GenreCatalog(tmp_path / "genre_list.json")
+        catalog.add('rock', {'video_id': 'abc123', 'title': 'Pohoda (Official Video)', 'artist': 'Kabát'})
+
+        assert index.rebuild_from_library(music_dir, catalog) == 2
+        assert index.count() == 2
+        [track] = index.search("pohoda")
+        assert track['video_id'] == 'abc123'
+        assert track['genre'] == 'rock'
+        assert track['path'] == str(music_dir / "Kabát" / "Kabát - Pohoda.mp3")
+        assert index.search("zizen")[0]['video_id'] == 'file:Kabát/Kabát - Žízeň.mp3'
+
+    def test_old_exact_match_ranks_first(self, index):
+        """Starší přesná shoda předběhne stovky novějších slabých shod"""
+        index.add_track('old', 'Pohoda', 'Kabát')
+        for i in range(600):
+            index.add_track(f"new{i}", f"Skladba {i}", 'Někdo', tags=['pohoda'])
+
+        results = index.search("pohoda", limit=10)
+        assert results[0]['video_id'] == 'old'
+        assert len(results) == 10
+
+    def test_find_duplicate(self, index):
+        """Jiná nahrávka téže skladby se v knihovně najde"""
+        index.add_track('a', 'Kabát - Pohoda (Official Video)', 'Kabát Official', duration='3:32')
+
+        class Result:
+            video_id, title, artist, duration = 'b', 'Pohoda', 'Kabát - Topic', '3:28'
+
+        assert index.find_duplicate(Result())['video_id'] == 'a'
+        Result.duration = '6:40'
+        assert index.find_duplicate(Result()) is None
+
+    def test_video_ids_for_paths(self, index):
+        """Video ID se dohledají podle cesty k souboru"""
+        index.add_track('a', 'Pohoda', 'Kabát', path='/music/pohoda.mp3')
+        index.add_track('b', 'Žába', 'Mládek')
+
+        assert index.video_ids_for_paths(['/music/pohoda.mp3', '/music/jina.mp3']) == {'/music/pohoda.mp3': 'a'}
@@ -0,0 +1,116 @@
+import math
+import pytest
+from src import loudness
+from src.loudness import (
+    LoudnessMeasurement, LoudnessNormalizer, LoudnessStore,
+    parse_ebur128, album_measurement, gain_for
+)
+
+EBUR128_OUTPUT = """
+Input #0, mp3, from 'a.mp3':
+  Duration: 00:03:25.50, start: 0.025057, bitrate: 192 kb/s
+[Parsed_ebur128_0 @ 0x55] t: 1.0  TARGET:-23 LUFS    M: -20.1 S:-120.7     I: -20.1 LUFS       LRA:   0.0 LU  TPK: -1.2 -1.3 dBFS
+[Parsed_ebur128_0 @ 0x55] Summary:
+
+  Integrated loudness:
+    I:         -9.8 LUFS
+    Threshold: -19.9 LUFS
+
+  Loudness range:
+    LRA:         4.6 LU
+    Threshold: -29.9 LUFS
+    LRA low:   -13.1 LUFS
+    LRA high:   -8.5 LUFS
+
+  True peak:
+    Peak:        0.4 dBFS
+"""
+
+@pytest.fixture
+def store(tmp_path):
+    store = LoudnessStore(tmp_path / "library.db")
+    yield store
+    store.close()
+
+class TestMeasurement:
+    def test_parse_summary(self):
+        """Z výstupu se čte jen závěrečný souhrn"""
+        m = parse_ebur128(EBUR128_OUTPUT)
+        assert m.integrated == -9.8
+        assert m.true_peak == 0.4
+        assert m.lra == 4.6
+        assert m.duration == pytest.approx(205.5)
+
+    def test_gain_is_limited_by_true_peak(self):
+        """Zisk nesmí posunout true peak nad limit"""
+        quiet = LoudnessMeasurement(integrated=-20.0, true_peak=-3.0)
+        assert gain_for(quiet, -16.0, -1.0) == pytest.approx(2.0)
+        loud = LoudnessMeasurement(integrated=-9.8, true_peak=0.4)
+        assert gain_for(loud, -16.0, -1.0) == pytest.approx(-6.2)
+
+    def test_album_is_energy_average(self):
+        """Hlasitost alba je průměr energie vážený délkou, peak je maximum"""
+        album = album_measurement([
+            LoudnessMeasurement(-10.0, -0.5, duration=100),
+            LoudnessMeasurement(-20.0, -3.0, duration=100)
+        ])
+        assert album.integrated == pytest.approx(10 * math.log10((0.1 + 0.01) / 2))
+        assert album.true_peak == -0.5
+        assert album.duration == 200
+
+class TestLoudnessNormalizer:
+    def test_measurement_is_cached_until_file_changes(self, store, tmp_path, monkeypatch):
+        """Nezměněný soubor se znovu neměří"""
+        calls = []
+        def fake_measure(path, ffmpeg='ffmpeg'):
+            calls.append(path)
+            return LoudnessMeasurement(-12.0, -0.5, duration=180)
+        monkeypatch.setattr(loudness, 'measure', fake_measure)
+
+        track = tmp_path / "a.mp3"
+        track.write_bytes(b"audio")
+        normalizer = LoudnessNormalizer(store)
+        normalizer.measure(track)
+        normalizer.measure(track)
+        assert len(calls) == 1
+
+        track.write_bytes(b"other audio")
+        normalizer.measure(track)
+        assert len(calls) == 2
+
+    def test_r128_relative_to_reference(self, store, tmp_path, monkeypatch):
+        """Zisk R128 (Opus) je vůči -23 LUFS bez ohledu na cílovou úroveň"""
+        written = {}
+        def fake_write(path, track_gain, track_peak, album_gain=None, album_peak=None, **r128):
+            written.update(r128, track_gain=track_gain)
+        monkeypatch.setattr(loudness, 'write_gain_tags', fake_write)
+
+        track = tmp_path / "a.opus"
+        track.write_bytes(b"audio")
+        LoudnessNormalizer(store, target=-16.0).apply(track, LoudnessMeasurement(-18.0, -12.0))
+        assert written['track_gain'] == pytest.approx(2.0)
+        assert written['r128_track_gain'] == pytest.approx(-5.0)
+        assert written['r128_album_gain'] is None
+
+    def test_retag_uses_stored_measurements(self, store, tmp_path, monkeypatch):
+        """Změna cílové úrovně jen přepíše tagy, nic se neměří"""
+        written = []
+        def fake_write(path, track_gain, track_peak, album_gain=None, album_peak=None, **r128):
+            written.append((path.name, round(track_gain, 2), album_gain))
+            path.write_bytes(path.read_bytes() + b"tag")
+        monkeypatch.setattr(loudness, 'write_gain_tags', fake_write)
+        monkeypatch.setattr(loudness, 'measure', lambda path, ffmpeg='ffmpeg': pytest.fail("měření navíc"))
+
+        for name, level in (("a.mp3", -12.0), ("b.mp3", -20.0)):
+            track = tmp_path / name
+            track.write_bytes(b"audio")
+            store.put(track, LoudnessMeasurement(level, -6.0, duration=180))
+        # Soubor změněný po měření se přeskočí
+        (tmp_path / "b.mp3").write_bytes(b"changed")
+
+        count = LoudnessNormalizer(store, target=-14.0).retag()
+        assert count == 1
+        assert written == [("a.mp3", -2.0, None)]
+
+        # Po přepisu tagů zůstává měření platné
+        assert store.get(tmp_path / "a.mp3") is not None
@@ -0,0 +1,79 @@
+import multiprocessing
+import pytest
+from src import loudness, normalize_job
+from src.loudness import LoudnessMeasurement, LoudnessNormalizer, LoudnessStore
+from src.normalize_job import NormalizeJob
+
+# Náhrada ffmpeg se do podřízených procesů přenese jen při startu přes fork
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork',
+    reason="vyžaduje start procesů přes fork"
+)
+
+LEVELS = {'a.mp3': -10.0, 'b.mp3': -20.0, 'c.mp3': -14.0}
+
+def fake_measure(path, ffmpeg='ffmpeg'):
+    return LoudnessMeasurement(LEVELS[path.name], -3.0, duration=200)
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.setattr(normalize_job, 'measure', fake_measure)
+    written = {}
+    def fake_write(path, track_gain, track_peak, album_gain=None, album_peak=None, **r128):
+        written[path.name] = (round(track_gain, 2), album_gain)
+        path.write_bytes(path.read_bytes() + b"tag")
+    monkeypatch.setattr(loudness, 'write_gain_tags', fake_write)
+
+    album = tmp_path / "album"
+    album.mkdir()
+    for name in ('a.mp3', 'b.mp3'):
+        (album / name).write_bytes(b"audio")
+    (tmp_path / "c.mp3").write_bytes(b"audio")
+    (tmp_path / "cover.jpg").write_bytes(b"image")
+
+    store = LoudnessStore(tmp_path / "library.db")
+    yield tmp_path, store, written
+    store.close()
+
+class TestNormalizeJob:
+    def test_track_mode_and_skip_unchanged(self, library):
+        """Druhý běh nic neměří ani netaguje"""
+        root, store, written = library
+        job = NormalizeJob(LoudnessNormalizer(store, target=-16.0), workers=2)
+
+        report = job.run(root)
+        assert (report.total, report.measured, report.tagged, report.failed) == (3, 3, 3, 0)
+        assert written['c.mp3'] == (-2.0, None)
+        assert report.files_per_second > 0
+
+        written.clear()
+        report = job.run(root)
+        assert (report.measured, report.skipped, report.tagged) == (0, 3, 0)
+        assert written == {}
+
+    def test_folder_mode_writes_album_gain(self, library):
+        """Skladby ve stejné složce dostanou společný zisk alba"""
+        root, store, written = library
+        report = NormalizeJob(LoudnessNormalizer(store, target=-16.0), mode='folder', workers=2).run(root)
+
+        assert report.tagged == 3
+        assert written['a.mp3'][1] == written['b.mp3'][1]
+        assert written['a.mp3'][1] is not None
+
+    def test_mode_change_retags_without_measuring(self, library, monkeypatch):
+        """Přepnutí režimu jen přepíše tagy z uložených měření"""
+        root, store, written = library
+        normalizer = LoudnessNormalizer(store, target=-16.0)
+        NormalizeJob(normalizer, workers=2).run(root)
+
+        monkeypatch.setattr(normalize_job, 'measure', lambda path, ffmpeg='ffmpeg': pytest.fail("měření navíc"))
+        written.clear()
+        report = NormalizeJob(normalizer, mode='folder', workers=2).run(root)
+        assert report.measured == 0
+        assert set(written) == {'a.mp3', 'b.mp3', 'c.mp3'}
+
+    def test_unknown_mode(self, library):
+        """Neznámý režim se odmítne"""
+        _, store, _ = library
+        with pytest.raises(ValueError):
+            NormalizeJob(LoudnessNormalizer(store), mode='mp3gain')
@@ -0,0 +1,164 @@
+import pytest
+import struct
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+pytest.importorskip("yt_dlp")
+
+from src.downloader import ParallelDownloader, DownloadTask
+from src.download_queue import DownloadQueue
+from src.exceptions import ConversionError
+from src.pipeline import DownloadPipeline, Transcoder, Tagger
+
+class FakeYDL:
+    """YoutubeDL, které jen chvíli čeká místo stahování"""
+    def extract_info(self, url, download=False, process=True):
+        video_id = url.rsplit('=', 1)[1]
+        return {'id': video_id, 'title': video_id, 'ext': 'webm'}
+
+    def process_ie_result(self, info, download=True):
+        time.sleep(0.1)
+        return info
+
+    def prepare_filename(self, info):
+        return f"/music/{info['title']}.webm"
+
+class FakePool:
+    def split_options(self, profile, options):
+        return {}, dict(options)
+
+    @contextmanager
+    def session(self, profile, overrides=None, params=None, progress_hooks=None, postprocessor_hooks=None):
+        yield FakeYDL()
+
+class FakeTranscoder:
+    """Převod, který jen čeká a počítá souběžné převody"""
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def transcode(self, source, info=None):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(0.1)
+            if source.stem in self.fail:
+                raise ConversionError("ffmpeg selhal")
+            return source.with_suffix('.mp3')
+        finally:
+            with self.lock:
+                self.running -= 1
+
+class FakeTagger:
+    def __init__(self):
+        self.tagged = []
+
+    def tag(self, path, info, source=None):
+        self.tagged.append(path)
+
+def make_tasks(queue, count):
+    tasks = []
+    for i in range(count):
+        job = queue.enqueue(f"id{i}", f"Skladba {i}", "/music")
+        tasks.append(DownloadTask(f"id{i}", f"Skladba {i}", Path("/music"), {}, job_id=job.id))
+    return tasks
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = DownloadQueue(tmp_path / "downloads.db")
+    yield queue
+    queue.close()
+
+class TestDownloadPipeline:
+    def test_stages_overlap(self, queue):
+        """Převod běží souběžně se stahováním dalších skladeb"""
+        downloader = ParallelDownloader(max_workers=2, pool=FakePool(), queue=queue)
+        transcoder, tagger = FakeTranscoder(), FakeTagger()
+        pipeline = DownloadPipeline(downloader, transcoder, tagger, transcode_workers=4)
+        tasks = make_tasks(queue, 6)
+        try:
+            start = time.perf_counter()
+            results = pipeline.run(tasks)
+            elapsed = time.perf_counter() - start
+        finally:
+            downloader.cleanup()
+
+        # Sériově 6 * (0.1 + 0.1) s, se dvěma stahujícími vlákny 3 * 0.1 s + poslední převod
+        assert elapsed < 0.7
+        assert [r.path for r in results] == [Path(f"/music/id{i}.mp3") for i in range(6)]
+        assert sorted(tagger.tagged) == sorted(r.path for r in results)
+        assert all(queue.get(t.job_id).state == 'done' for t in tasks)
+
+    def test_transcode_failure_is_isolated(self, queue):
+        """Chyba převodu označí jen danou úlohu"""
+        downloader = ParallelDownloader(max_workers=2, pool=FakePool(), queue=queue)
+        pipeline = DownloadPipeline(downloader, FakeTranscoder(fail={'id1'}), FakeTagger(), transcode_workers=2)
+        tasks = make_tasks(queue, 3)
+        try:
+            results = pipeline.run(tasks)
+        finally:
+            downloader.cleanup()
+
+        assert [r.ok for r in results] == [True, False, True]
+        assert queue.get(tasks[1].job_id).state == 'failed'
+        assert "ffmpeg" in queue.get(tasks[1].job_id).error
+
+    def test_bounded_transcode_pool(self, queue):
+        """Počet souběžných převodů nepřekročí velikost poolu"""
+        downloader = ParallelDownloader(max_workers=4, pool=FakePool(), queue=queue)
+        transcoder = FakeTranscoder()
+        pipeline = DownloadPipeline(downloader, transcoder, transcode_workers=2, queue_size=1)
+        try:
+            results = pipeline.run(make_tasks(queue, 8))
+        finally:
+            downloader.cleanup()
+
+        assert all(r.ok for r in results)
+        assert transcoder.max_running <= 2
+
+class TestTranscoder:
+    def test_command_from_config(self):
+        """Převod používá kodek a kvalitu z konfigurace, hlasitost neupravuje"""
+        transcoder = Transcoder.from_config({
+            'audio': {'quality': '256k', 'normalization': {'enabled': True, 'target_level': -14.0}},
+            'conversion': {'output_format': 'mp3'}
+        })
+        cmd = transcoder.command(Path("a.webm"), Path("a.mp3"))
+        assert 'libmp3lame' in cmd
+        assert '256k' in cmd
+        assert '-af' not in cmd
+
+def atom(name, data=b''):
+    return struct.pack('>I', 8 + len(data)) + name + data
+
+def write_m4a(path):
+    """Nejmenší soubor M4A se zvukovou stopou, který mutagen otevře"""
+    mvhd = atom(b'mvhd', bytes(4) + struct.pack('>IIII', 0, 0, 1000, 0) + bytes(80))
+    mdhd = atom(b'mdhd', bytes(4) + struct.pack('>IIII', 0, 0, 44100, 0) + bytes(4))
+    hdlr = atom(b'hdlr', bytes(8) + b'soun' + bytes(13))
+    trak = atom(b'trak', atom(b'mdia', mdhd + hdlr))
+    path.write_bytes(atom(b'ftyp', b'M4A \0\0\0\0M4A mp42isom') + atom(b'moov', mvhd + trak) + atom(b'mdat'))
+
+class TestTagger:
+    def test_m4a_cover(self, tmp_path):
+        """Do m4a se obal zapíše jako atom covr spolu s metadaty"""
+        mp4 = pytest.importorskip("mutagen.mp4")
+        path = tmp_path / "song.m4a"
+        write_m4a(path)
+        thumbnail = tmp_path / "song.jpg"
+        thumbnail.write_bytes(b'\xff\xd8\xff\xe0obal')
+
+        Tagger().tag(path, {'id': 'abc', 'title': 'Pohoda', 'artist': 'Kabát', 'genre': 'rock'})
+
+        tags = mp4.MP4(str(path)).tags
+        assert tags['\xa9nam'] == ['Pohoda']
+        assert tags['\xa9ART'] == ['Kabát']
+        [cover] = tags['covr']
+        assert bytes(cover) == b'\xff\xd8\xff\xe0obal'
+        assert cover.imageformat == mp4.MP4Cover.FORMAT_JPEG
+        assert not thumbnail.exists()
@@ -0,0 +1,53 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.ranking import RankingEngine, RankingWeights
+
+def entry(video_id, title, duration=200, views=0, channel=''):
+    return {'id': video_id, 'title': title, 'duration': duration,
+            'view_count': views, 'channel': channel}
+
+class TestRankingEngine:
+    def test_features(self):
+        """Příznaky se vyčtou z názvu, kanálu a délky"""
+        engine = RankingEngine()
+        matrix = engine.features([
+            entry('a', 'Kabát - Pohoda (Official Video)', channel='Kabát - Topic'),
+            entry('b', 'Pohoda karaoke', duration='3:05')
+        ], "kabat pohoda")
+
+        assert matrix.shape == (2, 10)
+        assert matrix[0, 2] == 1  # Topic kanál
+        assert matrix[0, 3] == 1.0  # Obě slova dotazu v názvu
+        assert matrix[0, 4] == 1  # Official
+        assert matrix[1, 0] == 185
+        assert matrix[1, 7] == 1  # Karaoke
+
+    def test_rank_orders_by_score(self):
+        """Oficiální verze s přesnou shodou je první, cover poslední"""
+        candidates = [
+            entry('cover', 'Pohoda cover'),
+            entry('other', 'Něco jiného'),
+            entry('official', 'Kabát - Pohoda (Official)', channel='Kabát - Topic')
+        ]
+        ranked = RankingEngine().rank(candidates, "kabát pohoda")
+
+        assert [c['id'] for c in ranked] == ['official', 'other', 'cover']
+
+    def test_rank_filters_in_one_pass(self):
+        """Vyřazené příznaky a délka se filtrují společně s řazením"""
+        candidates = [
+            entry('live', 'Pohoda live'),
+            entry('short', 'Pohoda', duration=30),
+            entry('ok', 'Pohoda'),
+            entry('unknown', 'Pohoda', duration=0)
+        ]
+        ranked = RankingEngine().rank(candidates, "pohoda", exclude=['live'], min_duration=60)
+
+        assert [c['id'] for c in ranked] == ['ok', 'unknown']
+
+    def test_weights_from_config(self):
+        """Neznámé klíče konfigurace se ignorují"""
+        weights = RankingWeights.from_config({'official': 2.0, 'neznamy': 1})
+        assert weights.official == 2.0
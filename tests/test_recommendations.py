@@ -0,0 +1,42 @@
+import pytest
+import threading
+from types import SimpleNamespace
+from src.recommendations import RecommendationEngine
+
+def make_seed(video_id, artist, title):
+    return SimpleNamespace(video_id=video_id, artist=artist, title=title)
+
+class TestRecommendationEngine:
+    def test_build_queries(self):
+        """Dotazy se střídají po šablonách napříč skladbami"""
+        engine = RecommendationEngine(lambda q: [], templates=["{artist} a", "{title} b"])
+        queries = engine.build_queries([make_seed("1", "X", "One"), make_seed("2", "Y", "Two")])
+
+        assert queries == ["X a", "Y a", "One b", "Two b"]
+
+    def test_dedup_exclude_and_rank(self):
+        """Seed se vyloučí, duplicity se sloučí a častější záznam vyhraje"""
+        responses = {
+            "X a": [{'id': 'seed'}, {'id': 'b'}, {'id': 'c'}],
+            "One b": [{'id': 'c'}, {'id': 'd', 'live_status': 'is_live'}],
+        }
+        engine = RecommendationEngine(lambda q: responses.get(q, []), templates=["{artist} a", "{title} b"])
+        results = engine.recommend([make_seed("seed", "X", "One")])
+
+        assert [r['id'] for r in results] == ['c', 'b']
+
+    def test_early_stop(self):
+        """Po dosažení limitu se další dotazy nespouští"""
+        calls = []
+        lock = threading.Lock()
+
+        def search(query):
+            with lock:
+                calls.append(query)
+            return [{'id': f"{query}-{i}"} for i in range(3)]
+
+        engine = RecommendationEngine(search, fanout=1, limit=4)
+        results = engine.recommend([make_seed("s", "X", "One")])
+
+        assert len(results) == 4
+        assert len(calls) == 2
@@ -0,0 +1,70 @@
+import pytest
+import threading
+import time
+from src.resolver import Suggestion, SuggestionResolver, parse_suggestions
+
+class TestParseSuggestions:
+    def test_parse_text(self):
+        """Test parsování odpovědi AI"""
+        text = "1. Metallica - One\n\nNějaký úvod\n2. Kabát - Pohoda"
+        parsed = parse_suggestions(text)
+
+        assert [(s.artist, s.title) for s in parsed] == [
+            ("Metallica", "One"),
+            ("Kabát", "Pohoda")
+        ]
+
+class TestSuggestionResolver:
+    def test_resolve_concurrently(self):
+        """Návrhy se hledají souběžně a výsledky drží pořadí"""
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def lookup(suggestion):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return suggestion.title
+
+        resolver = SuggestionResolver(lookup, max_workers=4)
+        suggestions = [Suggestion("A", str(i)) for i in range(8)]
+        results = resolver.resolve(suggestions)
+
+        assert results == [str(i) for i in range(8)]
+        assert 1 < max(peak) <= 4
+
+    def test_deduplicate_and_cache(self):
+        """Opakované návrhy se hledají jen jednou"""
+        calls = []
+
+        def lookup(suggestion):
+            calls.append(suggestion.key)
+            return suggestion.title
+
+        resolver = SuggestionResolver(lookup)
+        resolver.resolve([Suggestion("Kabát", "Pohoda"), Suggestion("kabat", "pohoda")])
+        resolver.resolve([Suggestion("Kabát", "Pohoda")])
+
+        assert len(calls) == 1
+
+    def test_failures_reported(self):
+        """Chyba jednoho návrhu neshodí ostatní"""
+        reported = []
+
+        def lookup(suggestion):
+            if suggestion.title == "bad":
+                raise RuntimeError("network")
+            return None if suggestion.title == "missing" else suggestion.title
+
+        resolver = SuggestionResolver(lookup)
+        results = resolver.resolve(
+            [Suggestion("A", "ok"), Suggestion("A", "bad"), Suggestion("A", "missing")],
+            on_result=lambda s, r, e: reported.append((s.title, r, e is not None))
+        )
+
+        assert results == ["ok"]
+        assert sorted(reported) == [("bad", None, True), ("missing", None, False), ("ok", "ok", False)]
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import pytest
+from src import retry as retry_module
+from src.retry import RetryStrategy, CircuitBreaker, retry, retry_after, status_of, is_transient
+from src.exceptions import RetryError, CircuitOpenError, NetworkError, DownloadError
+
+class HTTPError(Exception):
+    """Chyba s odpovědí serveru (jako requests.HTTPError)"""
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = type('Response', (), {'status_code': status, 'headers': headers or {}})()
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Zaznamená čekání místo skutečného uspání"""
+    waited = []
+    monkeypatch.setattr(retry_module.time, 'sleep', waited.append)
+
+    async def fake_async_sleep(delay):
+        waited.append(delay)
+    monkeypatch.setattr(retry_module.asyncio, 'sleep', fake_async_sleep)
+    monkeypatch.setattr(retry_module, '_breakers', {})
+    return waited
+
+def flaky(errors, result='ok'):
+    """Funkce, která postupně vyhodí zadané chyby a pak uspěje"""
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+    func.calls = calls
+    return func
+
+class TestRetryStrategy:
+    def test_jitter_bounds(self):
+        """Zpoždění s rozptylem leží mezi (1 - jitter) a plnou hodnotou, nejvýš max_delay"""
+        strategy = RetryStrategy(delay=2.0, backoff_factor=2.0, jitter=0.5, max_delay=5.0)
+        for _ in range(100):
+            assert 1.0 <= strategy.get_delay(1) <= 2.0
+            assert 2.5 <= strategy.get_delay(5) <= 5.0
+
+    def test_retry_after_seconds_and_date(self):
+        """Retry-After v sekundách i jako HTTP datum"""
+        assert retry_after(HTTPError(429, {'Retry-After': '7'})) == 7.0
+        moment = datetime.now(timezone.utc) + timedelta(seconds=30)
+        wait = retry_after(HTTPError(503, {'Retry-After': format_datetime(moment, usegmt=True)}))
+        assert 25 <= wait <= 30
+        assert RetryStrategy().get_delay(1, HTTPError(429, {'Retry-After': '3'})) == 3.0
+
+    def test_status_and_transient_through_chain(self):
+        """Stav a dočasnost se najdou i v zabalené výjimce"""
+        try:
+            try:
+                raise HTTPError(503)
+            except HTTPError as inner:
+                raise DownloadError("stažení selhalo") from inner
+        except DownloadError as e:
+            wrapped = e
+        assert status_of(wrapped) == 503
+        assert is_transient(wrapped)
+        assert not is_transient(HTTPError(404))
+        assert is_transient(ConnectionResetError())
+
+class TestRetryDecorator:
+    def test_sync_retries_transient(self, sleeps):
+        func = flaky([HTTPError(503), ConnectionError()])
+        assert retry(RetryStrategy(max_attempts=3, exceptions=[NetworkError]))(func)() == 'ok'
+        assert len(func.calls) == 3
+        assert len(sleeps) == 2
+
+    def test_client_error_not_retried(self, sleeps):
+        """Chyba požadavku (404) se neopakuje"""
+        func = flaky([HTTPError(404)])
+        with pytest.raises(HTTPError):
+            retry(RetryStrategy(exceptions=[NetworkError]))(func)()
+        assert len(func.calls) == 1
+
+    def test_async_uses_asyncio_sleep(self, sleeps, monkeypatch):
+        """Korutina čeká přes asyncio.sleep, ne blokujícím time.sleep"""
+        monkeypatch.setattr(retry_module.time, 'sleep', lambda d: pytest.fail("blokující čekání"))
+        calls = []
+
+        @retry(RetryStrategy(max_attempts=3, exceptions=[NetworkError]))
+        async def fetch():
+            calls.append(1)
+            if len(calls) < 3:
+                raise NetworkError("výpadek")
+            return 'ok'
+
+        assert asyncio.run(fetch()) == 'ok'
+        assert len(sleeps) == 2
+
+    def test_exhausted(self, sleeps):
+        func = flaky([NetworkError("a")] * 3)
+        with pytest.raises(RetryError) as info:
+            retry(RetryStrategy(max_attempts=3, exceptions=[NetworkError]))(func)()
+        assert info.value.attempts == 3
+
+    def test_long_retry_after_gives_up(self, sleeps):
+        """Příliš dlouhé Retry-After se nečeká"""
+        func = flaky([HTTPError(429, {'Retry-After': '600'})])
+        with pytest.raises(RetryError):
+            retry(RetryStrategy(max_attempts=3, max_retry_after=60))(func)()
+        assert sleeps == []
+
+class TestCircuitBreaker:
+    def test_opens_and_fails_fast(self, sleeps):
+        """Po sérii chyb další volání hned končí, bez dotazu na backend"""
+        strategy = RetryStrategy(max_attempts=2, exceptions=[NetworkError])
+        func = flaky([NetworkError("x")] * 10)
+        decorated = retry(strategy, circuit_name='test')(func)
+        retry_module.circuit('test').failure_threshold = 3
+
+        with pytest.raises(RetryError):
+            decorated()
+        with pytest.raises(CircuitOpenError):
+            decorated()
+        assert len(func.calls) == 3
+        with pytest.raises(CircuitOpenError):
+            decorated()
+        assert len(func.calls) == 3
+
+    def test_half_open_recovery(self, monkeypatch):
+        """Po uplynutí doby projde jedno zkušební volání, úspěch jistič sepne"""
+        now = [1000.0]
+        monkeypatch.setattr(retry_module.time, 'monotonic', lambda: now[0])
+        breaker = CircuitBreaker('svc', failure_threshold=2, reset_timeout=10)
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == 'open'
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        now[0] += 11
+        breaker.before_call()  # zkušební volání
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()  # ostatní čekají na výsledek
+        breaker.record_success()
+        assert breaker.state == 'closed'
+        breaker.before_call()
+
+    def test_retry_after_opens_immediately(self, monkeypatch):
+        """Retry-After od serveru rozpojí jistič hned na požadovanou dobu"""
+        now = [0.0]
+        monkeypatch.setattr(retry_module.time, 'monotonic', lambda: now[0])
+        breaker = CircuitBreaker('svc', failure_threshold=5)
+        breaker.record_failure(wait=20)
+        assert breaker.state == 'open'
+        now[0] += 21
+        assert breaker.state == 'half_open'
+
+def test_download_error_mapping():
+    """Dočasné chyby yt-dlp se opakují jako NetworkError, ostatní ne"""
+    from src.retry import DOWNLOAD_RETRY
+    assert DOWNLOAD_RETRY.should_retry(NetworkError("výpadek"))
+    assert not DOWNLOAD_RETRY.should_retry(DownloadError("video není dostupné"))
+    assert not DOWNLOAD_RETRY.should_retry(CircuitOpenError("jistič", 'youtube', 5))
@@ -0,0 +1,96 @@
+import threading
+import time
+import pytest
+from src.scheduler import BandwidthScheduler, TokenBucket, host_of
+
+def start_waiter(scheduler, host, priority, started, order):
+    """Vlákno, které čeká na slot a zapíše pořadí, v jakém ho dostalo"""
+    def run():
+        started.release()
+        transfer = scheduler.acquire(host, priority)
+        order.append(priority)
+        scheduler.release(transfer)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def wait_for_queue(scheduler, depth, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while scheduler.stats().queue_depth < depth:
+        assert time.monotonic() < deadline, "Čekající přenosy se neobjevily ve frontě"
+        time.sleep(0.01)
+
+class TestBandwidthScheduler:
+    def test_priority_order(self):
+        """Uvolněný slot dostane nejdřív interaktivní přenos, pak dávka, pak prefetch"""
+        scheduler = BandwidthScheduler(max_active=1, per_host=1, interactive_reserve=0)
+        blocker = scheduler.acquire('https://a.example/x', 'batch')
+        order, started = [], threading.Semaphore(0)
+
+        threads = []
+        for priority in ('prefetch', 'batch', 'interactive'):
+            threads.append(start_waiter(scheduler, 'a.example', priority, started, order))
+            started.acquire()
+            wait_for_queue(scheduler, len(threads))
+
+        scheduler.release(blocker)
+        for thread in threads:
+            thread.join(timeout=2)
+        assert order == ['interactive', 'batch', 'prefetch']
+
+    def test_interactive_reserve(self):
+        """Interaktivní přenos nečeká, i když dávka zabrala všechny běžné sloty"""
+        scheduler = BandwidthScheduler(max_active=2, per_host=5, interactive_reserve=1)
+        batch = [scheduler.acquire('youtube.com', 'batch') for _ in range(2)]
+
+        assert scheduler.acquire('youtube.com', 'batch', timeout=0.05) is None
+        interactive = scheduler.acquire('youtube.com', 'interactive', timeout=0.5)
+        assert interactive is not None
+        assert scheduler.stats().active == {'batch': 2, 'interactive': 1}
+
+        for transfer in batch + [interactive]:
+            scheduler.release(transfer)
+        assert scheduler.stats().active_count == 0
+
+    def test_per_host_limit(self):
+        """Limit spojení na host neblokuje přenosy na jiné hosty"""
+        scheduler = BandwidthScheduler(max_active=4, per_host=1)
+        first = scheduler.acquire('https://i.ytimg.com/a.jpg', 'prefetch')
+
+        assert scheduler.acquire('https://i.ytimg.com/b.jpg', 'prefetch', timeout=0.05) is None
+        other = scheduler.acquire('https://webshare.cz/file', 'prefetch', timeout=0.5)
+        assert other is not None
+        assert scheduler.stats().hosts == {'i.ytimg.com': 1, 'webshare.cz': 1}
+
+        scheduler.release(first)
+        scheduler.release(other)
+
+    def test_stats_throughput(self):
+        """Statistiky počítají přenesená data"""
+        scheduler = BandwidthScheduler(window=1.0)
+        with scheduler.slot('example.com', 'interactive') as transfer:
+            transfer.consume(2048)
+            transfer.consume(1024)
+
+        stats = scheduler.stats()
+        assert stats.total_bytes == 3072
+        assert stats.throughput == pytest.approx(3072)
+        assert transfer.bytes == 3072
+        assert 'KB/s' in stats.summary()
+
+class TestTokenBucket:
+    def test_unlimited(self):
+        """Rychlost 0 nečeká"""
+        assert TokenBucket(0).consume(10 ** 9) == 0
+
+    def test_rate_limit(self):
+        """Přenos nad zásobník se zpomalí podle limitu"""
+        bucket = TokenBucket(rate=100_000, burst=10_000)
+        start = time.monotonic()
+        bucket.consume(10_000)
+        bucket.consume(10_000)
+        assert time.monotonic() - start >= 0.09
+
+def test_host_of():
+    assert host_of('https://www.youtube.com/watch?v=abc') == 'www.youtube.com'
+    assert host_of('music.youtube.com') == 'music.youtube.com'
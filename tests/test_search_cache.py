@@ -0,0 +1,79 @@
+import pytest
+import time
+from src.search_cache import SearchCache, canonical_query
+
+@pytest.fixture
+def search_cache(tmp_path):
+    return SearchCache(tmp_path / "search", ttl={'yt_dlp': 60}, stale_ttl=120)
+
+class TestCanonicalQuery:
+    @pytest.mark.parametrize("query,expected", [
+        ("Mládek  Žába", "mladek zaba"),
+        ("metallica music audio", "metallica"),
+        ("  METALLICA   Music Audio ", "metallica"),
+        ("Kabát", "kabat")
+    ])
+    def test_canonical_query(self, query, expected):
+        """Test převodu dotazu na kanonický tvar"""
+        assert canonical_query(query) == expected
+
+class TestSearchCache:
+    def test_cache_hit(self, search_cache):
+        """Opakovaný dotaz nevolá vyhledávání znovu"""
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return [{'video_id': 'a'}, {'video_id': 'b'}]
+
+        search_cache.get_or_fetch("Mládek", 2, 'yt_dlp', fetch)
+        results = search_cache.get_or_fetch("mladek music audio", 2, 'yt_dlp', fetch)
+
+        assert results == [{'video_id': 'a'}, {'video_id': 'b'}]
+        assert len(calls) == 1
+
+    def test_smaller_request_uses_larger_entry(self, search_cache):
+        """Menší max_results se obslouží z většího záznamu"""
+        search_cache.get_or_fetch("kabat", 10, 'yt_dlp', lambda: [{'video_id': str(i)} for i in range(10)])
+        results = search_cache.get_or_fetch("kabat", 3, 'yt_dlp', lambda: [])
+
+        assert [r['video_id'] for r in results] == ['0', '1', '2']
+
+    def test_larger_request_refetches(self, search_cache):
+        """Větší max_results než v cache vyvolá nové vyhledávání"""
+        search_cache.get_or_fetch("kabat", 2, 'yt_dlp', lambda: [{'video_id': 'a'}])
+        results = search_cache.get_or_fetch("kabat", 5, 'yt_dlp', lambda: [{'video_id': 'b'}])
+
+        assert results == [{'video_id': 'b'}]
+
+    def test_stale_served_and_refreshed(self, search_cache):
+        """Po vypršení TTL se vrátí stará data a obnoví se na pozadí"""
+        search_cache.get_or_fetch("kabat", 1, 'yt_dlp', lambda: [{'video_id': 'old'}])
+        key = search_cache._make_key('yt_dlp', "kabat")
+        search_cache._memory[key]['fetched_at'] -= 90
+
+        results = search_cache.get_or_fetch("kabat", 1, 'yt_dlp', lambda: [{'video_id': 'new'}])
+        assert results == [{'video_id': 'old'}]
+
+        for _ in range(50):
+            if search_cache.get("kabat", 1, 'yt_dlp'):
+                break
+            time.sleep(0.01)
+        assert search_cache.get("kabat", 1, 'yt_dlp') == [{'video_id': 'new'}]
+
+    def test_expired_refetches(self, search_cache):
+        """Po vypršení stale okna se vyhledává znovu"""
+        search_cache.get_or_fetch("kabat", 1, 'yt_dlp', lambda: [{'video_id': 'old'}])
+        key = search_cache._make_key('yt_dlp', "kabat")
+        search_cache._memory[key]['fetched_at'] -= 500
+
+        results = search_cache.get_or_fetch("kabat", 1, 'yt_dlp', lambda: [{'video_id': 'new'}])
+        assert results == [{'video_id': 'new'}]
+
+    def test_peek_and_put(self, search_cache):
+        """Průběžně nasbírané výsledky se uloží a peek je vrátí"""
+        assert search_cache.peek("kabat", 2, 'yt_dlp') is None
+
+        search_cache.put("kabat", 2, 'yt_dlp', [{'video_id': 'a'}, {'video_id': 'b'}])
+        assert search_cache.peek("Kabát", 2, 'yt_dlp') == [{'video_id': 'a'}, {'video_id': 'b'}]
+        assert search_cache.peek("kabat", 5, 'yt_dlp') is None
@@ -0,0 +1,206 @@
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from src.segmented import SegmentedDownloader, adapt_chunk, merge_ranges, missing_ranges
+from src.retry import RetryStrategy
+from src.scheduler import BandwidthScheduler
+from src.disk_space import DiskSpaceManager
+from src.exceptions import DownloadError
+
+KB = 1024
+DATA = os.urandom(600 * KB)
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Statický soubor s podporou Range, chováním řídí atributy serveru"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        data = server.data
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        use_range = server.ranges and match and (not if_range or if_range == server.etag)
+
+        if use_range:
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else len(data)
+            body = data[start:end]
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end - 1}/{len(data)}")
+        else:
+            start, body = 0, data
+            self.send_response(200)
+        with server.lock:
+            server.requests.append((start, len(body)))
+            fail = start > 0 and server.fail_after is not None and server.served >= server.fail_after
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Disposition', 'attachment; filename="album.flac"')
+        if server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+        if fail:
+            # Výpadek - pošle kus dat a zavře spojení
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+        with server.lock:
+            server.served += len(body)
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    httpd.data = DATA
+    httpd.etag = '"v1"'
+    httpd.ranges = True
+    httpd.fail_after = None
+    httpd.served = 0
+    httpd.requests = []
+    httpd.lock = threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/album.flac"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def downloader(**kwargs):
+    options = dict(
+        connections=4,
+        min_chunk=64 * KB,
+        max_chunk=128 * KB,
+        strategy=RetryStrategy(max_attempts=2, delay=0.01, exceptions=[]),
+        scheduler=BandwidthScheduler(max_active=8, per_host=8),
+        space=DiskSpaceManager(margin=0)
+    )
+    options.update(kwargs)
+    return SegmentedDownloader(requests.Session(), **options)
+
+class TestSegmentedDownloader:
+    def test_parallel_ranges(self, server, tmp_path):
+        """Soubor se stáhne po úsecích přes více spojení a ověří"""
+        target = tmp_path / 'album.flac'
+        progress = []
+        result = downloader().download(server.url, target, progress=lambda done, total: progress.append(done))
+
+        assert target.read_bytes() == DATA
+        assert result.digest == hashlib.sha256(DATA).hexdigest()
+        assert result.connections == 4
+        assert progress[-1] == len(DATA)
+        # Úvodní dotaz na první bajt + úseky
+        assert len(server.requests) > 4
+        assert not (tmp_path / 'album.flac.part').exists()
+        assert not (tmp_path / 'album.flac.part.json').exists()
+
+    def test_probe(self, server):
+        remote = downloader().probe(server.url)
+        assert remote.size == len(DATA)
+        assert remote.ranges
+        assert remote.etag == '"v1"'
+        assert remote.filename == 'album.flac'
+
+    def test_resume_after_failure(self, server, tmp_path):
+        """Přerušené stažení pokračuje jen chybějícími úseky"""
+        target = tmp_path / 'album.flac'
+        server.fail_after = 200 * KB
+        with pytest.raises(DownloadError):
+            downloader(connections=2).download(server.url, target)
+
+        state = json.loads((tmp_path / 'album.flac.part.json').read_text())
+        saved = sum(end - start for start, end in state['done'])
+        assert saved >= 200 * KB
+        assert not target.exists()
+
+        server.fail_after = None
+        server.requests.clear()
+        result = downloader().download(server.url, target)
+
+        assert target.read_bytes() == DATA
+        assert result.resumed == saved
+        fetched = sum(length for start, length in server.requests[1:])
+        assert fetched == len(DATA) - saved
+
+    def test_changed_file_starts_over(self, server, tmp_path):
+        """Jiný ETag na serveru - uložený stav se zahodí"""
+        target = tmp_path / 'album.flac'
+        server.fail_after = 200 * KB
+        with pytest.raises(DownloadError):
+            downloader(connections=2).download(server.url, target)
+
+        server.fail_after = None
+        server.data = bytes(reversed(DATA))
+        server.etag = '"v2"'
+        result = downloader().download(server.url, target)
+
+        assert result.resumed == 0
+        assert target.read_bytes() == server.data
+
+    def test_server_without_ranges(self, server, tmp_path):
+        """Bez podpory Range se soubor stáhne jedním spojením"""
+        server.ranges = False
+        target = tmp_path / 'album.flac'
+        result = downloader().download(server.url, target)
+
+        assert target.read_bytes() == DATA
+        assert result.connections == 1
+
+    def test_checksum_mismatch(self, server, tmp_path):
+        """Nesedící součet smaže rozpracovaný soubor i stav"""
+        target = tmp_path / 'album.flac'
+        with pytest.raises(DownloadError):
+            downloader().download(server.url, target, checksum=('sha256', '0' * 64))
+        assert not target.exists()
+        assert not (tmp_path / 'album.flac.part').exists()
+        assert not (tmp_path / 'album.flac.part.json').exists()
+
+    def test_connections_limited_by_scheduler(self, server, tmp_path):
+        """Spojení navíc se otevřou jen do limitu plánovače na host"""
+        result = downloader(scheduler=BandwidthScheduler(max_active=8, per_host=2)).download(
+            server.url, tmp_path / 'album.flac'
+        )
+        assert result.connections == 2
+
+def load_webshare():
+    """Načte samostatný soubor src/webshare.py (jméno src.webshare patří balíčku)"""
+    path = Path(__file__).parent.parent / 'src' / 'webshare.py'
+    spec = importlib.util.spec_from_file_location('webshare_module', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class TestWebshareDownload:
+    def test_download_file(self, server, tmp_path, monkeypatch):
+        """Soubor z Webshare se stáhne pod jménem, které pošle server"""
+        webshare = load_webshare()
+        monkeypatch.setattr(webshare.WebshareDownloader, '_login', lambda self: None)
+        monkeypatch.setattr(webshare.WebshareDownloader, 'get_download_link', lambda self, ident: server.url)
+
+        client = webshare.WebshareDownloader('user', 'heslo', connections=3)
+        path = client.download_file('abc123', tmp_path)
+
+        assert path == tmp_path / 'album.flac'
+        assert path.read_bytes() == DATA
+
+def test_adapt_chunk():
+    assert adapt_chunk(0, 4, 64 * KB, 1024 * KB) == 64 * KB
+    assert adapt_chunk(100 * KB, 4, 64 * KB, 1024 * KB) == 384 * KB
+    assert adapt_chunk(10 * 1024 * KB, 4, 64 * KB, 1024 * KB) == 1024 * KB
+
+def test_ranges():
+    assert merge_ranges([(10, 20), (0, 10), (30, 40), (35, 50)]) == [(0, 20), (30, 50)]
+    assert missing_ranges([(0, 20), (30, 50)], 60) == [(20, 30), (50, 60)]
+    assert missing_ranges([], 5) == [(0, 5)]
@@ -0,0 +1,78 @@
+import pytest
+import threading
+import time
+from src.singleflight import SingleFlight
+
+def run_concurrently(count, target):
+    """Spustí `target` ve více vláknech a vrátí jejich výsledky"""
+    results = [None] * count
+
+    def worker(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_result(self):
+        """Souběžná volání se stejným klíčem provedou jen jeden požadavek"""
+        flights = SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return ['a', 'b']
+
+        results = run_concurrently(5, lambda: flights.do("kabat", fetch))
+
+        assert len(calls) == 1
+        assert all(result == ['a', 'b'] for result in results)
+        assert not flights.in_flight("kabat")
+
+    def test_different_keys_run_separately(self):
+        """Různé klíče se neslučují"""
+        flights = SingleFlight()
+        calls = []
+
+        flights.do("a", lambda: calls.append("a"))
+        flights.do("b", lambda: calls.append("b"))
+        flights.do("a", lambda: calls.append("a"))
+
+        assert calls == ["a", "b", "a"]
+
+    def test_error_propagates_to_waiters(self):
+        """Chyba prvního volání se předá všem čekajícím"""
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fetch():
+            started.set()
+            release.wait()
+            raise ValueError("síť nedostupná")
+
+        errors = []
+
+        def call():
+            try:
+                flights.do("x", fetch)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        time.sleep(0.02)
+        release.set()
+        leader.join()
+        follower.join()
+
+        assert len(errors) == 2
+        assert errors[0] is errors[1]
@@ -0,0 +1,71 @@
+import pytest
+import threading
+import time
+from unittest.mock import Mock
+from src.video_metadata import VideoMetadataResolver
+
+def make_youtube(calls):
+    """Falešný klient YouTube API, který vrací položku pro každé ID"""
+    def videos_list(id, part, maxResults):
+        ids = id.split(',')
+        calls.append(ids)
+        request = Mock()
+        request.execute.return_value = {
+            'items': [
+                {'id': vid, 'contentDetails': {'duration': 'PT3M5S'}, 'snippet': {'title': vid}}
+                for vid in ids
+            ]
+        }
+        return request
+
+    youtube = Mock()
+    youtube.videos.return_value.list.side_effect = videos_list
+    return youtube
+
+class TestVideoMetadataResolver:
+    def test_batches_of_50(self, tmp_path):
+        """ID se posílají po dávkách nejvýše 50"""
+        calls = []
+        resolver = VideoMetadataResolver(make_youtube(calls), tmp_path / "meta.json")
+        result = resolver.resolve([f"id{i}" for i in range(120)])
+
+        assert len(result) == 120
+        assert [len(batch) for batch in calls] == [50, 50, 20]
+
+    def test_known_ids_skip_api(self, tmp_path):
+        """Známá ID se nedotazují znovu, ani po restartu"""
+        calls = []
+        VideoMetadataResolver(make_youtube(calls), tmp_path / "meta.json").resolve(["a", "b"])
+
+        resolver = VideoMetadataResolver(make_youtube(calls), tmp_path / "meta.json")
+        result = resolver.resolve(["a", "b", "c"])
+
+        assert calls == [["a", "b"], ["c"]]
+        assert result["a"].duration == 'PT3M5S'
+
+    def test_concurrent_resolve_coalesces(self, tmp_path):
+        """Souběžné dotazy na stejná ID vedou k jedinému volání API"""
+        calls = []
+        youtube = make_youtube(calls)
+        inner = youtube.videos.return_value.list.side_effect
+
+        def slow_list(**kwargs):
+            time.sleep(0.05)
+            return inner(**kwargs)
+
+        youtube.videos.return_value.list.side_effect = slow_list
+        resolver = VideoMetadataResolver(youtube, tmp_path / "meta.json")
+
+        results = [None] * 4
+
+        def worker(i):
+            results[i] = resolver.resolve(["a", "b"])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert calls == [["a", "b"]]
+        assert all(set(result) == {"a", "b"} for result in results)
@@ -0,0 +1,91 @@
+import pytest
+import threading
+
+yt_dlp = pytest.importorskip("yt_dlp")
+
+from src.ydl_pool import YDLPool
+
+@pytest.fixture
+def pool():
+    pool = YDLPool({'search': {'quiet': True, 'extract_flat': 'in_playlist'}}, max_size=2)
+    yield pool
+    pool.close()
+
+class TestYDLPool:
+    def test_instance_reused(self, pool):
+        """Vrácená instance se znovu použije"""
+        with pool.session('search') as first:
+            pass
+        with pool.session('search') as second:
+            pass
+        assert first is second
+
+    def test_overrides_separate_instances(self, pool):
+        """Jiné volby sestavení znamenají jinou instanci"""
+        with pool.session('search') as plain:
+            pass
+        with pool.session('search', overrides={'playlistend': 3}) as limited:
+            assert limited.params['playlistend'] == 3
+        assert plain is not limited
+
+    def test_split_options(self, pool):
+        """Cílová složka jde do parametrů zápůjčky, postprocesory do klíče instance"""
+        overrides, params = pool.split_options('search', {
+            'quiet': True,
+            'outtmpl': '/music/a/%(title)s.%(ext)s',
+            'postprocessors': [{'key': 'FFmpegMetadata'}]
+        })
+        assert overrides == {'postprocessors': [{'key': 'FFmpegMetadata'}]}
+        assert params == {'outtmpl': '/music/a/%(title)s.%(ext)s'}
+
+    def test_folders_share_instance(self, pool):
+        """Různé cílové složky používají stejnou instanci"""
+        instances = []
+        for folder in ('a', 'b', 'c'):
+            _, params = pool.split_options('search', {'outtmpl': f'/music/{folder}/%(title)s.%(ext)s'})
+            with pool.session('search', params=params) as ydl:
+                instances.append(ydl)
+        assert len({id(ydl) for ydl in instances}) == 1
+
+    def test_idle_overrides_evicted(self, pool):
+        """Nečinné instance přídavných voleb se zavřou, instance profilu zůstane"""
+        pool.idle_timeout = 0
+        with pool.session('search'):
+            pass
+        with pool.session('search', overrides={'playlistend': 3}):
+            pass
+        with pool.session('search'):
+            pass
+        assert list(pool._idle) == [('search', '')]
+        assert ('search', pool._options_key({'playlistend': 3})) not in pool._created
+
+    def test_params_restored(self, pool):
+        """Parametry zápůjčky se po vrácení obnoví"""
+        with pool.session('search', params={'playlistend': 5}) as ydl:
+            assert ydl.params['playlistend'] == 5
+        assert 'playlistend' not in ydl.params
+
+    def test_hooks_removed(self, pool):
+        """Hooky zápůjčky se po vrácení odstraní"""
+        hook = lambda d: None
+        with pool.session('search', progress_hooks=[hook]) as ydl:
+            assert hook in ydl._progress_hooks
+        assert hook not in ydl._progress_hooks
+
+    def test_max_size_across_threads(self, pool):
+        """Souběžně existuje nejvýše max_size instancí"""
+        seen = set()
+        barrier = threading.Barrier(2)
+
+        def worker():
+            with pool.session('search') as ydl:
+                seen.add(id(ydl))
+                barrier.wait(timeout=5)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(seen) == 2